@@ -0,0 +1,28 @@
+"""Add shop_expenses (expense_date, expense_id) index for cursor pagination
+
+Revision ID: 5e8a1f0c3d27
+Revises: b41d7c2e9a53
+Create Date: 2026-10-18 11:40:05.118264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8a1f0c3d27'
+down_revision: Union[str, Sequence[str], None] = 'b41d7c2e9a53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_shop_expenses_date_id", "shop_expenses", ["expense_date", "expense_id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_shop_expenses_date_id", table_name="shop_expenses", if_exists=True)
@@ -0,0 +1,42 @@
+"""Add customer/date composite indexes for ledger and transaction listing
+
+Revision ID: b41d7c2e9a53
+Revises: 970e524f1062
+Create Date: 2026-10-18 10:12:31.402917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41d7c2e9a53'
+down_revision: Union[str, Sequence[str], None] = '970e524f1062'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (نام ایندکس، جدول، ستون‌ها)
+INDEXES = [
+    ("ix_gold_ledger_customer_date_id", "gold_ledger", ["customer_id", "transaction_date", "gold_ledger_id"]),
+    ("idx_gold_ledger_date", "gold_ledger", ["transaction_date"]),
+    ("ix_money_ledger_customer_date_id", "money_ledger", ["customer_id", "transaction_date", "money_ledger_id"]),
+    ("idx_money_ledger_date", "money_ledger", ["transaction_date"]),
+    ("ix_transactions_customer_date_id", "transactions", ["customer_id", "date", "txn_id"]),
+    ("ix_debts_customer_date_id", "debts", ["customer_id", "created_at", "debt_id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in INDEXES:
+        if name.startswith("ix_"):
+            op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,36 @@
+"""Add voided_at / reversal_of_id to gold_ledger and money_ledger for reversal voiding
+
+Revision ID: c7d93e41a8b6
+Revises: 5e8a1f0c3d27
+Create Date: 2026-10-18 19:05:12.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d93e41a8b6'
+down_revision: Union[str, Sequence[str], None] = '5e8a1f0c3d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LEDGER_TABLES = ("gold_ledger", "money_ledger")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite کلید خارجی را با ALTER TABLE اضافه نمی‌کند؛ reversal_of_id در این مسیر ستون ساده است
+    for table in LEDGER_TABLES:
+        op.add_column(table, sa.Column("voided_at", sa.DateTime(), nullable=True))
+        op.add_column(table, sa.Column("reversal_of_id", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in LEDGER_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("reversal_of_id")
+            batch_op.drop_column("voided_at")
@@ -0,0 +1,36 @@
+"""Add txn_id to gold_ledger and money_ledger linking rows posted from a transaction
+
+Revision ID: e3a6f2b9c418
+Revises: c7d93e41a8b6
+Create Date: 2026-10-18 21:14:37.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a6f2b9c418'
+down_revision: Union[str, Sequence[str], None] = 'c7d93e41a8b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LEDGER_TABLES = ("gold_ledger", "money_ledger")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite کلید خارجی را با ALTER TABLE اضافه نمی‌کند؛ txn_id در این مسیر ستون ساده (با ایندکس) است
+    for table in LEDGER_TABLES:
+        op.add_column(table, sa.Column("txn_id", sa.Integer(), nullable=True))
+        op.create_index(f"ix_{table}_txn_id", table, ["txn_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in LEDGER_TABLES:
+        op.drop_index(f"ix_{table}_txn_id", table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("txn_id")
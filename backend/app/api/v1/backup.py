@@ -1,14 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 import pandas as pd
+from openpyxl import Workbook
 from datetime import datetime
 import os
+import shutil
 import logging
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import SessionLocal, get_db
+from app.core.jobs import Job, job_runner
+from app.core.journal import JOURNAL_INSERT, record_changes
+from app.core.daily_rollup import record_rollups
+from app.crud.journal_backup import BACKUP_KIND_FULL, BACKUP_KIND_INCREMENTAL, create_journal_backup
+from app.core.sqlite_backup import create_snapshot, list_snapshots
+from app.crud.running_balance import rebalance_from
+from app.crud.transaction import TRANSACTION_BALANCE
 from app.models.transaction import Transaction
 from app.models.customer import Customer
+from app.models.gold_ledger import GoldLedger
+from app.models.money_ledger import MoneyLedger
+from app.models.capital import Capital
 
 from pydrive2.auth import GoogleAuth
 from pydrive2.drive import GoogleDrive
@@ -22,6 +35,11 @@ router = APIRouter()
 EXPORT_DIR = os.path.join(os.path.dirname(__file__), "../../../exports")
 os.makedirs(EXPORT_DIR, exist_ok=True)
 
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# بک‌آپ‌های دفتر تغییرات (کامل + افزایشی)
+JOURNAL_EXPORT_DIR = os.path.join(EXPORT_DIR, "journal")
+
 # ---------- آپلود به گوگل درایو ----------
 def upload_to_drive(file_path, folder_id):
     try:
@@ -41,42 +59,154 @@ def upload_to_drive(file_path, folder_id):
         logger.error(f"خطا در آپلود به گوگل‌درایو: {str(e)}")
         raise HTTPException(status_code=500, detail=f"❌ خطا در آپلود گوگل‌درایو: {str(e)}")
 
+class DriveUploader:
+    label = "گوگل‌درایو"
+
+    def __init__(self, folder_id: str):
+        self.folder_id = folder_id
+
+    def upload(self, file_path: str) -> str:
+        return upload_to_drive(file_path, self.folder_id)
+
+class LocalUploader:
+    """
+    جایگزین محلی گوگل‌درایو (برای تست آفلاین): فایل در پوشه BACKUP_UPLOAD_DIR کپی می‌شود
+    """
+    label = "پوشه محلی"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def upload(self, file_path: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        filename = os.path.basename(file_path)
+        shutil.copyfile(file_path, os.path.join(self.directory, filename))
+        return filename
+
+def get_uploader():
+    if settings.BACKUP_UPLOADER == "local":
+        return LocalUploader(settings.BACKUP_UPLOAD_DIR)
+    return DriveUploader(settings.DRIVE_FOLDER_ID)
+
 # ---------- ایجاد بک‌آپ اکسل ----------
-def create_excel_backup(db: Session):
-    try:
-        transactions = db.query(Transaction).all()
-        if not transactions:
-            raise HTTPException(status_code=404, detail="هیچ معامله‌ای یافت نشد")
-
-        data = []
-        for txn in transactions:
-            date_str = txn.date.strftime("%Y-%m-%d") if isinstance(txn.date, datetime) else txn.date
-            created_at_str = txn.created_at.strftime("%Y-%m-%d %H:%M:%S") if isinstance(txn.created_at, datetime) else txn.created_at
-            data.append({
-                "شناسه": txn.txn_id,
-                "مشتری": txn.customer.full_name if txn.customer else "نامشخص",
-                "نوع معامله": "خرید" if txn.type == "buy" else "فروش",
-                "وزن (گرم)": round(float(txn.weight), 3),
-                "عیار مبدا": round(float(txn.source_carat), 3),
-                "نرخ توله": round(float(txn.gold_rate), 3),
-                "مقدار طلا": round(float(txn.gold_amount), 3),
-                "خرید (طلا)": round(float(txn.gold_in), 3),
-                "پول خرید": round(float(txn.dollar_out), 3),
-                "فروش (طلا)": round(float(txn.gold_out), 3),
-                "پول فروش": round(float(txn.dollar_in), 3),
-                "بیلانس دالر": round(float(txn.dollar_balance), 3),
-                "بیلانس طلا": round(float(txn.gold_balance), 3),
-                "توضیحات": txn.detail if txn.detail else "",
-                "تاریخ": date_str,
-                "زمان ایجاد": created_at_str,
-            })
+# تعداد ردیف‌هایی که در هر مرحله از دیتابیس خوانده می‌شوند
+BACKUP_FETCH_SIZE = 1000
+
+TRANSACTION_COLUMNS = [
+    "شناسه", "مشتری", "نوع معامله", "وزن (گرم)", "عیار مبدا", "نرخ توله",
+    "مقدار طلا", "خرید (طلا)", "پول خرید", "فروش (طلا)", "پول فروش",
+    "بیلانس دالر", "بیلانس طلا", "توضیحات", "تاریخ", "زمان ایجاد"
+]
+
+def _format_datetime(value, fmt="%Y-%m-%d %H:%M:%S"):
+    return value.strftime(fmt) if isinstance(value, datetime) else value
+
+def _to_float(value, digits=3):
+    return round(float(value), digits) if value is not None else None
+
+def _transaction_rows(db: Session):
+    query = db.query(Transaction, Customer.full_name) \
+        .outerjoin(Customer, Customer.customer_id == Transaction.customer_id) \
+        .order_by(Transaction.txn_id).yield_per(BACKUP_FETCH_SIZE)
+    for txn, full_name in query:
+        yield [
+            txn.txn_id,
+            full_name if full_name is not None else "نامشخص",
+            "خرید" if txn.type == "buy" else "فروش",
+            _to_float(txn.weight),
+            _to_float(txn.source_carat),
+            _to_float(txn.gold_rate),
+            _to_float(txn.gold_amount),
+            _to_float(txn.gold_in),
+            _to_float(txn.dollar_out),
+            _to_float(txn.gold_out),
+            _to_float(txn.dollar_in),
+            _to_float(txn.dollar_balance),
+            _to_float(txn.gold_balance),
+            txn.detail if txn.detail else "",
+            _format_datetime(txn.date, "%Y-%m-%d"),
+            _format_datetime(txn.created_at),
+        ]
+
+def _customer_rows(db: Session):
+    query = db.query(
+        Customer.customer_id, Customer.full_name, Customer.phone, Customer.address, Customer.created_at
+    ).order_by(Customer.customer_id).yield_per(BACKUP_FETCH_SIZE)
+    for customer_id, full_name, phone, address, created_at in query:
+        yield [customer_id, full_name, phone or "", address or "", _format_datetime(created_at)]
+
+def _gold_ledger_rows(db: Session):
+    query = db.query(
+        GoldLedger.gold_ledger_id, GoldLedger.customer_id, Customer.full_name, GoldLedger.capital_id,
+        GoldLedger.transaction_date, GoldLedger.description, GoldLedger.received, GoldLedger.paid,
+        GoldLedger.heel_purity_carat, GoldLedger.balance
+    ).outerjoin(Customer, Customer.customer_id == GoldLedger.customer_id) \
+        .order_by(GoldLedger.gold_ledger_id).yield_per(BACKUP_FETCH_SIZE)
+    for (ledger_id, customer_id, full_name, capital_id, txn_date, description,
+         received, paid, heel_purity, balance) in query:
+        yield [
+            ledger_id, customer_id, full_name or "نامشخص", capital_id, _format_datetime(txn_date),
+            description or "", _to_float(received, 4), _to_float(paid, 4), _to_float(heel_purity),
+            _to_float(balance, 4)
+        ]
 
-        df = pd.DataFrame(data)
-        filename = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        filepath = os.path.join(EXPORT_DIR, filename)
-        df.to_excel(filepath, index=False, engine='openpyxl')
+def _money_ledger_rows(db: Session):
+    query = db.query(
+        MoneyLedger.money_ledger_id, MoneyLedger.customer_id, Customer.full_name, MoneyLedger.capital_id,
+        MoneyLedger.transaction_date, MoneyLedger.description, MoneyLedger.received, MoneyLedger.paid,
+        MoneyLedger.usd_balance
+    ).outerjoin(Customer, Customer.customer_id == MoneyLedger.customer_id) \
+        .order_by(MoneyLedger.money_ledger_id).yield_per(BACKUP_FETCH_SIZE)
+    for (ledger_id, customer_id, full_name, capital_id, txn_date, description,
+         received, paid, usd_balance) in query:
+        yield [
+            ledger_id, customer_id, full_name or "نامشخص", capital_id, _format_datetime(txn_date),
+            description or "", _to_float(received, 2), _to_float(paid, 2), _to_float(usd_balance, 2)
+        ]
+
+def _capital_rows(db: Session):
+    query = db.query(
+        Capital.id, Capital.usd_capital, Capital.gold_capital, Capital.date
+    ).order_by(Capital.id).yield_per(BACKUP_FETCH_SIZE)
+    for capital_id, usd_capital, gold_capital, capital_date in query:
+        yield [capital_id, _to_float(usd_capital, 2), _to_float(gold_capital, 4), capital_date.isoformat() if capital_date else None]
+
+# برگه‌های فایل بک‌آپ؛ برگه اول (معاملات) همان قالبی است که /backup/import می‌خواند
+BACKUP_SHEETS = [
+    ("معاملات", TRANSACTION_COLUMNS, _transaction_rows),
+    ("مشتریان", ["کد", "نام", "شماره", "آدرس", "تاریخ ثبت"], _customer_rows),
+    ("روزنامچه طلا", ["شناسه", "کد مشتری", "مشتری", "کد سرمایه", "تاریخ تراکنش", "توضیحات",
+                      "دریافتی", "پرداختی", "عیار پاشنه", "بیلانس"], _gold_ledger_rows),
+    ("روزنامچه پول", ["شناسه", "کد مشتری", "مشتری", "کد سرمایه", "تاریخ تراکنش", "توضیحات",
+                      "دریافتی", "پرداختی", "بیلانس دالر"], _money_ledger_rows),
+    ("سرمایه", ["شناسه", "سرمایه دالر", "سرمایه طلا", "تاریخ"], _capital_rows),
+]
+
+def create_excel_backup(db: Session, progress=None):
+    """
+    بک‌آپ کامل دیتابیس در یک فایل اکسل؛ ردیف‌ها با yield_per مستقیماً در workbook
+    حالت write-only نوشته می‌شوند تا مصرف حافظه مستقل از حجم تاریخچه بماند.
+    progress (اختیاری) قبل از هر برگه با (شماره برگه، تعداد برگه‌ها، عنوان) صدا زده می‌شود.
+    """
+    filename = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.xlsx"
+    filepath = os.path.join(EXPORT_DIR, filename)
+    try:
+        workbook = Workbook(write_only=True)
+        for index, (title, headers, rows) in enumerate(BACKUP_SHEETS):
+            if progress:
+                progress(index, len(BACKUP_SHEETS), title)
+            sheet = workbook.create_sheet(title=title)
+            sheet.append(headers)
+            count = 0
+            for row in rows(db):
+                sheet.append(row)
+                count += 1
+            logger.info(f"بک‌آپ اکسل: برگه {title} با {count} ردیف نوشته شد")
+        workbook.save(filepath)
         return filepath, filename
     except Exception as e:
+        if os.path.exists(filepath):
+            os.remove(filepath)
         logger.error(f"خطا در ایجاد بک‌آپ اکسل: {str(e)}")
         raise HTTPException(status_code=500, detail=f"خطا در ایجاد فایل اکسل: {str(e)}")
 
@@ -87,38 +217,283 @@ def export_transactions_excel(db: Session = Depends(get_db)):
     return FileResponse(
         path=filepath,
         filename=filename,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        media_type=XLSX_MEDIA_TYPE
     )
 
 # ---------- Upload to Google Drive Endpoint ----------
 @router.post("/backup/upload_drive")
 def upload_backup_to_drive(db: Session = Depends(get_db)):
-    folder_id = "1dPWL6JdxhcjTV6eyuXy1ZsKje59E5FTb"  # پوشه گوگل‌درایو
+    uploader = get_uploader()
     filepath, filename = create_excel_backup(db)
-    uploaded_filename = upload_to_drive(filepath, folder_id)
-    return {"message": f"✅ فایل {uploaded_filename} با موفقیت در گوگل‌درایو آپلود شد."}
+    uploaded_filename = uploader.upload(filepath)
+    return {"message": f"✅ فایل {uploaded_filename} با موفقیت در {uploader.label} آپلود شد."}
+
+# ---------- Background Jobs ----------
+def _backup_job(job: Job, upload: bool):
+    """
+    ساخت بک‌آپ (و در صورت نیاز آپلود) در پس‌زمینه با session مستقل
+    """
+    # سهم ساخت فایل از پیشرفت کل؛ باقی برای آپلود
+    build_share = 80 if upload else 100
+
+    def progress(index, total, title):
+        job.set_progress(build_share * index // total, f"در حال نوشتن برگه {title}")
+
+    db = SessionLocal()
+    try:
+        filepath, filename = create_excel_backup(db, progress=progress)
+    finally:
+        db.close()
+    job.set_artifact(filepath, filename, XLSX_MEDIA_TYPE)
+    if not upload:
+        return {"filename": filename}
+
+    uploader = get_uploader()
+    job.set_progress(build_share, f"در حال آپلود در {uploader.label}")
+    uploaded_filename = uploader.upload(filepath)
+    return {
+        "filename": filename,
+        "message": f"✅ فایل {uploaded_filename} با موفقیت در {uploader.label} آپلود شد."
+    }
+
+@router.post("/backup/export/job", status_code=202)
+def export_backup_job():
+    job = job_runner.submit("backup_export", lambda job: _backup_job(job, upload=False))
+    return job.to_dict()
+
+@router.post("/backup/upload_drive/job", status_code=202)
+def upload_backup_job():
+    job = job_runner.submit("backup_upload", lambda job: _backup_job(job, upload=True))
+    return job.to_dict()
+
+def _journal_backup_job(job: Job, kind: str):
+    db = SessionLocal()
+    try:
+        filepath, run = create_journal_backup(db, kind, JOURNAL_EXPORT_DIR)
+    finally:
+        db.close()
+    job.set_artifact(filepath, run.filename, "application/gzip")
+    return {
+        "filename": run.filename,
+        "kind": run.kind,
+        "from_journal_id": run.from_journal_id,
+        "to_journal_id": run.to_journal_id,
+    }
+
+@router.post("/backup/journal/job", status_code=202)
+def journal_backup_job(
+    kind: str = Query(BACKUP_KIND_INCREMENTAL, pattern=f"^({BACKUP_KIND_FULL}|{BACKUP_KIND_INCREMENTAL})$")
+):
+    """
+    بک‌آپ از روی دفتر تغییرات: full همه ردیف‌ها، incremental فقط تغییرات بعد از آخرین بک‌آپ
+    """
+    job = job_runner.submit(f"journal_{kind}", lambda job: _journal_backup_job(job, kind))
+    return job.to_dict()
+
+def _snapshot_job(job: Job):
+    def progress(remaining, total):
+        if total:
+            job.set_progress(90 * (total - remaining) // total, f"کپی صفحات: {total - remaining} از {total}")
+
+    result = create_snapshot(progress=progress)
+    job.set_progress(95, "بررسی و فشرده‌سازی انجام شد")
+    job.set_artifact(result.pop("path"), result["filename"], "application/gzip")
+    return result
+
+@router.post("/backup/snapshot/job", status_code=202)
+def snapshot_backup_job():
+    """
+    snapshot کامل و فشرده از فایل SQLite با API آنلاین بک‌آپ (بدون متوقف کردن نوشتن‌ها)
+    """
+    job = job_runner.submit("sqlite_snapshot", _snapshot_job)
+    return job.to_dict()
+
+@router.get("/backup/snapshots")
+def read_snapshots():
+    return list_snapshots()
 
 # ---------- Import from Excel ----------
+IMPORT_REQUIRED_COLUMNS = [
+    "شناسه", "مشتری", "نوع معامله", "وزن (گرم)", "عیار مبدا", "نرخ توله",
+    "مقدار طلا", "خرید (طلا)", "پول خرید", "فروش (طلا)", "پول فروش",
+    "بیلانس دالر", "بیلانس طلا", "توضیحات", "تاریخ", "زمان ایجاد"
+]
+
+# ستون‌های عددی فایل اکسل -> ستون جدول transactions
+# ستون‌های «بیلانس دالر» و «بیلانس طلا» خوانده نمی‌شوند؛ بیلانس‌ها بعد از درج در سرور محاسبه می‌شوند
+IMPORT_NUMERIC_COLUMNS = {
+    "وزن (گرم)": "weight",
+    "عیار مبدا": "source_carat",
+    "نرخ توله": "gold_rate",
+    "مقدار طلا": "gold_amount",
+    "خرید (طلا)": "gold_in",
+    "فروش (طلا)": "gold_out",
+    "پول فروش": "dollar_in",
+    "پول خرید": "dollar_out",
+}
+
+# حداکثر تعداد مقادیر در هر کوئری IN (محدودیت پارامترهای SQLite)
+IMPORT_IN_CHUNK = 500
+
+def _chunks(values, size=IMPORT_IN_CHUNK):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+def _rebalance_imported(db: Session, keys) -> None:
+    """
+    محاسبه مجدد بیلانس معاملات هر مشتری یک بار از قدیمی‌ترین معامله واردشده (customer_id, date, txn_id)
+    """
+    first = {}
+    for customer_id, date, txn_id in keys:
+        if customer_id not in first or (date, txn_id) < first[customer_id]:
+            first[customer_id] = (date, txn_id)
+    for customer_id, (date, txn_id) in first.items():
+        rebalance_from(db, TRANSACTION_BALANCE, customer_id, date, txn_id)
+
+def bulk_import_transactions(df: pd.DataFrame, db: Session) -> dict:
+    """
+    ایمپورت گروهی معاملات: اعتبارسنجی ستونی با pandas، یک کوئری IN برای شناسه‌های موجود و
+    یک کوئری IN برای نام مشتریان، سپس درج گروهی و محاسبه بیلانس‌ها در یک تراکنش.
+    ردیف‌های نامعتبر کل ایمپورت را متوقف نمی‌کنند و در لیست errors برگردانده می‌شوند.
+    """
+    errors = []
+    invalid = pd.Series(False, index=df.index)
+    ids = pd.to_numeric(df["شناسه"], errors="coerce")
+
+    def reject(mask, message):
+        nonlocal invalid
+        mask = mask & ~invalid
+        for index in df.index[mask]:
+            txn_id = ids.at[index]
+            errors.append({
+                "row": int(index) + 2,
+                "txn_id": int(txn_id) if pd.notna(txn_id) and txn_id % 1 == 0 else None,
+                "error": message
+            })
+        invalid = invalid | mask
+
+    # شناسه
+    reject(ids.isna(), "شناسه خالی یا نامعتبر است")
+    reject(ids.notna() & (ids % 1 != 0), "شناسه باید عدد صحیح باشد")
+    reject(ids.duplicated(keep="first") & ids.notna(), "شناسه در فایل تکراری است")
+
+    # مشتری
+    names = df["مشتری"].where(df["مشتری"].notna(), "").astype(str).str.strip()
+    reject((names == "") | (names == "نامشخص"), "نام مشتری نمی‌تواند خالی یا 'نامشخص' باشد")
+
+    # ستون‌های عددی (خانه خالی = صفر، مقدار غیرعددی = خطا)
+    numeric = {}
+    for column, field in IMPORT_NUMERIC_COLUMNS.items():
+        values = pd.to_numeric(df[column], errors="coerce")
+        reject(values.isna() & df[column].notna(), f"مقدار ستون «{column}» عدد نیست")
+        numeric[field] = values.fillna(0.0).astype(float).round(3)
+
+    # تاریخ‌ها
+    dates = pd.to_datetime(df["تاریخ"], errors="coerce")
+    reject(dates.isna(), "تاریخ نامعتبر")
+    created_ats = pd.to_datetime(df["زمان ایجاد"], errors="coerce")
+    now = datetime.utcnow().replace(microsecond=0)
+
+    types = df["نوع معامله"].where(df["نوع معامله"].notna(), "").astype(str).str.strip()
+    details = df["توضیحات"]
+
+    # شناسه‌های موجود در دیتابیس (یک کوئری IN در هر دسته)
+    candidate_ids = [int(v) for v in ids[~invalid].unique()]
+    existing_ids = set()
+    for chunk in _chunks(candidate_ids):
+        existing_ids.update(
+            txn_id for (txn_id,) in db.query(Transaction.txn_id).filter(Transaction.txn_id.in_(chunk))
+        )
+    duplicate_mask = ~invalid & ids.isin(existing_ids)
+    skipped_count = int(duplicate_mask.sum())
+    valid = ~invalid & ~duplicate_mask
+
+    try:
+        # حل نام مشتریان با کوئری IN و ساخت مشتریان جدید به صورت گروهی
+        wanted_names = list(names[valid].unique())
+        customer_ids = {}
+        for chunk in _chunks(wanted_names):
+            customer_ids.update(
+                (full_name, customer_id)
+                for customer_id, full_name in db.query(Customer.customer_id, Customer.full_name)
+                .filter(Customer.full_name.in_(chunk))
+            )
+        new_customers = [Customer(full_name=name) for name in wanted_names if name not in customer_ids]
+        if new_customers:
+            db.add_all(new_customers)
+            db.flush()
+            customer_ids.update((c.full_name, c.customer_id) for c in new_customers)
+            logger.info(f"ایمپورت: {len(new_customers)} مشتری جدید ایجاد شد")
+
+        mappings = []
+        for index in df.index[valid]:
+            created_at = created_ats.at[index]
+            detail = details.at[index]
+            mapping = {field: float(values.at[index]) for field, values in numeric.items()}
+            mapping.update(
+                txn_id=int(ids.at[index]),
+                customer_id=customer_ids[names.at[index]],
+                type="buy" if types.at[index] == "خرید" else "sell",
+                detail=detail if pd.notna(detail) else None,
+                date=dates.at[index].strftime("%Y-%m-%d"),
+                # ستون created_at از نوع DateTime است و شیء datetime می‌گیرد
+                created_at=created_at.to_pydatetime() if pd.notna(created_at) else now,
+                dollar_balance=0.0,
+                gold_balance=0.0,
+            )
+            mappings.append(mapping)
+
+        if mappings:
+            db.bulk_insert_mappings(Transaction, mappings)
+            record_changes(db, Transaction, JOURNAL_INSERT, mappings)
+            record_rollups(db, Transaction, mappings)
+            _rebalance_imported(db, ((m["customer_id"], m["date"], m["txn_id"]) for m in mappings))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"خطا در ذخیره گروهی معاملات در دیتابیس: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"خطا در ذخیره معاملات در دیتابیس: {str(e)}")
+
+    imported_count = len(mappings)
+    errors.sort(key=lambda e: e["row"])
+    logger.info(
+        f"ایمپورت گروهی: {imported_count} تراکنش وارد شد، {skipped_count} تکراری، {len(errors)} ردیف نامعتبر"
+    )
+    message = f"✅ {imported_count} تراکنش با موفقیت وارد شدند. {skipped_count} تراکنش تکراری نادیده گرفته شدند."
+    if errors:
+        message += f" {len(errors)} ردیف به دلیل خطا وارد نشد."
+    return {
+        "message": message,
+        "imported": imported_count,
+        "skipped": skipped_count,
+        "errors": errors,
+    }
+
 @router.post("/backup/import")
-def import_transactions_excel(file: UploadFile = File(...), db: Session = Depends(get_db)):
+def import_transactions_excel(
+    file: UploadFile = File(...),
+    bulk: bool = Query(True, description="ایمپورت گروهی؛ ردیف‌های نامعتبر در errors گزارش می‌شوند"),
+    db: Session = Depends(get_db)
+):
     try:
         df = pd.read_excel(file.file, engine='openpyxl')
     except Exception as e:
         logger.error(f"خطا در خواندن فایل اکسل: {str(e)}")
         raise HTTPException(status_code=400, detail=f"خطا در خواندن فایل اکسل: {str(e)}")
 
-    required_columns = [
-        "شناسه", "مشتری", "نوع معامله", "وزن (گرم)", "عیار مبدا", "نرخ توله",
-        "مقدار طلا", "خرید (طلا)", "پول خرید", "فروش (طلا)", "پول فروش",
-        "بیلانس دالر", "بیلانس طلا", "توضیحات", "تاریخ", "زمان ایجاد"
-    ]
+    required_columns = IMPORT_REQUIRED_COLUMNS
     if not all(col in df.columns for col in required_columns):
         missing_cols = [col for col in required_columns if col not in df.columns]
         logger.error(f"ستون‌های مورد نیاز یافت نشد: {missing_cols}")
         raise HTTPException(status_code=400, detail=f"فایل اکسل باید شامل ستون‌های زیر باشد: {', '.join(required_columns)}. ستون‌های مفقود: {', '.join(missing_cols)}")
 
+    if bulk:
+        return bulk_import_transactions(df, db)
+
+    # حالت قبلی: ردیف به ردیف و توقف روی اولین خطا
     imported_count = 0
     skipped_count = 0
+    imported_keys = []
 
     for index, row in df.iterrows():
         try:
@@ -162,8 +537,6 @@ def import_transactions_excel(file: UploadFile = File(...), db: Session = Depend
             gold_out = float(row.get("فروش (طلا)", 0.0))
             dollar_in = float(row.get("پول فروش", 0.0))
             dollar_out = float(row.get("پول خرید", 0.0))
-            dollar_balance = float(row.get("بیلانس دالر", 0.0))
-            gold_balance = float(row.get("بیلانس طلا", 0.0))
             detail = row.get("توضیحات", "") if pd.notna(row.get("توضیحات")) else None
             date = pd.to_datetime(row.get("تاریخ"), errors='coerce')
             created_at = pd.to_datetime(row.get("زمان ایجاد"), errors='coerce')
@@ -172,7 +545,8 @@ def import_transactions_excel(file: UploadFile = File(...), db: Session = Depend
                 logger.error(f"ردیف {index + 2}: تاریخ نامعتبر")
                 raise ValueError("تاریخ نامعتبر")
             date_str = date.strftime("%Y-%m-%d")
-            created_at_str = created_at.strftime("%Y-%m-%d %H:%M:%S") if pd.notna(created_at) else datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+            # ستون created_at از نوع DateTime است و شیء datetime می‌گیرد
+            created_at = created_at.to_pydatetime() if pd.notna(created_at) else datetime.utcnow().replace(microsecond=0)
 
             # ایجاد تراکنش
             txn = Transaction(
@@ -187,13 +561,15 @@ def import_transactions_excel(file: UploadFile = File(...), db: Session = Depend
                 gold_out=round(gold_out, 3),
                 dollar_in=round(dollar_in, 3),
                 dollar_out=round(dollar_out, 3),
-                dollar_balance=round(dollar_balance, 3),
-                gold_balance=round(gold_balance, 3),
+                # بیلانس‌ها بعد از درج همه ردیف‌ها محاسبه می‌شوند
+                dollar_balance=0.0,
+                gold_balance=0.0,
                 detail=detail,
                 date=date_str,
-                created_at=created_at_str
+                created_at=created_at
             )
             db.add(txn)
+            imported_keys.append((customer.customer_id, date_str, txn_id))
             imported_count += 1
             logger.info(f"ردیف {index + 2}: تراکنش با شناسه {txn_id} با موفقیت اضافه شد")
 
@@ -205,6 +581,7 @@ def import_transactions_excel(file: UploadFile = File(...), db: Session = Depend
             raise HTTPException(status_code=500, detail=f"ردیف {index + 2}: خطای غیرمنتظره: {str(e)}")
 
     try:
+        _rebalance_imported(db, imported_keys)
         db.commit()
         logger.info(f"ایمپورت موفقیت‌آمیز: {imported_count} تراکنش وارد شد، {skipped_count} تراکنش تکراری نادیده گرفته شد")
     except Exception as e:
@@ -0,0 +1,74 @@
+# app/api/v1/balances.py
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.security import get_current_user
+from app.crud.customer import get_customer_async
+from app.crud.balance_as_of import get_balances_as_of_async, get_customer_balance_as_of_async, parse_as_of
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/balances",
+    tags=["balances"]
+)
+
+AS_OF_DESCRIPTION = "تاریخ مبنا (YYYY-MM-DD یعنی تا پایان همان روز، یا تاریخ و ساعت ISO)"
+
+def _parse_as_of(as_of: str):
+    try:
+        return parse_as_of(as_of)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.get("/as-of")
+async def read_balances_as_of(
+    as_of: str = Query(..., description=AS_OF_DESCRIPTION),
+    page: int = Query(1, ge=1, description="شماره صفحه"),
+    limit: int = Query(100, ge=1, le=1000, description="تعداد در هر صفحه"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    بیلانس طلا و دالر همه مشتریان در یک تاریخ مشخص
+    """
+    before = _parse_as_of(as_of)
+    try:
+        balances = await get_balances_as_of_async(db, before, skip=(page - 1) * limit, limit=limit)
+    except Exception as e:
+        logger.error(f"Error getting balances as of {as_of}: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="خطا در دریافت بیلانس")
+    return {
+        "as_of": as_of,
+        "balances": [
+            {**row, "gold_balance": float(row["gold_balance"]), "usd_balance": float(row["usd_balance"])}
+            for row in balances
+        ]
+    }
+
+@router.get("/customer/{customer_id}/as-of")
+async def read_customer_balance_as_of(
+    customer_id: int,
+    as_of: str = Query(..., description=AS_OF_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    بیلانس طلا و دالر یک مشتری در یک تاریخ مشخص
+    """
+    before = _parse_as_of(as_of)
+    if not await get_customer_async(db, customer_id):
+        raise HTTPException(status_code=404, detail="مشتری یافت نشد")
+    try:
+        balance = await get_customer_balance_as_of_async(db, customer_id, before)
+    except Exception as e:
+        logger.error(f"Error getting balance as of {as_of} for customer {customer_id}: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="خطا در دریافت بیلانس")
+    return {
+        "customer_id": customer_id,
+        "as_of": as_of,
+        "gold_balance": float(balance["gold_balance"]),
+        "usd_balance": float(balance["usd_balance"])
+    }
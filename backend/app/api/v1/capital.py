@@ -1,17 +1,21 @@
 
 # backend/app/api/v1/capital.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
+from app.core.response_cache import cached_response, store_response
 from app.schemas.capital_schema import CapitalCreate, CapitalUpdate, CapitalOut
 from app.crud import crud_capital
 
 router = APIRouter(prefix="/capital", tags=["Capital Records"])
 
 @router.get("/", response_model=List[CapitalOut])
-def list_capitals(db: Session = Depends(get_db)):
-    return crud_capital.get_all_capitals(db)
+def list_capitals(request: Request, db: Session = Depends(get_db)):
+    key, cached = cached_response(request, ("capital_records",))
+    if cached is not None:
+        return cached
+    return store_response(key, crud_capital.get_all_capitals(db), List[CapitalOut])
 
 @router.post("/", response_model=CapitalOut)
 def create_capital(data: CapitalCreate, db: Session = Depends(get_db)):
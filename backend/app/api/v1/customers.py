@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.database import get_async_db, get_db
 from app.core.security import require_admin
+from app.core.response_cache import cached_response, store_response
 from app.schemas.customer import CustomerCreate, CustomerOut, CustomerUpdate
 from app.crud.customer import (
     create_customer,
@@ -11,6 +13,8 @@ from app.crud.customer import (
     get_all_customers,
     update_customer,
     delete_customer,
+    get_customer_async,
+    get_customers_by_name_async,
 )
 from app.models.customer import Customer  # 👈 اضافه شد
 
@@ -25,22 +29,23 @@ def create_new_customer(
 
 # ✅ جستجو بر اساس نام
 @router.get("/", response_model=List[CustomerOut])
-def get_customers(
+async def get_customers(
+    request: Request,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current=Depends(require_admin),
 ):
-    query = db.query(Customer)
-    if search:
-        query = query.filter(Customer.full_name.ilike(f"%{search}%"))
-    return query.all()
+    key, cached = cached_response(request, ("customers",))
+    if cached is not None:
+        return cached
+    return store_response(key, await get_customers_by_name_async(db, search), List[CustomerOut])
 
 
 @router.get("/{customer_id}", response_model=CustomerOut)
-def get_single_customer(
-    customer_id: int, db: Session = Depends(get_db), current=Depends(require_admin)
+async def get_single_customer(
+    customer_id: int, db: AsyncSession = Depends(get_async_db), current=Depends(require_admin)
 ):
-    customer = get_customer(db, customer_id)
+    customer = await get_customer_async(db, customer_id)
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
     return customer
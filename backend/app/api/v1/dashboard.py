@@ -0,0 +1,54 @@
+# app/api/v1/dashboard.py
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import date, datetime
+from app.core.database import get_async_db
+from app.core.security import get_current_user
+from app.crud.daily_rollup import get_dashboard_summary_async
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["dashboard"]
+)
+
+def _parse_day(value: Optional[str]) -> Optional[date]:
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"فرمت تاریخ نامعتبر است: {value} (YYYY-MM-DD)")
+
+@router.get("/summary")
+async def read_dashboard_summary(
+    start_date: Optional[str] = Query(None, description="تاریخ شروع (YYYY-MM-DD)؛ بدون هر دو تاریخ، امروز"),
+    end_date: Optional[str] = Query(None, description="تاریخ پایان (YYYY-MM-DD)"),
+    customer_id: Optional[int] = Query(None, description="شاخص‌های یک مشتری"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    شاخص‌های داشبورد (حجم خرید و فروش، گرام و دالر ورودی/خروجی، روزنامچه‌ها، مصارف و موقعیت خالص)
+    برای یک بازه تاریخ از جداول جمع روزانه
+    """
+    start, end = _parse_day(start_date), _parse_day(end_date)
+    if start is None and end is None:
+        start = end = date.today()
+    if start is not None and end is not None and end < start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="تاریخ پایان نباید قبل از تاریخ شروع باشد")
+    try:
+        summary = await get_dashboard_summary_async(db, start, end, customer_id)
+    except Exception as e:
+        logger.error(f"Error getting dashboard summary: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="خطا در دریافت داشبورد")
+    return {
+        "start_date": start.isoformat() if start else None,
+        "end_date": end.isoformat() if end else None,
+        "customer_id": customer_id,
+        **summary
+    }
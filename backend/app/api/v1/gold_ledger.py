@@ -1,18 +1,33 @@
 # app/api/v1/gold_ledger.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_async_db, get_db
 from app.core.security import get_current_user
-from app.schemas.gold_ledger import GoldLedgerCreate, GoldLedgerOut, GoldLedgerUpdate
+from app.core.write_queue import write_queue
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, next_cursor
+from app.models.gold_ledger import GoldLedger
+from app.schemas.gold_ledger import GoldLedgerBatchOut, GoldLedgerCreate, GoldLedgerOut, GoldLedgerUpdate
+from app.crud.ledger_batch import NOT_FOUND_ERROR
+from app.schemas.ledger_batch import LedgerBatchDeleteIn, LedgerBatchDeleteOut, LedgerBatchIn
 from app.crud.gold_ledger import (
+    add_gold_ledger,
+    post_gold_ledger_batch,
+    delete_gold_ledger_batch,
+    void_gold_ledger,
+    void_gold_ledger_batch,
     create_gold_ledger, 
     get_gold_ledger, 
     get_gold_ledgers, 
     update_gold_ledger, 
     delete_gold_ledger,
-    get_customer_gold_balance
+    get_customer_gold_balance,
+    get_gold_ledgers_async,
+    get_gold_ledger_async,
+    get_customer_gold_balance_async
 )
 import logging
 
@@ -34,6 +49,8 @@ def create_gold_ledger_endpoint(
     """
     try:
         logger.info(f"Creating gold ledger for customer {ledger.customer_id} by user {current_user.get('user_id')}")
+        if settings.WRITE_COALESCING:
+            return write_queue.run(add_gold_ledger, ledger)
         return create_gold_ledger(db, ledger)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -41,44 +58,96 @@ def create_gold_ledger_endpoint(
         logger.error(f"Error creating gold ledger: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="خطا در ایجاد رکورد")
 
-@router.get("/", response_model=List[GoldLedgerOut])
-def read_gold_ledgers(
+@router.post("/batch", response_model=GoldLedgerBatchOut)
+def create_gold_ledger_batch(
+    batch: LedgerBatchIn,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    ثبت گروهی رکوردهای روزنامچه طلا برای چند مشتری در یک تراکنش (مثلاً ورود روزنامچه کاغذی آخر روز)؛
+    ردیف‌های نامعتبر ثبت نمی‌شوند و هر ردیف نتیجه جداگانه دارد
+    """
+    try:
+        results = post_gold_ledger_batch(db, batch.entries)
+    except Exception as e:
+        logger.error(f"Error posting gold_ledger batch: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="خطا در ثبت گروهی رکوردها")
+    created = sum(1 for result in results if result["ok"])
+    return {"created": created, "failed": len(results) - created, "results": results}
+
+@router.post("/batch/delete", response_model=LedgerBatchDeleteOut)
+def delete_gold_ledger_batch_endpoint(
+    batch: LedgerBatchDeleteIn,
     db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    حذف گروهی رکوردهای روزنامچه طلا در یک تراکنش (در حالت LEDGER_DELETE_MODE=void ابطال با رکورد معکوس)
+    """
+    try:
+        if settings.LEDGER_DELETE_MODE == "void":
+            results = void_gold_ledger_batch(db, batch.ids)
+        else:
+            results = delete_gold_ledger_batch(db, batch.ids)
+    except Exception as e:
+        logger.error(f"Error deleting gold_ledger batch: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="خطا در حذف گروهی رکوردها")
+    deleted = sum(1 for result in results if result["ok"])
+    return {"deleted": deleted, "failed": len(results) - deleted, "results": results}
+
+@router.get("/", response_model=List[GoldLedgerOut])
+async def read_gold_ledgers(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user),
     customer_id: Optional[int] = Query(None, description="فیلتر بر اساس شناسه مشتری"),
     start_date: Optional[str] = Query(None, description="تاریخ شروع (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="تاریخ پایان (YYYY-MM-DD)"),
     page: int = Query(1, ge=1, description="شماره صفحه"),
-    limit: int = Query(10, ge=1, le=100, description="تعداد در هر صفحه")
+    limit: int = Query(10, ge=1, le=100, description="تعداد در هر صفحه"),
+    cursor: Optional[str] = Query(None, description=f"cursor صفحه بعد (از هدر {NEXT_CURSOR_HEADER}); در صورت ارسال، page نادیده گرفته می‌شود"),
+    include_voided: bool = Query(False, description="نمایش رکوردهای ابطال‌شده و رکوردهای معکوس آن‌ها")
 ):
     """
     دریافت لیست رکوردهای روزنامچه طلا با قابلیت فیلتر و صفحه‌بندی
     """
+    try:
+        after = decode_cursor(cursor, GoldLedger.transaction_date) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
     try:
         skip = (page - 1) * limit
-        ledgers = get_gold_ledgers(
+        ledgers = await get_gold_ledgers_async(
             db, 
             customer_id=customer_id, 
             start_date=start_date, 
             end_date=end_date, 
             skip=skip, 
-            limit=limit
+            limit=limit,
+            after=after,
+            include_voided=include_voided
         )
+        cursor_out = next_cursor(ledgers, limit, "transaction_date", "gold_ledger_id")
+        if cursor_out:
+            response.headers[NEXT_CURSOR_HEADER] = cursor_out
         return ledgers
     except Exception as e:
         logger.error(f"Error retrieving gold ledgers: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="خطا در دریافت داده‌ها")
 
 @router.get("/{gold_ledger_id}", response_model=GoldLedgerOut)
-def read_gold_ledger(
+async def read_gold_ledger(
     gold_ledger_id: int,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user),
+    include_voided: bool = Query(False, description="نمایش رکورد ابطال‌شده یا رکورد معکوس")
 ):
     """
     دریافت یک رکورد خاص از روزنامچه طلا
     """
-    ledger = get_gold_ledger(db, gold_ledger_id)
+    ledger = await get_gold_ledger_async(db, gold_ledger_id, include_voided)
     if not ledger:
         raise HTTPException(status_code=404, detail="رکورد روزنامچه طلا یافت نشد")
     return ledger
@@ -111,24 +180,48 @@ def delete_gold_ledger_endpoint(
     current_user: dict = Depends(get_current_user)
 ):
     """
-    حذف یک رکورد از روزنامچه طلا
+    حذف یک رکورد از روزنامچه طلا؛ در حالت LEDGER_DELETE_MODE=void رکورد با رکورد معکوس ابطال می‌شود
     """
-    success = delete_gold_ledger(db, gold_ledger_id)
+    if settings.LEDGER_DELETE_MODE == "void":
+        return void_gold_ledger_endpoint(gold_ledger_id, db, current_user)
+    try:
+        success = delete_gold_ledger(db, gold_ledger_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     if not success:
         raise HTTPException(status_code=404, detail="رکورد روزنامچه طلا یافت نشد")
     return {"message": "رکورد روزنامچه طلا با موفقیت حذف شد"}
 
+@router.post("/{gold_ledger_id}/void")
+def void_gold_ledger_endpoint(
+    gold_ledger_id: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    ابطال یک رکورد روزنامچه طلا با ثبت رکورد معکوس در انتهای تاریخچه؛ بیلانس رکوردهای گذشته بازنویسی نمی‌شود
+    """
+    try:
+        result = void_gold_ledger(db, gold_ledger_id)
+    except Exception as e:
+        logger.error(f"Error voiding gold_ledger {gold_ledger_id}: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="خطا در ابطال رکورد")
+    if not result["ok"]:
+        status_code = 404 if result["error"] == NOT_FOUND_ERROR else status.HTTP_400_BAD_REQUEST
+        raise HTTPException(status_code=status_code, detail=result["error"])
+    return {"message": "رکورد روزنامچه طلا با موفقیت ابطال شد", "reversal_id": result["reversal_id"]}
+
 @router.get("/customer/{customer_id}/balance")
-def get_customer_balance(
+async def get_customer_balance(
     customer_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     دریافت بیلانس طلای فعلی یک مشتری
     """
     try:
-        balance = get_customer_gold_balance(db, customer_id)
+        balance = await get_customer_gold_balance_async(db, customer_id)
         return {
             "customer_id": customer_id,
             "gold_balance": float(balance),
@@ -1,8 +1,9 @@
 # backend/app/api/v1/gold_rates.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.response_cache import cached_response, store_response
 from app.schemas.gold_rate import GoldRateCreate, GoldRateOut
 from app.crud import gold_rate as crud
 
@@ -13,8 +14,11 @@ def create_new_rate(rate: GoldRateCreate, db: Session = Depends(get_db)):
     return crud.create_gold_rate(db, rate)
 
 @router.get("/", response_model=list[GoldRateOut])
-def list_rates(db: Session = Depends(get_db)):
-    return crud.get_gold_rates(db)
+def list_rates(request: Request, db: Session = Depends(get_db)):
+    key, cached = cached_response(request, ("gold_rates",))
+    if cached is not None:
+        return cached
+    return store_response(key, crud.get_gold_rates(db), list[GoldRateOut])
 
 @router.delete("/{rate_id}", status_code=status.HTTP_204_NO_CONTENT)
 def remove_rate(rate_id: int, db: Session = Depends(get_db)):
@@ -2,12 +2,13 @@
 # آدرس: دانشگاه تخار، دانشکده علوم کامپیوتر.
 # این فایل شامل endpoints برای مدیریت انواع طلا است.
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from typing import List
 
 from app.core.database import get_db
 from app.core.security import get_current_user
+from app.core.response_cache import cached_response, store_response
 
 from app.schemas.gold_type import GoldTypeCreate, GoldTypeUpdate, GoldType
 
@@ -34,11 +35,15 @@ def create_new_gold_type(
 
 @router.get("/", response_model=List[GoldType])
 def read_gold_types(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
+    key, cached = cached_response(request, ("gold_types",))
+    if cached is not None:
+        return cached
     gold_types = get_all_gold_types(db)
-    return gold_types
+    return store_response(key, gold_types, List[GoldType])
 
 @router.put("/{gold_type_id}", response_model=GoldType)
 def update_existing_gold_type(
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 import io
@@ -8,6 +8,8 @@ from datetime import datetime
 from persiantools.jdatetime import JalaliDateTime  # 📅 برای تاریخ جلالی
 
 from app.core.database import get_db
+from app.core.response_cache import cached_response, store_response
+from app.crud.aggregates import transaction_summary
 from app.models.transaction import Transaction
 from app.models.customer import Customer
 
@@ -31,9 +33,12 @@ except Exception as e:
 
 # ✅ لیست مشتری‌ها برای کامبوباکس
 @router.get("/invoices/customers")
-def get_customers(db: Session = Depends(get_db)):
+def get_customers(request: Request, db: Session = Depends(get_db)):
+    key, cached = cached_response(request, ("customers",))
+    if cached is not None:
+        return cached
     customers = db.query(Customer).all()
-    return [{"id": c.customer_id, "name": c.full_name} for c in customers]
+    return store_response(key, [{"id": c.customer_id, "name": c.full_name} for c in customers])
 
 
 # ✅ بل مشتری در فرمت PDF
@@ -69,8 +74,6 @@ def customer_invoice(customer_id: int, db: Session = Depends(get_db)):
     c.line(20 * mm, y, width - 20 * mm, y)
     y -= 5 * mm
 
-    total_dollar_in = 0
-    total_dollar_out = 0
     serial = 1
 
     for txn in transactions:
@@ -88,8 +91,6 @@ def customer_invoice(customer_id: int, db: Session = Depends(get_db)):
         c.drawRightString(x_start - 100 * mm, y, str(round(txn.dollar_out, 2)))
         c.drawRightString(x_start - 120 * mm, y, str(round(txn.dollar_in, 2)))
 
-        total_dollar_in += txn.dollar_in
-        total_dollar_out += txn.dollar_out
         serial += 1
 
         y -= 10 * mm
@@ -102,11 +103,12 @@ def customer_invoice(customer_id: int, db: Session = Depends(get_db)):
             c.line(20 * mm, y, width - 20 * mm, y)
             y -= 5 * mm
 
+    totals = transaction_summary(db, customer_id=customer_id)["all"]
     c.setFont("Vazir", 12)
     y -= 10 * mm
-    c.drawRightString(width - 20 * mm, y, f"مجموع پول فروش: {round(total_dollar_out, 2)}")
+    c.drawRightString(width - 20 * mm, y, f"مجموع پول فروش: {round(totals['dollar_out'], 2)}")
     y -= 8 * mm
-    c.drawRightString(width - 20 * mm, y, f"مجموع پول خرید: {round(total_dollar_in, 2)}")
+    c.drawRightString(width - 20 * mm, y, f"مجموع پول خرید: {round(totals['dollar_in'], 2)}")
 
     y -= 15 * mm
     c.drawRightString(width - 20 * mm, y, "امضا / مهر دوکان:")
@@ -150,13 +152,6 @@ def customer_invoice_csv(customer_id: int, db: Session = Depends(get_db)):
         headers = ["شماره", "تاریخ (جلالی)", "نوع معامله", "خرید گرام", "فروش گرام", "پول فروش", "پول خرید"]
         writer.writerow(headers)
 
-        # 🧮 متغیرهای جمع
-        total_dollar_in = 0
-        total_dollar_out = 0
-        total_gold_in = 0
-        total_gold_out = 0
-        total_buy_count = 0
-        total_sell_count = 0
         serial = 1
 
         for txn in transactions:
@@ -176,20 +171,19 @@ def customer_invoice_csv(customer_id: int, db: Session = Depends(get_db)):
                 round(txn.dollar_in, 2)
             ])
 
-            total_gold_in += txn.gold_in
-            total_gold_out += txn.gold_out
-            total_dollar_in += txn.dollar_in
-            total_dollar_out += txn.dollar_out
-
-            if txn.type == "buy":
-                total_buy_count += 1
-            else:
-                total_sell_count += 1
-
             serial += 1
 
         writer.writerow([])
 
+        # 🧮 جمع‌ها با یک کوئری GROUP BY
+        summary = transaction_summary(db, customer_id=customer_id)
+        total_buy_count = summary["buy"]["count"]
+        total_sell_count = summary["sell"]["count"]
+        total_gold_in = summary["all"]["gold_in"]
+        total_gold_out = summary["all"]["gold_out"]
+        total_dollar_in = summary["all"]["dollar_in"]
+        total_dollar_out = summary["all"]["dollar_out"]
+
         # 🏁 جمع کل و امتیاز مشتری
         customer_score = round(
             (total_buy_count + total_sell_count) * 10
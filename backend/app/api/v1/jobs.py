@@ -0,0 +1,40 @@
+# path: backend/app/api/v1/jobs.py
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+import os
+
+from app.core.jobs import JOB_DONE, job_runner
+from app.core.security import get_current_user
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+@router.get("/")
+def list_jobs(user: dict = Depends(get_current_user)):
+    """
+    لیست کارهای پس‌زمینه (جدیدترین اول)
+    """
+    return [job.to_dict() for job in job_runner.list()]
+
+@router.get("/{job_id}")
+def read_job(job_id: str, user: dict = Depends(get_current_user)):
+    """
+    وضعیت و پیشرفت یک کار پس‌زمینه
+    """
+    job = job_runner.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="کار مورد نظر یافت نشد")
+    return job.to_dict()
+
+@router.get("/{job_id}/download")
+def download_job_artifact(job_id: str, user: dict = Depends(get_current_user)):
+    """
+    دریافت فایل خروجی کار تمام‌شده
+    """
+    job = job_runner.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="کار مورد نظر یافت نشد")
+    if job.status != JOB_DONE:
+        raise HTTPException(status_code=409, detail=f"کار هنوز تمام نشده است (وضعیت: {job.status})")
+    if not job.artifact_path or not os.path.exists(job.artifact_path):
+        raise HTTPException(status_code=404, detail="این کار فایل خروجی ندارد")
+    return FileResponse(path=job.artifact_path, filename=job.artifact_name, media_type=job.media_type)
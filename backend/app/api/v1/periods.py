@@ -0,0 +1,102 @@
+# app/api/v1/periods.py
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import List
+from app.core.database import get_db
+from app.core.security import get_current_user, require_admin
+from app.crud.period_close import (
+    close_period,
+    get_period,
+    get_period_customer_balances,
+    list_periods,
+    reclose_periods,
+    reopen_period
+)
+from app.schemas.period_close import PeriodCloseDetailOut, PeriodCloseOut, PeriodCustomerBalanceOut
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/periods",
+    tags=["periods"]
+)
+
+@router.get("/", response_model=List[PeriodCloseOut])
+def read_periods(
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    لیست دوره‌های ماهانه بسته‌شده یا بازشده (جدیدترین اول)
+    """
+    return list_periods(db)
+
+@router.post("/reclose", response_model=List[PeriodCloseOut])
+def reclose_reopened_periods(
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_admin)
+):
+    """
+    بستن دوباره همه دوره‌هایی که با ثبت یا ویرایش تاریخ گذشته باز شده‌اند
+    """
+    try:
+        return reclose_periods(db)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error reclosing periods: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="خطا در بستن دوباره دوره‌ها")
+
+@router.get("/{year}/{month}", response_model=PeriodCloseDetailOut)
+def read_period(
+    year: int,
+    month: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    دوره ماهانه با بیلانس پایان ماه هر مشتری
+    """
+    period = get_period(db, year, month)
+    if not period:
+        raise HTTPException(status_code=404, detail="دوره یافت نشد")
+    customers = get_period_customer_balances(db, period.id)
+    return PeriodCloseDetailOut(
+        **PeriodCloseOut.model_validate(period).model_dump(),
+        customers=[PeriodCustomerBalanceOut.model_validate(row) for row in customers]
+    )
+
+@router.post("/{year}/{month}/close", response_model=PeriodCloseOut)
+def close_month(
+    year: int,
+    month: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_admin)
+):
+    """
+    بستن ماه جلالی (یا بستن دوباره ماهی که باز شده است)
+    """
+    try:
+        return close_period(db, year, month)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error closing period {year}/{month}: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="خطا در بستن دوره")
+
+@router.post("/{year}/{month}/reopen", response_model=List[PeriodCloseOut])
+def reopen_month(
+    year: int,
+    month: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_admin)
+):
+    """
+    باز کردن ماه بسته؛ ماه‌های بسته بعد از آن هم باز می‌شوند
+    """
+    try:
+        return reopen_period(db, year, month)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
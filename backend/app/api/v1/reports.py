@@ -1,15 +1,18 @@
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 import io
+import os
 from datetime import datetime
 import csv
 import logging
 from dateutil.parser import parse  # برای تبدیل رشته‌های تاریخ به datetime
 
-from app.core.database import get_db
+from app.core.database import SessionLocal
+from app.core.jobs import Job, job_runner
 from app.core.security import get_current_user
+from app.crud.aggregates import capital_summary, gold_ledger_summary, money_ledger_summary, transaction_summary
 from app.models.transaction import Transaction
 from app.models.capital import Capital
 from app.models.gold_analysis import GoldAnalysis
@@ -23,6 +26,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["reports"])
 
+# فایل گزارش‌هایی که در پس‌زمینه ساخته می‌شوند
+REPORT_EXPORT_DIR = os.path.join(os.path.dirname(__file__), "../../../exports")
+
 # تابع کمکی برای فرمت کردن تاریخ‌ها
 def format_date(date_obj, default="-"):
     try:
@@ -53,201 +59,239 @@ def format_datetime(datetime_obj, default="-"):
         logger.warning(f"خطا در فرمت کردن تاریخ و زمان: {str(e)}، مقدار: {datetime_obj}")
         return default
 
-# مسیر جدید: گزارش جامع به فرمت CSV
-@router.get("/reports/full/excel")
-def full_report_excel(db: Session = Depends(get_db), user: dict = Depends(get_current_user)):
+# تعداد ردیف‌هایی که در هر مرحله از دیتابیس خوانده می‌شوند
+REPORT_FETCH_SIZE = 500
+# اندازه تقریبی هر تکه خروجی (بایت) قبل از ارسال به کلاینت
+REPORT_CHUNK_SIZE = 64 * 1024
+
+def iter_csv_chunks(rows, chunk_size: int = REPORT_CHUNK_SIZE):
     """
-    گزارش جامع (CSV) شامل مشتریان، معاملات، سرمایه، تحلیل طلا، دفتر طلا، و دفتر پول
+    تبدیل ردیف‌ها به تکه‌های بایتی CSV (UTF-8)؛ BOM فقط یک بار در ابتدای فایل نوشته می‌شود
+    """
+    output = io.StringIO()
+    writer = csv.writer(output, delimiter=',', quoting=csv.QUOTE_MINIMAL, lineterminator='\n')
+    output.write("\ufeff")  # UTF-8 BOM برای پشتیبانی از فارسی در Excel
+    for row in rows:
+        writer.writerow(row)
+        if output.tell() >= chunk_size:
+            yield output.getvalue().encode('utf-8')
+            output.seek(0)
+            output.truncate(0)
+    if output.tell():
+        yield output.getvalue().encode('utf-8')
+
+def _customers_section(db: Session):
+    yield ["گزارش مشتریان"]
+    yield ["کد", "نام", "شماره", "آدرس", "تاریخ ثبت"]
+    query = db.query(
+        Customer.customer_id, Customer.full_name, Customer.phone, Customer.address, Customer.created_at
+    ).order_by(Customer.customer_id).yield_per(REPORT_FETCH_SIZE)
+    for customer_id, full_name, phone, address, created_at in query:
+        yield [customer_id, full_name, phone or "-", address or "-", format_date(created_at)]
+    yield []
+
+def _transactions_section(db: Session):
+    yield ["گزارش معاملات"]
+    yield ["id", "مشتری", "نوع", "خرید گرام", "فروش گرام", "پول خرید", "پول فروش", "تاریخ"]
+    query = db.query(
+        Transaction.txn_id, Transaction.customer_id, Customer.full_name, Transaction.type,
+        Transaction.gold_in, Transaction.gold_out, Transaction.dollar_in, Transaction.dollar_out,
+        Transaction.date
+    ).outerjoin(Customer, Customer.customer_id == Transaction.customer_id) \
+        .order_by(Transaction.txn_id.desc()).yield_per(REPORT_FETCH_SIZE)
+    for txn_id, customer_id, full_name, txn_type, gold_in, gold_out, dollar_in, dollar_out, txn_date in query:
+        yield [
+            txn_id,
+            full_name if full_name else customer_id,
+            "خرید" if txn_type == "buy" else "فروش",
+            round(gold_in, 8),
+            round(gold_out, 8),
+            round(dollar_in, 8),  # پول خرید
+            round(dollar_out, 8),  # پول فروش
+            format_date(txn_date)
+        ]
+
+    # خرید گرام و پول خرید از معاملات خرید، فروش گرام و پول فروش از معاملات فروش
+    summary = transaction_summary(db)
+    yield ["جمع‌بندی معاملات"]
+    yield ["تعداد خرید", "تعداد فروش", "مجموع خرید گرام", "مجموع فروش گرام", "مجموع پول خرید", "مجموع پول فروش"]
+    yield [
+        summary["buy"]["count"],
+        summary["sell"]["count"],
+        round(summary["buy"]["gold_in"], 8),
+        round(summary["sell"]["gold_out"], 8),
+        round(summary["buy"]["dollar_in"], 8),
+        round(summary["sell"]["dollar_out"], 8)
+    ]
+    yield []
+
+def _capital_section(db: Session):
+    yield ["گزارش سرمایه"]
+    yield ["id", "سرمایه دالر", "سرمایه طلا", "تاریخ"]
+    query = db.query(
+        Capital.id, Capital.usd_capital, Capital.gold_capital, Capital.date
+    ).order_by(Capital.id.desc()).yield_per(REPORT_FETCH_SIZE)
+    for capital_id, usd_capital, gold_capital, capital_date in query:
+        yield [capital_id, round(usd_capital, 8), round(gold_capital, 8), format_date(capital_date)]
+
+    summary = capital_summary(db)
+    yield ["جمع‌بندی سرمایه"]
+    yield ["مجموع سرمایه دالر", "مجموع سرمایه طلا"]
+    yield [round(summary["usd_capital"], 8), round(summary["gold_capital"], 8)]
+    yield []
+
+def _gold_analysis_section(db: Session):
+    yield ["گزارش تحلیل طلا"]
+    yield ["id", "وزن ناخالص", "عیار اولیه", "نرخ توله", "وزن نهایی", "نرخ دالر", "تاریخ تحلیل"]
+    query = db.query(
+        GoldAnalysis.id, GoldAnalysis.gross_weight, GoldAnalysis.initial_purity, GoldAnalysis.tola_rate,
+        GoldAnalysis.final_weight, GoldAnalysis.usd_rate, GoldAnalysis.analysis_date
+    ).order_by(GoldAnalysis.id.desc()).yield_per(REPORT_FETCH_SIZE)
+    for analysis_id, gross_weight, initial_purity, tola_rate, final_weight, usd_rate, analysis_date in query:
+        yield [
+            analysis_id,
+            round(gross_weight, 8),
+            round(initial_purity, 8),
+            round(tola_rate, 8),
+            round(final_weight, 8),
+            round(usd_rate, 8),
+            format_date(analysis_date)
+        ]
+    yield []
+
+def _gold_ledger_section(db: Session):
+    yield ["گزارش دفتر طلا"]
+    yield ["id", "مشتری", "تاریخ تراکنش", "توضیحات", "دریافتی", "پرداختی", "عیار پاشنه", "بیلانس"]
+    query = db.query(
+        GoldLedger.gold_ledger_id, GoldLedger.customer_id, Customer.full_name, GoldLedger.transaction_date,
+        GoldLedger.description, GoldLedger.received, GoldLedger.paid, GoldLedger.heel_purity_carat,
+        GoldLedger.balance
+    ).outerjoin(Customer, Customer.customer_id == GoldLedger.customer_id) \
+        .order_by(GoldLedger.gold_ledger_id.desc()).yield_per(REPORT_FETCH_SIZE)
+    for ledger_id, customer_id, full_name, txn_date, description, received, paid, heel_purity, balance in query:
+        yield [
+            ledger_id,
+            full_name if full_name else customer_id,
+            format_datetime(txn_date),
+            description or "-",
+            round(received, 8),
+            round(paid, 8),
+            round(heel_purity, 8) if heel_purity else "-",
+            round(balance, 8)
+        ]
+
+    summary = gold_ledger_summary(db)
+    yield ["جمع‌بندی دفتر طلا"]
+    yield ["مجموع دریافتی", "مجموع پرداختی", "مجموع بیلانس"]
+    yield [round(summary["received"], 8), round(summary["paid"], 8), round(summary["balance"], 8)]
+    yield []
+
+def _money_ledger_section(db: Session):
+    yield ["گزارش دفتر پول"]
+    yield ["id", "مشتری", "تاریخ تراکنش", "توضیحات", "دریافتی", "پرداختی", "بیلانس دالر"]
+    query = db.query(
+        MoneyLedger.money_ledger_id, MoneyLedger.customer_id, Customer.full_name, MoneyLedger.transaction_date,
+        MoneyLedger.description, MoneyLedger.received, MoneyLedger.paid, MoneyLedger.usd_balance
+    ).outerjoin(Customer, Customer.customer_id == MoneyLedger.customer_id) \
+        .order_by(MoneyLedger.money_ledger_id.desc()).yield_per(REPORT_FETCH_SIZE)
+    for ledger_id, customer_id, full_name, txn_date, description, received, paid, usd_balance in query:
+        yield [
+            ledger_id,
+            full_name if full_name else customer_id,
+            format_datetime(txn_date),
+            description or "-",
+            round(received, 8),
+            round(paid, 8),
+            round(usd_balance, 8)
+        ]
+
+    summary = money_ledger_summary(db)
+    yield ["جمع‌بندی دفتر پول"]
+    yield ["مجموع دریافتی", "مجموع پرداختی", "مجموع بیلانس دالر"]
+    yield [round(summary["received"], 8), round(summary["paid"], 8), round(summary["balance"], 8)]
+    yield []
+
+def full_report_rows(progress=None):
+    """
+    تولید ردیف‌های گزارش جامع به صورت جریانی با یک session مستقل؛
+    session درخواست قبل از ارسال بدنه پاسخ بسته می‌شود، پس generator نشست خودش را باز و بسته می‌کند.
+    progress (اختیاری) قبل از هر بخش با (شماره بخش، تعداد بخش‌ها) صدا زده می‌شود.
     """
     SHOP_NAME = "پاسه فروشی غفاری"
     REPORT_TITLE = "گزارش جامع سیستم Gold"
 
+    db = SessionLocal()
     try:
-        customers = db.query(Customer).order_by(Customer.customer_id).all()
-        transactions = db.query(Transaction).order_by(Transaction.txn_id.desc()).limit(1000).all()
-        capitals = db.query(Capital).order_by(Capital.id.desc()).limit(1000).all()
-        gold_analyses = db.query(GoldAnalysis).order_by(GoldAnalysis.id.desc()).limit(1000).all()
-        gold_ledgers = db.query(GoldLedger).order_by(GoldLedger.gold_ledger_id.desc()).limit(1000).all()
-        money_ledgers = db.query(MoneyLedger).order_by(MoneyLedger.money_ledger_id.desc()).limit(1000).all()
-    except Exception as e:
-        logger.error(f"خطا در کوئری دیتابیس: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"خطا در کوئری دیتابیس: {str(e)}")
+        # 1. اطلاعات هدر
+        yield [SHOP_NAME]
+        yield [REPORT_TITLE]
+        yield [f"تاریخ تولید: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}"]
+        yield []
 
-    output = io.StringIO()
-    writer = csv.writer(output, delimiter=',', quoting=csv.QUOTE_MINIMAL, lineterminator='\n')
+        # 2 تا 7. بخش‌های گزارش؛ جمع‌بندی هر بخش با یک کوئری GROUP BY گرفته می‌شود
+        sections = (
+            _customers_section,
+            _transactions_section,
+            _capital_section,
+            _gold_analysis_section,
+            _gold_ledger_section,
+            _money_ledger_section,
+        )
+        for index, section in enumerate(sections):
+            if progress:
+                progress(index, len(sections))
+            yield from section(db)
 
-    # 1. اطلاعات هدر
-    writer.writerow([SHOP_NAME])
-    writer.writerow([REPORT_TITLE])
-    writer.writerow([f"تاریخ تولید: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}"])
-    writer.writerow([])
-
-    # 2. بخش مشتریان
-    writer.writerow(["گزارش مشتریان"])
-    writer.writerow(["کد", "نام", "شماره", "آدرس", "تاریخ ثبت"])
-    for cu in customers:
-        writer.writerow([
-            cu.customer_id,
-            cu.full_name,
-            cu.phone or "-",
-            cu.address or "-",
-            format_date(cu.created_at)
-        ])
-    writer.writerow([])
-
-    # 3. بخش معاملات
-    writer.writerow(["گزارش معاملات"])
-    writer.writerow(["id", "مشتری", "نوع", "خرید گرام", "فروش گرام", "پول خرید", "پول فروش", "تاریخ"])
-    total_gold_in = 0
-    total_gold_out = 0
-    total_dollar_in = 0
-    total_dollar_out = 0
-    total_buy_count = 0
-    total_sell_count = 0
-
-    for t in transactions:
-        cust_name = t.customer.full_name if getattr(t, "customer", None) and t.customer else t.customer_id
-        writer.writerow([
-            t.txn_id,
-            cust_name,
-            "خرید" if t.type == "buy" else "فروش",
-            round(t.gold_in, 8),
-            round(t.gold_out, 8),
-            round(t.dollar_in, 8),  # پول خرید
-            round(t.dollar_out, 8),  # پول فروش
-            format_date(t.date)
-        ])
-        if t.type == "buy":
-            total_buy_count += 1
-            total_gold_in += t.gold_in
-            total_dollar_in += t.dollar_in
-        else:
-            total_sell_count += 1
-            total_gold_out += t.gold_out
-            total_dollar_out += t.dollar_out
-
-    writer.writerow(["جمع‌بندی معاملات"])
-    writer.writerow(["تعداد خرید", "تعداد فروش", "مجموع خرید گرام", "مجموع فروش گرام", "مجموع پول خرید", "مجموع پول فروش"])
-    writer.writerow([
-        total_buy_count,
-        total_sell_count,
-        round(total_gold_in, 8),
-        round(total_gold_out, 8),
-        round(total_dollar_in, 8),
-        round(total_dollar_out, 8)
-    ])
-    writer.writerow([])
-
-    # 4. بخش سرمایه
-    writer.writerow(["گزارش سرمایه"])
-    writer.writerow(["id", "سرمایه دالر", "سرمایه طلا", "تاریخ"])
-    total_usd_capital = 0
-    total_gold_capital = 0
-    for cap in capitals:
-        writer.writerow([
-            cap.id,
-            round(cap.usd_capital, 8),
-            round(cap.gold_capital, 8),
-            format_date(cap.date)
-        ])
-        total_usd_capital += cap.usd_capital
-        total_gold_capital += cap.gold_capital
-
-    writer.writerow(["جمع‌بندی سرمایه"])
-    writer.writerow(["مجموع سرمایه دالر", "مجموع سرمایه طلا"])
-    writer.writerow([round(total_usd_capital, 8), round(total_gold_capital, 8)])
-    writer.writerow([])
-
-    # 5. بخش تحلیل طلا
-    writer.writerow(["گزارش تحلیل طلا"])
-    writer.writerow(["id", "وزن ناخالص", "عیار اولیه", "نرخ توله", "وزن نهایی", "نرخ دالر", "تاریخ تحلیل"])
-    for ga in gold_analyses:
-        writer.writerow([
-            ga.id,
-            round(ga.gross_weight, 8),
-            round(ga.initial_purity, 8),
-            round(ga.tola_rate, 8),
-            round(ga.final_weight, 8),
-            round(ga.usd_rate, 8),
-            format_date(ga.analysis_date)
-        ])
-    writer.writerow([])
-
-    # 6. بخش دفتر طلا
-    writer.writerow(["گزارش دفتر طلا"])
-    writer.writerow(["id", "مشتری", "تاریخ تراکنش", "توضیحات", "دریافتی", "پرداختی", "عیار پاشنه", "بیلانس"])
-    total_gold_received = 0
-    total_gold_paid = 0
-    total_gold_balance = 0
-    for gl in gold_ledgers:
-        cust_name = gl.customer.full_name if gl.customer else gl.customer_id
-        writer.writerow([
-            gl.gold_ledger_id,
-            cust_name,
-            format_datetime(gl.transaction_date),
-            gl.description or "-",
-            round(gl.received, 8),
-            round(gl.paid, 8),
-            round(gl.heel_purity_carat, 8) if gl.heel_purity_carat else "-",
-            round(gl.balance, 8)
-        ])
-        total_gold_received += gl.received
-        total_gold_paid += gl.paid
-        total_gold_balance += gl.balance
-
-    writer.writerow(["جمع‌بندی دفتر طلا"])
-    writer.writerow(["مجموع دریافتی", "مجموع پرداختی", "مجموع بیلانس"])
-    writer.writerow([
-        round(total_gold_received, 8),
-        round(total_gold_paid, 8),
-        round(total_gold_balance, 8)
-    ])
-    writer.writerow([])
-
-    # 7. بخش دفتر پول
-    writer.writerow(["گزارش دفتر پول"])
-    writer.writerow(["id", "مشتری", "تاریخ تراکنش", "توضیحات", "دریافتی", "پرداختی", "بیلانس دالر"])
-    total_money_received = 0
-    total_money_paid = 0
-    total_usd_balance = 0
-    for ml in money_ledgers:
-        cust_name = ml.customer.full_name if ml.customer else ml.customer_id
-        writer.writerow([
-            ml.money_ledger_id,
-            cust_name,
-            format_datetime(ml.transaction_date),
-            ml.description or "-",
-            round(ml.received, 8),
-            round(ml.paid, 8),
-            round(ml.usd_balance, 8)
-        ])
-        total_money_received += ml.received
-        total_money_paid += ml.paid
-        total_usd_balance += ml.usd_balance
-
-    writer.writerow(["جمع‌بندی دفتر پول"])
-    writer.writerow(["مجموع دریافتی", "مجموع پرداختی", "مجموع بیلانس دالر"])
-    writer.writerow([
-        round(total_money_received, 8),
-        round(total_money_paid, 8),
-        round(total_usd_balance, 8)
-    ])
-    writer.writerow([])
-
-    # 8. امضا یا مهر دفتر
-    writer.writerow(["امضا یا مهر دفتر:"])
-
-    # 9. ایجاد پاسخ StreamingResponse
-    output.seek(0)
-    content = "\ufeff" + output.getvalue()  # اضافه کردن UTF-8 BOM برای پشتیبانی از فارسی
-    buffer = io.BytesIO(content.encode('utf-8'))
-    buffer.seek(0)
+        # 8. امضا یا مهر دفتر
+        yield ["امضا یا مهر دفتر:"]
+    except Exception as e:
+        logger.error(f"خطا در تولید گزارش جامع: {str(e)}")
+        raise
+    finally:
+        db.close()
 
+# مسیر جدید: گزارش جامع به فرمت CSV
+@router.get("/reports/full/excel")
+def full_report_excel(user: dict = Depends(get_current_user)):
+    """
+    گزارش جامع (CSV) شامل مشتریان، معاملات، سرمایه، تحلیل طلا، دفتر طلا، و دفتر پول
+    بدون محدودیت تعداد ردیف و با حافظه ثابت به صورت جریانی ارسال می‌شود
+    """
     today_str = datetime.utcnow().strftime('%Y%m%d')
     filename = f"report_{today_str}.csv"
 
     return StreamingResponse(
-        buffer,
+        iter_csv_chunks(full_report_rows()),
         media_type="text/csv",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
+
+def _full_report_job(job: Job):
+    """
+    نوشتن گزارش جامع در فایل (پس‌زمینه)؛ همان خروجی جریانی مسیر GET در دیسک ذخیره می‌شود
+    """
+    os.makedirs(REPORT_EXPORT_DIR, exist_ok=True)
+    filename = f"report_{datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')}.csv"
+    filepath = os.path.join(REPORT_EXPORT_DIR, filename)
+
+    def progress(index, total):
+        job.set_progress(100 * index // total, f"بخش {index + 1} از {total}")
+
+    try:
+        with open(filepath, "wb") as f:
+            for chunk in iter_csv_chunks(full_report_rows(progress=progress)):
+                f.write(chunk)
+    except Exception:
+        if os.path.exists(filepath):
+            os.remove(filepath)
+        raise
+    job.set_artifact(filepath, filename, "text/csv")
+    return {"filename": filename}
+
+@router.post("/reports/full/excel/job", status_code=202)
+def full_report_excel_job(user: dict = Depends(get_current_user)):
+    """
+    ساخت گزارش جامع در پس‌زمینه؛ وضعیت و فایل نهایی از /jobs/{job_id} گرفته می‌شود
+    """
+    job = job_runner.submit("full_report", _full_report_job)
+    return job.to_dict()
@@ -6,6 +6,9 @@ from datetime import datetime, timezone
 
 from app.core.database import get_db
 from app.core.security import get_current_user
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, next_cursor
+from app.models.shop_expense import ShopExpense
+from app.core.responses import ORJSONResponse
 from app.schemas.shop_expense import ShopExpenseCreate, ShopExpenseOut, ShopExpenseUpdate
 from app.crud.shop_expense import (
     get_expense, get_expenses, create_expense, update_expense, delete_expense
@@ -24,6 +27,8 @@ import pytz
 
 router = APIRouter(prefix="/shop-expenses", tags=["shop-expenses"])
 
+KABUL_TZ = pytz.timezone("Asia/Kabul")
+
 def utc_to_kabul_jalali(dt: Optional[datetime]) -> Optional[str]:
     if not dt:
         return None
@@ -31,28 +36,36 @@ def utc_to_kabul_jalali(dt: Optional[datetime]) -> Optional[str]:
     if dt.tzinfo is None:
         # treat as UTC
         dt = dt.replace(tzinfo=timezone.utc)
-    tz = pytz.timezone("Asia/Kabul")
-    dt_kabul = dt.astimezone(tz)
+    dt_kabul = dt.astimezone(KABUL_TZ)
     jdt = jdatetime.datetime.fromgregorian(datetime=dt_kabul)
     # format: YYYY-MM-DD HH:MM:SS (هجری شمسی)
     return jdt.strftime("%Y-%m-%d %H:%M:%S")
 
+def expense_out(row) -> ShopExpenseOut:
+    # یک بار اعتبارسنجی از ORM و افزودن تاریخ هجری شمسی
+    out = ShopExpenseOut.model_validate(row)
+    out.expense_date_jalali = utc_to_kabul_jalali(row.expense_date)
+    return out
+
 @router.get("/", response_model=List[ShopExpenseOut])
 def read_expenses(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user),
     employee_id: Optional[int] = Query(None),
     skip: int = 0,
-    limit: int = 200
+    limit: int = 200,
+    cursor: Optional[str] = Query(None, description=f"cursor صفحه بعد (از هدر {NEXT_CURSOR_HEADER}); در صورت ارسال، skip نادیده گرفته می‌شود")
 ):
-    rows = get_expenses(db, skip=skip, limit=limit, employee_id=employee_id)
-    out = []
-    for r in rows:
-        item = ShopExpenseOut.from_orm(r).model_dump()
-        # add jalali representation
-        item["expense_date_jalali"] = utc_to_kabul_jalali(r.expense_date)
-        out.append(item)
-    return out
+    try:
+        after = decode_cursor(cursor, ShopExpense.expense_date) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    rows = get_expenses(db, skip=skip, limit=limit, employee_id=employee_id, after=after)
+    cursor_out = next_cursor(rows, limit, "expense_date", "expense_id")
+    headers = {NEXT_CURSOR_HEADER: cursor_out} if cursor_out else None
+    # مسیر سریع: مدل‌ها یک بار ساخته و مستقیم با orjson سریال می‌شوند (بدون اعتبارسنجی دوباره response_model)
+    return ORJSONResponse([expense_out(r) for r in rows], headers=headers)
 
 @router.post("/", response_model=ShopExpenseOut, status_code=status.HTTP_201_CREATED)
 def create_new_expense(
@@ -88,18 +101,14 @@ def create_new_expense(
         # لاگ کن ولی شکست نده
         print("Failed to create shop expense notification:", e)
 
-    out = ShopExpenseOut.from_orm(db_exp).model_dump()
-    out["expense_date_jalali"] = utc_to_kabul_jalali(db_exp.expense_date)
-    return out
+    return expense_out(db_exp)
 
 @router.get("/{expense_id}", response_model=ShopExpenseOut)
 def read_expense(expense_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
     row = get_expense(db, expense_id)
     if not row:
         raise HTTPException(status_code=404, detail="Expense not found")
-    out = ShopExpenseOut.from_orm(row).model_dump()
-    out["expense_date_jalali"] = utc_to_kabul_jalali(row.expense_date)
-    return out
+    return expense_out(row)
 
 @router.put("/{expense_id}", response_model=ShopExpenseOut)
 def update_existing_expense(expense_id: int, expense_in: ShopExpenseUpdate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
@@ -107,9 +116,7 @@ def update_existing_expense(expense_id: int, expense_in: ShopExpenseUpdate, db:
     if not db_exp:
         raise HTTPException(status_code=404, detail="Expense not found")
     updated = update_expense(db, db_exp, expense_in)
-    out = ShopExpenseOut.from_orm(updated).model_dump()
-    out["expense_date_jalali"] = utc_to_kabul_jalali(updated.expense_date)
-    return out
+    return expense_out(updated)
 
 @router.delete("/{expense_id}")
 def delete_existing_expense(expense_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
@@ -0,0 +1,101 @@
+# app/api/v1/statements.py
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import AsyncSessionLocal, get_async_db
+from app.core.security import get_current_user
+from app.crud.customer import get_customer_async
+from app.crud.statement import parse_statement_range, stream_statement
+import csv
+import io
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/statements",
+    tags=["statements"]
+)
+
+FORMAT_JSON = "json"
+FORMAT_CSV = "csv"
+CSV_COLUMNS = (
+    "book", "source", "id", "date", "description",
+    "gold_in", "gold_out", "gold_balance", "usd_in", "usd_out", "usd_balance", "voided"
+)
+
+def _dumps(data) -> str:
+    return json.dumps(data, ensure_ascii=False)
+
+async def _statement_events(customer_id, start, end, include_voided):
+    # session جدا: session وابستگی درخواست قبل از ارسال بدنه پاسخ بسته می‌شود
+    async with AsyncSessionLocal() as db:
+        async for event in stream_statement(db, customer_id, start, end, include_voided):
+            yield event
+
+async def _json_body(header, events):
+    async for kind, data in events:
+        if kind == "opening":
+            yield _dumps(header)[:-1] + f', "opening_balance": {_dumps(data)}, "rows": ['
+            first = True
+        elif kind == "row":
+            yield ("" if first else ",") + _dumps(data)
+            first = False
+        else:
+            yield f'], "closing_balance": {_dumps(data)}}}'
+
+def _csv_line(values) -> str:
+    output = io.StringIO()
+    csv.writer(output, lineterminator='\n').writerow(values)
+    return output.getvalue()
+
+def _csv_balance_lines(label, balances):
+    return "".join(
+        _csv_line([book, label, "", "", "", "", "", values["gold"], "", "", values["usd"], ""])
+        for book, values in balances.items()
+    )
+
+async def _csv_body(events):
+    # BOM برای نمایش درست فارسی در اکسل
+    yield "﻿" + _csv_line(CSV_COLUMNS)
+    async for kind, data in events:
+        if kind == "opening":
+            yield _csv_balance_lines("opening_balance", data)
+        elif kind == "row":
+            yield _csv_line([data[column] for column in CSV_COLUMNS])
+        else:
+            yield _csv_balance_lines("closing_balance", data)
+
+@router.get("/customer/{customer_id}")
+async def read_customer_statement(
+    customer_id: int,
+    start_date: str = Query(..., description="تاریخ شروع (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="تاریخ پایان (YYYY-MM-DD)"),
+    format: str = Query(FORMAT_JSON, pattern=f"^({FORMAT_JSON}|{FORMAT_CSV})$", description="قالب خروجی"),
+    include_voided: bool = Query(False, description="نمایش رکوردهای ابطال‌شده و رکوردهای معکوس آن‌ها"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    صورت‌حساب مشتری در یک بازه: بیلانس ابتدای دوره، همه رکوردهای روزنامچه طلا، روزنامچه دالر
+    و معاملات با بیلانس لحظه‌ای، و بیلانس پایان دوره (به تفکیک دفتر روزنامچه و دفتر معاملات)
+    """
+    try:
+        start, end = parse_statement_range(start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not await get_customer_async(db, customer_id):
+        raise HTTPException(status_code=404, detail="مشتری یافت نشد")
+
+    events = _statement_events(customer_id, start, end, include_voided)
+    if format == FORMAT_CSV:
+        filename = f"statement_customer_{customer_id}_{start_date}_{end_date}.csv"
+        return StreamingResponse(
+            _csv_body(events),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+    header = {"customer_id": customer_id, "start_date": start_date, "end_date": end_date}
+    return StreamingResponse(_json_body(header, events), media_type="application/json")
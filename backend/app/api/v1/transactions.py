@@ -4,11 +4,16 @@
 # آدرس: دانشگاه تخار، دانشکده علوم کامپیوتر.
 # backend/app/api/v1/transactions.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_async_db, get_db
 from app.core.security import get_current_user
+from app.core.write_queue import write_queue
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, next_cursor
+from app.models.transaction import Transaction as TransactionModel
 from app.schemas.transaction import TransactionCreate, Transaction, TransactionUpdate
 from app.crud.notification import create_notification
 from app.schemas.notification import NotificationCreate
@@ -16,11 +21,14 @@ from app.schemas.notification import NotificationCreate
 from app.models.user import Employee, Login 
 
 from app.crud.transaction import (
+    add_transaction,
     get_transaction,
     get_transactions,
     create_transaction,
     update_transaction,
-    delete_transaction
+    delete_transaction,
+    get_transaction_async,
+    get_transactions_async,
 )
 
 router = APIRouter(
@@ -29,25 +37,47 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=Transaction, status_code=status.HTTP_201_CREATED)
-def create_new_transaction(transaction: TransactionCreate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-   return create_transaction(db=db, transaction=transaction)
+def create_new_transaction(
+    transaction: TransactionCreate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+    post_ledgers: bool = Query(False, description="ثبت رکوردهای روزنامچه طلا و دالر معامله در همان تراکنش"),
+):
+    try:
+        if settings.WRITE_COALESCING:
+            return write_queue.run(add_transaction, transaction, post_ledgers)
+        return create_transaction(db=db, transaction=transaction, post_ledgers=post_ledgers)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 
 @router.get("/", response_model=List[Transaction])
-def read_transactions(
-    db: Session = Depends(get_db),
+async def read_transactions(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user),
     search: Optional[str] = None,
     customer_id: Optional[int] = None,   # ⬅ اضافه شد
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description=f"cursor صفحه بعد (از هدر {NEXT_CURSOR_HEADER}); در صورت ارسال، skip نادیده گرفته می‌شود"),
 ):
-    transactions = get_transactions(db, search=search, customer_id=customer_id)
+    try:
+        after = decode_cursor(cursor, TransactionModel.date) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    transactions = await get_transactions_async(db, skip=skip, limit=limit, search=search, customer_id=customer_id, after=after)
+    cursor_out = next_cursor(transactions, limit, "date", "txn_id")
+    if cursor_out:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_out
     return transactions
 
 
 @router.get("/{txn_id}", response_model=Transaction)
-def read_transaction(txn_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    txn = get_transaction(db, txn_id=txn_id)
+async def read_transaction(txn_id: int, db: AsyncSession = Depends(get_async_db), current_user: dict = Depends(get_current_user)):
+    txn = await get_transaction_async(db, txn_id=txn_id)
     if not txn:
         raise HTTPException(status_code=404, detail="Transaction not found")
     return txn
@@ -57,11 +87,15 @@ def update_existing_transaction(txn_id: int, transaction: TransactionUpdate, db:
     db_txn = get_transaction(db, txn_id=txn_id)
     if not db_txn:
         raise HTTPException(status_code=404, detail="Transaction not found")
-    return update_transaction(db, db_txn, transaction)
+    try:
+        # رکوردهای روزنامچه معامله (post_ledgers) مثل حذف تکی، بسته به LEDGER_DELETE_MODE ابطال یا حذف و دوباره ثبت می‌شوند
+        return update_transaction(db, db_txn, transaction, void_ledgers=settings.LEDGER_DELETE_MODE == "void")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.delete("/{txn_id}")
 def delete_existing_transaction(txn_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    txn = delete_transaction(db, txn_id)
+    txn = delete_transaction(db, txn_id, void_ledgers=settings.LEDGER_DELETE_MODE == "void")
     if not txn:
         raise HTTPException(status_code=404, detail="Transaction not found")
     return {"message": "Transaction deleted successfully"}
@@ -0,0 +1,169 @@
+# path: backend/app/core/compression.py
+# فشرده‌سازی پاسخ‌ها (zstd یا gzip) بر اساس Accept-Encoding برای بدنه‌های بزرگ‌تر از COMPRESSION_MIN_SIZE.
+# پاسخ‌های stream (گزارش حساب، CSV) تکه به تکه فشرده و بعد از هر تکه flush می‌شوند تا کلاینت هر تکه را
+# همان لحظه باز کند (بایت اول سریع stream حفظ شود). zstd فقط وقتی پیشنهاد می‌شود که بسته
+# اختیاری zstandard نصب باشد. فایل‌های از قبل فشرده (xlsx، zip، تصویر) و پاسخ‌های دارای
+# Content-Encoding دست نمی‌خورند. ETag پاسخ فشرده weak می‌شود (W/) چون بایت‌های بدنه تغییر کرده‌اند.
+import zlib
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import zstandard
+except ImportError:  # بسته اختیاری
+    zstandard = None
+
+EXCLUDED_CONTENT_TYPES = (
+    "text/event-stream",
+    "image/",
+    "application/zip",
+    "application/gzip",
+    "application/pdf",
+    "application/vnd.openxmlformats",
+)
+
+class GzipCompressor:
+    encoding = "gzip"
+
+    def __init__(self, level: int):
+        # wbits=31: قالب gzip (هدر و CRC)
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.compress(data)
+        # Z_SYNC_FLUSH: داده تکه بدون بستن stream کامل نوشته می‌شود
+        return out + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class ZstdCompressor:
+    encoding = "zstd"
+
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.compress(data)
+        if final:
+            return out + self._compressor.flush()
+        return out + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+def available_encodings() -> Dict[str, type]:
+    encodings = {"gzip": GzipCompressor}
+    if zstandard is not None:
+        encodings = {"zstd": ZstdCompressor, **encodings}
+    return encodings
+
+def choose_encoding(accept_encoding: str, encodings: Dict[str, type]) -> Optional[str]:
+    """
+    بهترین کدگذاری قابل قبول برای کلاینت (بیشترین q؛ در q برابر ترتیب encodings یعنی zstd قبل از gzip)
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+    best, best_q = None, 0.0
+    for name in encodings:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, zstd_level: int = 3):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "zstd": zstd_level}
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self.app, self.minimum_size, lambda: self.encodings[encoding](self.levels[encoding]))
+        await responder(scope, receive, send)
+
+class _CompressionResponder:
+    def __init__(self, app: ASGIApp, minimum_size: int, make_compressor):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.make_compressor = make_compressor
+        self.compressor = None
+        self.send: Optional[Send] = None
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+        self.buffer = b""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    def _start_compressed(self, streaming: bool, body: bytes) -> bytes:
+        self.compressor = self.make_compressor()
+        body = self.compressor.compress(body, final=not streaming)
+        headers = MutableHeaders(raw=self.initial_message["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        headers["Content-Encoding"] = self.compressor.encoding
+        if streaming:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(body))
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+        return body
+
+    async def send_with_compression(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 304)
+                or headers.get("content-type", "").startswith(EXCLUDED_CONTENT_TYPES)
+            )
+            return
+        if message_type != "http.response.body":
+            if not self.started:
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not self.started:
+            # تکه‌های اول stream تا رسیدن به minimum_size نگه داشته می‌شوند تا پاسخ کوچک فشرده نشود
+            body = self.buffer + body
+            if more_body and not self.passthrough and len(body) < self.minimum_size:
+                self.buffer = body
+                return
+            self.started = True
+            self.buffer = b""
+            if self.passthrough or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                message["body"] = body
+            else:
+                message["body"] = self._start_compressed(more_body, body)
+            await self.send(self.initial_message)
+            await self.send(message)
+            return
+        if not self.passthrough:
+            message["body"] = self.compressor.compress(body, final=not more_body)
+        await self.send(message)
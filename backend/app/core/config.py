@@ -10,6 +10,54 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # پروفایل اتصال SQLite: "performance" (WAL و pragmaهای زیر) یا "default" (تنظیمات پیش‌فرض SQLite)
+    DB_PROFILE: str = os.getenv("DB_PROFILE", "performance")
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_CACHE_SIZE_KB: int = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_TEMP_STORE: str = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    # اندازه pool هم‌اندازه threadpool پیش‌فرض FastAPI/AnyIO (۴۰ نخ)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "30"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+    # صف نوشتن گروهی: ثبت‌های هم‌زمان که در WRITE_BATCH_WINDOW_MS میلی‌ثانیه می‌رسند با یک commit نوشته می‌شوند
+    WRITE_COALESCING: bool = os.getenv("WRITE_COALESCING", "false").lower() in ("1", "true", "yes")
+    WRITE_BATCH_WINDOW_MS: int = int(os.getenv("WRITE_BATCH_WINDOW_MS", "5"))
+    WRITE_BATCH_MAX: int = int(os.getenv("WRITE_BATCH_MAX", "100"))
+    WRITE_TIMEOUT: int = int(os.getenv("WRITE_TIMEOUT", "30"))
+
+    # حذف رکورد روزنامچه: "void" (رکورد معکوس و علامت ابطال، بدون بازنویسی بیلانس‌های گذشته) یا "delete" (حذف فیزیکی)
+    LEDGER_DELETE_MODE: str = os.getenv("LEDGER_DELETE_MODE", "void")
+
+    # cache پاسخ لیست‌های پرتکرار (ETag و LRU در حافظه)؛ با false فقط 304 بر اساس ETag فعال می‌ماند
+    RESPONSE_CACHE: bool = os.getenv("RESPONSE_CACHE", "true").lower() in ("1", "true", "yes")
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+    # فشرده‌سازی پاسخ‌های بزرگ (zstd در صورت نصب بودن zstandard، وگرنه gzip)
+    COMPRESSION: bool = os.getenv("COMPRESSION", "true").lower() in ("1", "true", "yes")
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", "6"))
+    ZSTD_LEVEL: int = int(os.getenv("ZSTD_LEVEL", "3"))
+
+    # کارهای پس‌زمینه (بک‌آپ، گزارش جامع، آپلود)
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_HISTORY_LIMIT: int = int(os.getenv("JOB_HISTORY_LIMIT", "200"))
+
+    # مقصد آپلود بک‌آپ: "drive" برای گوگل‌درایو، "local" برای کپی در پوشه محلی (تست آفلاین)
+    BACKUP_UPLOADER: str = os.getenv("BACKUP_UPLOADER", "drive")
+    BACKUP_UPLOAD_DIR: str = os.getenv("BACKUP_UPLOAD_DIR", "uploads/backups")
+    DRIVE_FOLDER_ID: str = os.getenv("DRIVE_FOLDER_ID", "1dPWL6JdxhcjTV6eyuXy1ZsKje59E5FTb")
+
+    # snapshot فشرده فایل SQLite (API آنلاین بک‌آپ)
+    SNAPSHOT_DIR: str = os.getenv("SNAPSHOT_DIR", "backups")
+    SNAPSHOT_KEEP: int = int(os.getenv("SNAPSHOT_KEEP", "14"))
+    SNAPSHOT_PAGES_PER_STEP: int = int(os.getenv("SNAPSHOT_PAGES_PER_STEP", "256"))
+    SNAPSHOT_STEP_SLEEP_MS: int = int(os.getenv("SNAPSHOT_STEP_SLEEP_MS", "5"))
+
     BACKEND_CORS_ORIGINS: List[str] = [
  "http://localhost:3000",
  "http://127.0.0.1:3000",
@@ -0,0 +1,184 @@
+# path: backend/app/core/daily_rollup.py
+# به‌روزرسانی جمع‌های روزانه (daily_rollups و جداول به تفکیک مشتری و نوع مصرف) در همان تراکنش هر ثبت.
+# تغییر هر ردیف معامله، روزنامچه یا مصرف به چند «سهم» (جدول، کلید، مقادیر) تبدیل می‌شود:
+# درج سهم جدید را اضافه، حذف سهم قبلی را کم و ویرایش هر دو را اعمال می‌کند. جمع سهم‌ها با یک
+# INSERT ... ON CONFLICT DO UPDATE برای هر کلید نوشته می‌شود. مسیرهای گروهی (bulk_insert_mappings)
+# از flush عبور نمی‌کنند و باید record_rollups را صدا بزنند.
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.daily_rollup import DailyCustomerRollup, DailyExpenseRollup, DailyRollup
+from app.models.gold_ledger import GoldLedger
+from app.models.money_ledger import MoneyLedger
+from app.models.shop_expense import ShopExpense
+from app.models.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+Share = Tuple[Any, Dict[str, Any], Dict[str, float]]
+
+def rollup_day(value) -> Optional[date]:
+    """
+    روز یک مقدار تاریخ (datetime، date یا رشته ISO مثل تاریخ معاملات)
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str) and len(value) >= 10:
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    return None
+
+def _number(value) -> float:
+    return float(value) if value is not None else 0.0
+
+def _with_customer(shares: List[Share], day: date, customer_id, values) -> List[Share]:
+    if customer_id is not None:
+        shares.append((DailyCustomerRollup, {"day": day, "customer_id": customer_id}, values))
+    return shares
+
+def _transaction_shares(v: Dict[str, Any]) -> List[Share]:
+    day = rollup_day(v.get("date"))
+    if day is None:
+        return []
+    values = {
+        "buy_count" if v.get("type") == "buy" else "sell_count": 1,
+        "gold_in": _number(v.get("gold_in")),
+        "gold_out": _number(v.get("gold_out")),
+        "dollar_in": _number(v.get("dollar_in")),
+        "dollar_out": _number(v.get("dollar_out")),
+    }
+    return _with_customer([(DailyRollup, {"day": day}, values)], day, v.get("customer_id"), values)
+
+def _ledger_shares(prefix: str):
+    def shares(v: Dict[str, Any]) -> List[Share]:
+        day = rollup_day(v.get("transaction_date"))
+        # رکورد ابطال‌شده و رکورد معکوس در جمع‌ها نیستند؛ ابطال (تغییر voided_at) سهم رکورد اصلی را کم می‌کند
+        if day is None or v.get("voided_at") is not None or v.get("reversal_of_id") is not None:
+            return []
+        values = {f"{prefix}_received": _number(v.get("received")), f"{prefix}_paid": _number(v.get("paid"))}
+        return _with_customer([(DailyRollup, {"day": day}, values)], day, v.get("customer_id"), values)
+    return shares
+
+def _expense_shares(v: Dict[str, Any]) -> List[Share]:
+    day = rollup_day(v.get("expense_date"))
+    if day is None:
+        return []
+    values = {"expense_count": 1, "expense_amount": _number(v.get("amount"))}
+    return [
+        (DailyRollup, {"day": day}, values),
+        (DailyExpenseRollup, {"day": day, "expense_type": v.get("expense_type")}, values),
+    ]
+
+# ستون‌های مؤثر بر جمع‌ها و تابع سهم هر مدل
+ROLLUP_SOURCES = {
+    Transaction: (("customer_id", "type", "date", "gold_in", "gold_out", "dollar_in", "dollar_out"), _transaction_shares),
+    GoldLedger: (("customer_id", "transaction_date", "received", "paid", "voided_at", "reversal_of_id"), _ledger_shares("ledger_gold")),
+    MoneyLedger: (("customer_id", "transaction_date", "received", "paid", "voided_at", "reversal_of_id"), _ledger_shares("ledger_usd")),
+    ShopExpense: (("expense_type", "expense_date", "amount"), _expense_shares),
+}
+
+class RollupDeltas:
+    """
+    جمع تغییرات به تفکیک (جدول، کلید)
+    """
+
+    def __init__(self):
+        self._deltas = defaultdict(lambda: defaultdict(float))
+        self._keys = {}
+
+    def add(self, shares: Iterable[Share], sign: int):
+        for model, key, values in shares:
+            ident = (model, tuple(sorted(key.items())))
+            self._keys[ident] = key
+            for column, value in values.items():
+                self._deltas[ident][column] += sign * value
+
+    def apply(self, connection):
+        upsert = sqlite_insert if connection.dialect.name == "sqlite" else postgresql_insert
+        for ident, values in self._deltas.items():
+            values = {column: value for column, value in values.items() if value}
+            if not values:
+                continue
+            model, key = ident[0], self._keys[ident]
+            table = model.__table__
+            stmt = upsert(table).values({**key, **values})
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(key),
+                set_={column: table.c[column] + stmt.excluded[column] for column in values}
+            )
+            connection.execute(stmt)
+
+def _current_values(obj, columns) -> Dict[str, Any]:
+    return {name: getattr(obj, name) for name in columns}
+
+def _previous_values(state, columns) -> Dict[str, Any]:
+    values = {}
+    for name in columns:
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+        else:
+            values[name] = state.attrs[name].value
+    return values
+
+def collect_deltas(session: Session) -> RollupDeltas:
+    deltas = RollupDeltas()
+    for obj in session.new:
+        source = ROLLUP_SOURCES.get(type(obj))
+        if source:
+            columns, shares = source
+            deltas.add(shares(_current_values(obj, columns)), 1)
+    for obj in session.deleted:
+        source = ROLLUP_SOURCES.get(type(obj))
+        if source:
+            columns, shares = source
+            deltas.add(shares(_previous_values(inspect(obj), columns)), -1)
+    for obj in session.dirty:
+        source = ROLLUP_SOURCES.get(type(obj))
+        if not source:
+            continue
+        columns, shares = source
+        state = inspect(obj)
+        if not any(state.attrs[name].history.has_changes() for name in columns):
+            continue
+        deltas.add(shares(_previous_values(state, columns)), -1)
+        deltas.add(shares(_current_values(obj, columns)), 1)
+    return deltas
+
+def record_rollups(db: Session, model, rows: Iterable[Dict[str, Any]]):
+    """
+    اعمال دستی ردیف‌های درج‌شده در مسیرهای گروهی روی جمع‌های روزانه
+    """
+    source = ROLLUP_SOURCES.get(model)
+    if source is None:
+        return
+    _, shares = source
+    deltas = RollupDeltas()
+    for row in rows:
+        deltas.add(shares(row), 1)
+    deltas.apply(db.connection())
+
+@event.listens_for(SessionLocal, "before_flush")
+def _rollup_before_flush(session: Session, flush_context, instances):
+    # مقادیر ردیف‌های در حال حذف قبل از DELETE بارگذاری می‌شوند (بعد از flush دیگر قابل خواندن نیستند)
+    for obj in session.deleted:
+        source = ROLLUP_SOURCES.get(type(obj))
+        if source:
+            _current_values(obj, source[0])
+
+@event.listens_for(SessionLocal, "after_flush")
+def _rollup_after_flush(session: Session, flush_context):
+    # تاریخچه ویژگی‌ها (مقدار قبل از ویرایش) فقط تا پایان همین flush در دسترس است
+    collect_deltas(session).apply(session.connection())
@@ -1,15 +1,70 @@
 # path: backend/app/core/database.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
 
 
-connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
+is_sqlite = settings.DATABASE_URL.startswith("sqlite")
+connect_args = {"check_same_thread": False} if is_sqlite else {}
 
-engine = create_engine(settings.DATABASE_URL, connect_args=connect_args, future=True)
+engine_options = {}
+if settings.DB_PROFILE == "performance" and ":memory:" not in settings.DATABASE_URL:
+    # هر درخواست در یک نخ threadpool اجرا می‌شود؛ pool باید به اندازه آن باشد تا نخ‌ها منتظر اتصال نمانند
+    engine_options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+
+engine = create_engine(settings.DATABASE_URL, connect_args=connect_args, future=True, **engine_options)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 Base = declarative_base()
 
+def sqlite_pragmas():
+    """
+    pragmaهای پروفایل performance:
+    WAL تا خواننده‌ها پشت commit نویسنده‌ها نمانند، synchronous=NORMAL (در WAL امن)،
+    cache و mmap بزرگ‌تر، جداول موقت در حافظه و busy_timeout به جای خطای فوری «database is locked»
+    """
+    return [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        f"PRAGMA temp_store={settings.SQLITE_TEMP_STORE}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+    ]
+
+def async_database_url(database_url: str) -> str:
+    """
+    آدرس معادل async برای DATABASE_URL: sqlite با aiosqlite و PostgreSQL با asyncpg
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    elif backend == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    return url.render_as_string(hide_password=False)
+
+# engine دوم برای endpointهای خواندنی async؛ درخواست در event loop منتظر دیتابیس می‌ماند
+# و نخی از threadpool نمی‌گیرد. نوشتن‌ها (و دفتر تغییرات روی SessionLocal) همچنان روی engine اصلی هستند.
+async_engine = create_async_engine(async_database_url(settings.DATABASE_URL), **engine_options)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+if is_sqlite and settings.DB_PROFILE == "performance":
+    @event.listens_for(engine, "connect")
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in sqlite_pragmas():
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
 def get_db():
     db = SessionLocal()
     try:
@@ -17,6 +72,10 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # created by: professor zabihullah burhani
 # ICT and AI and Robotics متخصص
 # phone: 0705002913, email: zabihullahburhani@gmail.com
@@ -0,0 +1,128 @@
+# path: backend/app/core/jobs.py
+# اجرای کارهای سنگین (بک‌آپ، گزارش جامع، آپلود) در پس‌زمینه؛ درخواست POST فوراً شناسه کار را برمی‌گرداند
+# و وضعیت/پیشرفت با GET /jobs/{id} خوانده می‌شود. کارها در ThreadPoolExecutor اجرا می‌شوند و هر کار
+# session دیتابیس خودش را باز می‌کند، پس نخ‌های درخواست‌های عادی درگیر نمی‌شوند.
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class Job:
+    """
+    وضعیت یک کار پس‌زمینه؛ تابع کار با set_progress پیشرفت را گزارش می‌دهد و
+    در صورت تولید فایل، مسیر آن را با set_artifact ثبت می‌کند
+    """
+
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = JOB_PENDING
+        self.progress = 0
+        self.message: Optional[str] = None
+        self.error: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.artifact_path: Optional[str] = None
+        self.artifact_name: Optional[str] = None
+        self.media_type: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+    def set_progress(self, progress: int, message: Optional[str] = None):
+        self.progress = max(0, min(100, int(progress)))
+        if message is not None:
+            self.message = message
+
+    def set_artifact(self, path: str, filename: str, media_type: str):
+        self.artifact_path = path
+        self.artifact_name = filename
+        self.media_type = media_type
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "error": self.error,
+            "result": self.result,
+            "has_artifact": self.status == JOB_DONE and self.artifact_path is not None,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobRunner:
+    """
+    صف کارهای پس‌زمینه با ثبت وضعیت در حافظه؛ تاریخچه کارهای تمام‌شده به JOB_HISTORY_LIMIT محدود است
+    """
+
+    def __init__(self, max_workers: int, history_limit: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._history_limit = history_limit
+
+    def submit(self, kind: str, fn: Callable[[Job], Optional[Dict[str, Any]]]) -> Job:
+        """
+        ثبت و اجرای کار؛ fn شیء Job را می‌گیرد و می‌تواند یک dict به عنوان نتیجه برگرداند
+        """
+        job = Job(kind)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn)
+        logger.info(f"Job {job.id} ({kind}) submitted")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def _run(self, job: Job, fn):
+        job.status = JOB_RUNNING
+        job.started_at = datetime.utcnow()
+        try:
+            job.result = fn(job)
+            job.progress = 100
+            job.status = JOB_DONE
+            logger.info(f"Job {job.id} ({job.kind}) finished")
+        except Exception as e:
+            # HTTPException پیام را در detail نگه می‌دارد
+            job.error = str(getattr(e, "detail", None) or e)
+            job.status = JOB_FAILED
+            logger.error(f"Job {job.id} ({job.kind}) failed: {job.error}")
+        finally:
+            job.finished_at = datetime.utcnow()
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j.finished]
+        overflow = len(finished) - self._history_limit
+        if overflow > 0:
+            for job in sorted(finished, key=lambda j: j.created_at)[:overflow]:
+                del self._jobs[job.id]
+
+
+job_runner = JobRunner(max_workers=settings.JOB_WORKERS, history_limit=settings.JOB_HISTORY_LIMIT)
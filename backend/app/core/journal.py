@@ -0,0 +1,106 @@
+# path: backend/app/core/journal.py
+# ثبت خودکار تغییرات جداول اصلی در دفتر تغییرات (change_journal) برای بک‌آپ افزایشی.
+# اشیای تغییرکرده در after_flush جمع و در after_flush_postexec (وقتی کلید اصلی و مقادیر پیش‌فرض
+# دیتابیس در دسترس است) در همان تراکنش ثبت می‌شوند؛ مسیرهای گروهی
+# (bulk_insert_mappings و UPDATE گروهی) از flush عبور نمی‌کنند و باید record_changes را صدا بزنند.
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.change_journal import ChangeJournal
+
+logger = logging.getLogger(__name__)
+
+# جداولی که تغییراتشان در دفتر ثبت می‌شود
+JOURNALED_TABLES = ("customers", "transactions", "gold_ledger", "money_ledger", "capital_records", "debts")
+
+JOURNAL_INSERT = "insert"
+JOURNAL_UPDATE = "update"
+JOURNAL_DELETE = "delete"
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(data: Dict[str, Any]) -> str:
+    return json.dumps(data, ensure_ascii=False, default=_json_default)
+
+def _row_data(mapper, obj) -> Dict[str, Any]:
+    # کلیدها نام ستون جدول هستند تا بازیابی مستقیماً روی جدول انجام شود
+    return {attr.columns[0].name: getattr(obj, attr.key) for attr in mapper.column_attrs}
+
+def _entry(table_name: str, row_id, operation: str, data) -> Dict[str, Any]:
+    return {
+        "table_name": table_name,
+        "row_id": row_id,
+        "operation": operation,
+        "data": dumps(data) if data is not None else None,
+    }
+
+def record_changes(db: Session, model, operation: str, rows: Iterable[Dict[str, Any]]):
+    """
+    ثبت دستی تغییرات مسیرهای گروهی در دفتر؛ هر ردیف باید شامل کلید اصلی باشد.
+    برای update فقط ستون‌های داده‌شده ثبت می‌شوند.
+    """
+    table = model.__table__
+    if table.name not in JOURNALED_TABLES:
+        return
+    mapper = inspect(model)
+    pk_attr = mapper.get_property_by_column(mapper.primary_key[0]).key
+    columns = {attr.key: attr.columns[0].name for attr in mapper.column_attrs}
+    entries = [
+        _entry(
+            table.name,
+            row[pk_attr],
+            operation,
+            {columns.get(key, key): value for key, value in row.items()} if operation != JOURNAL_DELETE else None
+        )
+        for row in rows
+    ]
+    if entries:
+        db.execute(ChangeJournal.__table__.insert(), entries)
+
+def _collect_changes(session: Session) -> List[tuple]:
+    changes = []
+    for operation, objects in (
+        (JOURNAL_INSERT, session.new),
+        (JOURNAL_UPDATE, session.dirty),
+        (JOURNAL_DELETE, session.deleted),
+    ):
+        for obj in objects:
+            mapper = inspect(obj).mapper
+            table_name = mapper.local_table.name
+            if table_name not in JOURNALED_TABLES:
+                continue
+            if operation == JOURNAL_UPDATE and not session.is_modified(obj, include_collections=False):
+                continue
+            changes.append((operation, mapper, obj))
+    return changes
+
+@event.listens_for(SessionLocal, "after_flush")
+def _journal_after_flush(session: Session, flush_context):
+    changes = _collect_changes(session)
+    if changes:
+        session.info.setdefault("journal_pending", []).extend(changes)
+
+@event.listens_for(SessionLocal, "after_flush_postexec")
+def _journal_after_flush_postexec(session: Session, flush_context):
+    changes = session.info.pop("journal_pending", None)
+    if not changes:
+        return
+    entries = []
+    for operation, mapper, obj in changes:
+        row_id = mapper.primary_key_from_instance(obj)[0]
+        data = _row_data(mapper, obj) if operation != JOURNAL_DELETE else None
+        entries.append(_entry(mapper.local_table.name, row_id, operation, data))
+    # همان اتصال و تراکنش flush؛ با rollback تغییرات، ردیف‌های دفتر هم برمی‌گردند
+    session.connection().execute(ChangeJournal.__table__.insert(), entries)
@@ -0,0 +1,57 @@
+# path: backend/app/core/pagination.py
+# صفحه‌بندی keyset (cursor): به جای offset، آخرین کلید (تاریخ، شناسه) صفحه قبل رمزگذاری می‌شود
+# تا هزینه صفحه ۵۰۰ با صفحه ۱ یکسان باشد.
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import tuple_, DateTime
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    if isinstance(sort_value, (datetime, date)):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort_column=None) -> Tuple[Any, int]:
+    """
+    باز کردن cursor؛ در صورت نامعتبر بودن ValueError می‌دهد.
+    با sort_column مقدار مرتب‌سازی هم بررسی می‌شود (برای ستون DateTime به datetime تبدیل می‌شود)
+    تا cursor خراب به جای خطای 400 در کوئری شکست نخورد.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("cursor نامعتبر است")
+    if not isinstance(row_id, int) or isinstance(row_id, bool):
+        raise ValueError("cursor نامعتبر است")
+    if sort_column is not None:
+        if not isinstance(sort_value, str):
+            raise ValueError("cursor نامعتبر است")
+        if isinstance(sort_column.type, DateTime):
+            try:
+                sort_value = datetime.fromisoformat(sort_value)
+            except ValueError:
+                raise ValueError("cursor نامعتبر است")
+    return sort_value, row_id
+
+def seek_before(sort_column, id_column, key: Tuple[Any, int]):
+    """
+    شرط رکوردهای بعد از cursor در ترتیب نزولی (sort_column DESC, id_column DESC)
+    مقایسه row-value باعث می‌شود دیتابیس مستقیماً روی ایندکس به همان نقطه برود
+    """
+    sort_value, row_id = key
+    return tuple_(sort_column, id_column) < tuple_(sort_value, row_id)
+
+def next_cursor(items: List[Any], limit: int, sort_attr: str, id_attr: str) -> Optional[str]:
+    """
+    اگر صفحه پر باشد، cursor صفحه بعد از روی آخرین رکورد ساخته می‌شود
+    """
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(getattr(last, sort_attr), getattr(last, id_attr))
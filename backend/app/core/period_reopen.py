@@ -0,0 +1,67 @@
+# path: backend/app/core/period_reopen.py
+# باز کردن خودکار دوره‌های بسته بعد از ثبت/ویرایش/حذف با تاریخ گذشته.
+# هر تغییر در مبلغ، مشتری یا تاریخ روزنامچه‌ها و سرمایه که تاریخش (قبل یا بعد از ویرایش) قبل از
+# پایان یک دوره بسته باشد، آن دوره و دوره‌های بعدی را در همان تراکنش reopened می‌کند؛
+# بستن دوباره با POST /periods/reclose انجام می‌شود.
+import logging
+from datetime import date, datetime, time
+from typing import Optional
+
+from sqlalchemy import event, inspect, update
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.capital import Capital
+from app.models.gold_ledger import GoldLedger
+from app.models.money_ledger import MoneyLedger
+from app.models.period_close import PERIOD_CLOSED, PERIOD_REOPENED, PeriodClose
+
+logger = logging.getLogger(__name__)
+
+# ستون تاریخ و ستون‌هایی که روی بیلانس دوره اثر دارند
+WATCHED_MODELS = {
+    GoldLedger: ("transaction_date", ("customer_id", "received", "paid", "transaction_date")),
+    MoneyLedger: ("transaction_date", ("customer_id", "received", "paid", "transaction_date")),
+    Capital: ("date", ("usd_capital", "gold_capital", "date")),
+}
+
+def _as_datetime(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, time.min)
+    return None
+
+def _earliest_change(session: Session) -> Optional[datetime]:
+    earliest = None
+    for objects, is_update in ((session.new, False), (session.dirty, True), (session.deleted, False)):
+        for obj in objects:
+            watch = WATCHED_MODELS.get(type(obj))
+            if watch is None:
+                continue
+            date_attr, value_attrs = watch
+            if is_update:
+                state = inspect(obj)
+                if not any(state.attrs[name].history.has_changes() for name in value_attrs):
+                    continue
+                history = state.attrs[date_attr].history
+                dates = [*history.deleted, *history.added, *history.unchanged]
+            else:
+                dates = [getattr(obj, date_attr)]
+            for value in map(_as_datetime, dates):
+                if value is not None and (earliest is None or value < earliest):
+                    earliest = value
+    return earliest
+
+@event.listens_for(SessionLocal, "after_flush")
+def _reopen_after_flush(session: Session, flush_context):
+    earliest = _earliest_change(session)
+    if earliest is None:
+        return
+    result = session.connection().execute(
+        update(PeriodClose)
+        .where(PeriodClose.status == PERIOD_CLOSED, PeriodClose.end_at > earliest)
+        .values(status=PERIOD_REOPENED, reopened_at=datetime.utcnow())
+    )
+    if result.rowcount:
+        logger.warning(f"Back-dated change at {earliest} reopened {result.rowcount} closed periods")
@@ -0,0 +1,176 @@
+# path: backend/app/core/response_cache.py
+# GET شرطی (ETag / If-None-Match) و cache پاسخ برای لیست‌های پرتکرار (مشتریان، نرخ‌ها، انواع طلا، سرمایه).
+# برای هر جدول یک شماره نسخه در حافظه نگه داشته می‌شود. هر INSERT/UPDATE/DELETE روی یک اتصال ثبت و
+# بعد از commit (وقتی اتصال به pool برمی‌گردد) نسخه آن جدول یک واحد زیاد می‌شود؛ چون افزایش نسخه
+# همیشه بعد از commit است، داده قدیمی هیچ‌وقت با نسخه جدید در cache نمی‌نشیند.
+# ETag از روی نسخه‌ها ساخته می‌شود، پس پاسخ 304 و پاسخ از cache بدون هیچ کوئری دیتابیس برمی‌گردند.
+# نسخه‌ها مخصوص همین پروسس هستند (سرور با یک worker اجرا می‌شود، مثل صف نوشتن و کارهای پس‌زمینه).
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+from app.core.config import settings
+from app.core.database import async_engine, engine
+
+logger = logging.getLogger(__name__)
+
+ETAG_HEADER = "ETag"
+CACHE_HEADERS = {"Cache-Control": "no-cache"}
+
+# پیشوند ETag برای هر بار اجرای سرور؛ نسخه‌ها بعد از ری‌استارت از صفر شروع می‌شوند
+_EPOCH = uuid.uuid4().hex[:8]
+_PENDING = "response_cache_pending_tables"
+_COMMITTED = "response_cache_committed_tables"
+
+_versions: Dict[str, int] = {}
+_versions_lock = threading.Lock()
+
+def table_versions(tables: Sequence[str]) -> Tuple[int, ...]:
+    return tuple(_versions.get(table, 0) for table in tables)
+
+def bump_tables(tables: Iterable[str]):
+    with _versions_lock:
+        for table in tables:
+            _versions[table] = _versions.get(table, 0) + 1
+
+def make_etag(versions: Tuple[int, ...]) -> str:
+    return '"' + _EPOCH + "-" + ".".join(str(v) for v in versions) + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+class ResponseCache:
+    """
+    cache LRU بدنه JSON پاسخ‌ها با سقف تعداد و حجم
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: tuple, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = body
+            self._size += len(body)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_MAX_ENTRIES, settings.RESPONSE_CACHE_MAX_BYTES)
+
+def _cache_key(request: Request, versions: Tuple[int, ...]) -> tuple:
+    return (request.url.path, tuple(sorted(request.query_params.multi_items())), versions)
+
+def cached_response(request: Request, tables: Sequence[str]) -> Tuple[tuple, Optional[Response]]:
+    """
+    پاسخ 304 (ETag برابر) یا پاسخ cache شده برای این مسیر و نسخه فعلی جداول؛ در غیر این صورت None.
+    کلید برگشتی برای store_response همان نسخه‌ای است که قبل از خواندن داده گرفته شده است.
+    """
+    versions = table_versions(tables)
+    key = _cache_key(request, versions)
+    etag = make_etag(versions)
+    headers = {ETAG_HEADER: etag, **CACHE_HEADERS}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return key, Response(status_code=304, headers=headers)
+    if settings.RESPONSE_CACHE:
+        body = response_cache.get(key)
+        if body is not None:
+            return key, Response(content=body, media_type="application/json", headers=headers)
+    return key, None
+
+@lru_cache(maxsize=None)
+def _adapter(response_type) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+def store_response(key: tuple, data: Any, response_type: Any = Any) -> Response:
+    """
+    سریال کردن داده با response_type (مثل response_model)، ذخیره در cache و برگرداندن پاسخ با ETag
+    """
+    adapter = _adapter(response_type)
+    body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    if settings.RESPONSE_CACHE:
+        response_cache.put(key, body)
+    headers = {ETAG_HEADER: make_etag(key[-1]), **CACHE_HEADERS}
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@event.listens_for(Pool, "checkout")
+def _reset_on_checkout(dbapi_connection, connection_record, connection_proxy):
+    # نوشتن‌های commit نشده اتصال قبلی (rollback هنگام برگشت به pool) حساب نمی‌شوند
+    connection_record.info.pop(_PENDING, None)
+    connection_record.info.pop(_COMMITTED, None)
+
+def _track_write(conn, cursor, statement, parameters, context, executemany):
+    if context is None or not (context.isinsert or context.isupdate or context.isdelete):
+        return
+    table = getattr(getattr(context.compiled, "statement", None), "table", None)
+    name = getattr(table, "name", None)
+    if name:
+        conn.info.setdefault(_PENDING, set()).add(name)
+
+def _on_commit(conn):
+    pending = conn.info.pop(_PENDING, None)
+    if pending:
+        conn.info.setdefault(_COMMITTED, set()).update(pending)
+
+def _on_rollback(conn):
+    conn.info.pop(_PENDING, None)
+
+@event.listens_for(Pool, "checkin")
+def _bump_on_checkin(dbapi_connection, connection_record):
+    # اتصال بعد از commit به pool برمی‌گردد؛ از این لحظه خواننده‌ها داده جدید را می‌بینند
+    if connection_record is None:
+        return
+    committed = connection_record.info.pop(_COMMITTED, None)
+    if committed:
+        bump_tables(committed)
+
+for _engine in (engine, async_engine.sync_engine):
+    event.listen(_engine, "after_cursor_execute", _track_write)
+    event.listen(_engine, "commit", _on_commit)
+    event.listen(_engine, "rollback", _on_rollback)
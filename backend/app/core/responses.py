@@ -0,0 +1,32 @@
+# path: backend/app/core/responses.py
+# پاسخ JSON با orjson: پاسخ پیش‌فرض کل برنامه و مسیر سریع لیست‌ها.
+# endpointی که مدل‌های اعتبارسنجی‌شده را مستقیماً در ORJSONResponse برگرداند، از اعتبارسنجی دوباره
+# با response_model و jsonable_encoder عبور نمی‌کند؛ مدل‌ها یک بار به dict تبدیل و orjson آن‌ها را
+# (همراه با datetime) مستقیماً به بایت تبدیل می‌کند.
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+
+def _default(value: Any):
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+class ORJSONResponse(JSONResponse):
+    """
+    مثل JSONResponse (UTF-8 بدون escape و بدون فاصله) اما با orjson؛ مدل‌های pydantic و Decimal را هم می‌پذیرد
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
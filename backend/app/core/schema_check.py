@@ -0,0 +1,42 @@
+# path: backend/app/core/schema_check.py
+# بررسی ستون‌های دیتابیس هنگام شروع سرور. create_all جدول‌های جدید را می‌سازد اما به جدول موجود ستون
+# اضافه نمی‌کند (کار alembic است)؛ اگر ستونی از مدل‌ها در دیتابیس نباشد، هر کوئری روی آن جدول خطا می‌دهد.
+# به جای اجرای سرور با جداول ناقص، شروع با پیام روشن (اجرای alembic upgrade head) متوقف می‌شود.
+import logging
+from typing import Dict, List
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from app.core.database import Base
+
+logger = logging.getLogger(__name__)
+
+class SchemaOutOfDateError(RuntimeError):
+    pass
+
+def missing_columns(bind: Engine) -> Dict[str, List[str]]:
+    """
+    ستون‌های مدل‌ها که در جدول‌های موجود دیتابیس نیستند: {نام جدول: [ستون‌ها]}
+    """
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    missing = {}
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        columns = [column.name for column in table.columns if column.name not in existing]
+        if columns:
+            missing[table.name] = columns
+    return missing
+
+def check_schema(bind: Engine) -> None:
+    missing = missing_columns(bind)
+    if not missing:
+        return
+    details = "، ".join(f"{table}({', '.join(columns)})" for table, columns in missing.items())
+    logger.error(f"Database schema is out of date, missing columns: {missing}")
+    raise SchemaOutOfDateError(
+        f"ستون‌های دیتابیس به‌روز نیست: {details}. پیش از شروع سرور «alembic upgrade head» را در پوشه backend اجرا کنید."
+    )
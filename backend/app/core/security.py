@@ -30,14 +30,15 @@ def decode_token(token: str):
     except JWTError:
         return None
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+# وابستگی‌های احراز هویت I/O ندارند؛ async تعریف شده‌اند تا برای هر درخواست نخی از threadpool نگیرند
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     payload = decode_token(token)
     if not payload:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
     # payload contains: sub (username), role
     return payload  # {"sub": "...", "role": "admin"|"user"}
 
-def require_admin(current=Depends(get_current_user)):
+async def require_admin(current=Depends(get_current_user)):
     if current.get("role") != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     return current
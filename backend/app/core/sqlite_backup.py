@@ -0,0 +1,164 @@
+# path: backend/app/core/sqlite_backup.py
+# بک‌آپ کامل و سازگار از فایل SQLite با API آنلاین بک‌آپ:
+# کپی صفحه به صفحه (در هر گام چند صفحه) با مکث کوتاه بین گام‌ها تا نویسنده‌ها متوقف نشوند،
+# بررسی PRAGMA integrity_check روی نسخه کپی، فشرده‌سازی جریانی gzip و نگه‌داشتن چند نسخه آخر.
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PREFIX = "snapshot_"
+SNAPSHOT_SUFFIX = ".db.gz"
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def sqlite_path(database_url: Optional[str] = None) -> str:
+    """
+    مسیر فایل دیتابیس SQLite از روی DATABASE_URL
+    """
+    url = make_url(database_url or settings.DATABASE_URL)
+    if not url.drivername.startswith("sqlite") or not url.database or url.database == ":memory:":
+        raise SnapshotError("بک‌آپ آنلاین فقط برای دیتابیس فایل SQLite پشتیبانی می‌شود")
+    return url.database
+
+
+def integrity_check(path: str) -> List[str]:
+    """
+    اجرای PRAGMA integrity_check؛ لیست خالی یعنی فایل سالم است
+    """
+    conn = sqlite3.connect(path)
+    try:
+        rows = [row[0] for row in conn.execute("PRAGMA integrity_check").fetchall()]
+    finally:
+        conn.close()
+    return [] if rows == ["ok"] else rows
+
+
+def list_snapshots(directory: Optional[str] = None) -> List[Dict]:
+    directory = directory or settings.SNAPSHOT_DIR
+    if not os.path.isdir(directory):
+        return []
+    snapshots = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if name.startswith(SNAPSHOT_PREFIX) and name.endswith(SNAPSHOT_SUFFIX):
+            path = os.path.join(directory, name)
+            snapshots.append({
+                "filename": name,
+                "size": os.path.getsize(path),
+                "created_at": datetime.fromtimestamp(os.path.getmtime(path)),
+            })
+    return snapshots
+
+
+def rotate_snapshots(directory: str, keep: int) -> List[str]:
+    """
+    حذف نسخه‌های قدیمی؛ فقط keep نسخه آخر (بر اساس زمان در نام فایل) نگه داشته می‌شود
+    """
+    removed = []
+    for snapshot in list_snapshots(directory)[keep:]:
+        os.remove(os.path.join(directory, snapshot["filename"]))
+        removed.append(snapshot["filename"])
+    if removed:
+        logger.info(f"Rotated out {len(removed)} old snapshots")
+    return removed
+
+
+def create_snapshot(
+    directory: Optional[str] = None,
+    keep: Optional[int] = None,
+    pages_per_step: Optional[int] = None,
+    step_sleep: Optional[float] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict:
+    """
+    ساخت snapshot فشرده از دیتابیس فعلی
+
+    progress (اختیاری) بعد از هر گام با (صفحات باقی‌مانده، کل صفحات) صدا زده می‌شود.
+    """
+    directory = directory or settings.SNAPSHOT_DIR
+    keep = settings.SNAPSHOT_KEEP if keep is None else keep
+    pages_per_step = pages_per_step or settings.SNAPSHOT_PAGES_PER_STEP
+    step_sleep = settings.SNAPSHOT_STEP_SLEEP_MS / 1000 if step_sleep is None else step_sleep
+
+    source_path = sqlite_path()
+    if not os.path.exists(source_path):
+        raise SnapshotError(f"فایل دیتابیس یافت نشد: {source_path}")
+    os.makedirs(directory, exist_ok=True)
+
+    started = time.monotonic()
+    filename = f"{SNAPSHOT_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}{SNAPSHOT_SUFFIX}"
+    filepath = os.path.join(directory, filename)
+    fd, temp_path = tempfile.mkstemp(prefix=".snapshot_", suffix=".db", dir=directory)
+    os.close(fd)
+
+    def on_step(status, remaining, total):
+        if progress:
+            progress(remaining, total)
+        # قفل خواندن فقط در طول هر گام نگه داشته می‌شود؛ مکث کوتاه به نویسنده‌ها فرصت می‌دهد
+        if remaining and step_sleep:
+            time.sleep(step_sleep)
+
+    try:
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(temp_path)
+        try:
+            source.backup(target, pages=pages_per_step, progress=on_step)
+        finally:
+            target.close()
+            source.close()
+
+        problems = integrity_check(temp_path)
+        if problems:
+            raise SnapshotError(f"integrity_check ناموفق: {'; '.join(problems[:5])}")
+
+        raw_size = os.path.getsize(temp_path)
+        with open(temp_path, "rb") as src, gzip.open(filepath, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+    except Exception:
+        if os.path.exists(filepath):
+            os.remove(filepath)
+        raise
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    removed = rotate_snapshots(directory, keep)
+    result = {
+        "filename": filename,
+        "path": filepath,
+        "database_size": raw_size,
+        "size": os.path.getsize(filepath),
+        "seconds": round(time.monotonic() - started, 3),
+        "rotated": removed,
+    }
+    logger.info(f"SQLite snapshot {filename}: {raw_size} -> {result['size']} bytes in {result['seconds']}s")
+    return result
+
+
+def verify_snapshot(path: str) -> List[str]:
+    """
+    باز کردن snapshot فشرده در فایل موقت و اجرای integrity_check روی آن
+    """
+    fd, temp_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        with gzip.open(path, "rb") as src, open(temp_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+        return integrity_check(temp_path)
+    finally:
+        os.remove(temp_path)
@@ -0,0 +1,100 @@
+# path: backend/app/core/write_queue.py
+# صف نوشتن گروهی (group commit): SQLite فقط یک نویسنده دارد و هر commit یک fsync است؛
+# ثبت‌هایی که در یک بازه چند میلی‌ثانیه‌ای از درخواست‌های هم‌زمان می‌رسند در یک نخ نویسنده
+# و یک تراکنش اجرا و با یک commit نوشته می‌شوند. session با expire_on_commit=False باز می‌شود
+# تا هر درخواست ردیف خودش را (کلید و مقادیر پیش‌فرض از RETURNING هنگام flush) بدون refresh بگیرد.
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+WriteItem = Tuple[Callable[..., Any], tuple, Future]
+
+
+class WriteQueue:
+    """
+    هر کار تابعی به شکل fn(db, *args) است که تغییرات را بدون commit در session اعمال می‌کند
+    (مثل add_gold_ledger). اگر یکی از کارهای دسته خطا بدهد، دسته rollback می‌شود و کارها
+    یکی‌یکی دوباره اجرا می‌شوند تا خطا فقط به درخواست خودش برگردد.
+    """
+
+    def __init__(self, window_ms: int, max_batch: int, session_factory=SessionLocal):
+        self._queue: "queue.Queue[WriteItem]" = queue.Queue()
+        self._window = window_ms / 1000
+        self._max_batch = max_batch
+        self._session_factory = session_factory
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args) -> Future:
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((fn, args, future))
+        return future
+
+    def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None) -> Any:
+        """
+        ثبت کار و انتظار برای commit دسته؛ نتیجه یا خطای همان کار برگردانده می‌شود
+        """
+        return self.submit(fn, *args).result(timeout=timeout or settings.WRITE_TIMEOUT)
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="write-queue", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> List[WriteItem]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self._window
+        while len(batch) < self._max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._commit(batch)
+            except Exception as e:
+                # _commit نتیجه یا خطا را روی future می‌گذارد؛ این فقط برای خطای غیرمنتظره است
+                logger.error(f"Write queue batch failed: {str(e)}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _commit(self, batch: List[WriteItem]):
+        db = self._session_factory(expire_on_commit=False)
+        try:
+            results = [fn(db, *args) for fn, args, _ in batch]
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            db.close()
+            if len(batch) == 1:
+                batch[0][2].set_exception(e)
+                return
+            logger.warning(f"Write batch of {len(batch)} failed ({str(e)}); retrying one by one")
+            for item in batch:
+                self._commit([item])
+            return
+        db.close()
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+        logger.info(f"Write queue committed {len(batch)} writes")
+
+
+write_queue = WriteQueue(window_ms=settings.WRITE_BATCH_WINDOW_MS, max_batch=settings.WRITE_BATCH_MAX)
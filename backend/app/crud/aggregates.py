@@ -0,0 +1,147 @@
+# app/crud/aggregates.py
+
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.models.transaction import Transaction
+from app.models.gold_ledger import GoldLedger
+from app.models.money_ledger import MoneyLedger
+from app.models.capital import Capital
+from app.crud.period_close import capital_totals
+from typing import Dict, Optional
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+# جمع‌بندی‌های گزارش‌ها با GROUP BY در خود دیتابیس (یک رفت و برگشت برای هر بخش)
+# فیلتر تاریخ شامل هر دو سر بازه است: [start_date, end_date]
+
+def _to_decimal(value) -> Decimal:
+    return Decimal(str(value)) if value is not None else Decimal('0')
+
+def _date_range_filters(column, start_date: Optional[date], end_date: Optional[date], as_text: bool = False):
+    """
+    شرط‌های بازه تاریخ به شکل نیمه‌باز (>= شروع و < روز بعد از پایان) تا ایندکس تاریخ استفاده شود.
+    ستون تاریخ معاملات متنی (YYYY-MM-DDTHH:mm) است و با رشته ISO مقایسه می‌شود.
+    """
+    filters = []
+    if start_date is not None:
+        filters.append(column >= (start_date.isoformat() if as_text else datetime.combine(start_date, time.min)))
+    if end_date is not None:
+        next_day = end_date + timedelta(days=1)
+        filters.append(column < (next_day.isoformat() if as_text else datetime.combine(next_day, time.min)))
+    return filters
+
+def transaction_summary(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    customer_id: Optional[int] = None
+) -> Dict[str, Dict[str, float]]:
+    """
+    تعداد و مجموع طلا/دالر ورودی و خروجی معاملات به تفکیک نوع (buy / sell)
+
+    خروجی: {"buy": {...}, "sell": {...}, "all": {...}} که هر کدام شامل
+    count, gold_in, gold_out, dollar_in, dollar_out است.
+    """
+    query = db.query(
+        Transaction.type,
+        func.count(Transaction.txn_id),
+        func.coalesce(func.sum(Transaction.gold_in), 0),
+        func.coalesce(func.sum(Transaction.gold_out), 0),
+        func.coalesce(func.sum(Transaction.dollar_in), 0),
+        func.coalesce(func.sum(Transaction.dollar_out), 0)
+    )
+    if customer_id is not None:
+        query = query.filter(Transaction.customer_id == customer_id)
+    query = query.filter(*_date_range_filters(Transaction.date, start_date, end_date, as_text=True))
+
+    empty = lambda: {"count": 0, "gold_in": 0.0, "gold_out": 0.0, "dollar_in": 0.0, "dollar_out": 0.0}
+    summary = {"buy": empty(), "sell": empty(), "all": empty()}
+    for txn_type, count, gold_in, gold_out, dollar_in, dollar_out in query.group_by(Transaction.type):
+        # هر نوعی غیر از buy در گزارش‌ها «فروش» حساب می‌شود
+        bucket = summary["buy" if txn_type == "buy" else "sell"]
+        for target in (bucket, summary["all"]):
+            target["count"] += count
+            target["gold_in"] += float(gold_in)
+            target["gold_out"] += float(gold_out)
+            target["dollar_in"] += float(dollar_in)
+            target["dollar_out"] += float(dollar_out)
+    return summary
+
+def _ledger_summary(
+    db: Session,
+    model,
+    balance_column,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    customer_id: Optional[int]
+) -> Dict[str, Decimal]:
+    query = db.query(
+        func.count(),
+        func.coalesce(func.sum(model.received), 0),
+        func.coalesce(func.sum(model.paid), 0),
+        func.coalesce(func.sum(balance_column), 0)
+    )
+    # رکورد ابطال‌شده و رکورد معکوس آن (رسید و گرفت جابه‌جا) در جمع‌ها حساب نمی‌شوند؛
+    # در غیر این صورت دریافتی و پرداختی ناخالص هر دو دو بار زیاد می‌شوند (فقط خالص درست می‌ماند)
+    query = query.filter(model.voided_at.is_(None), model.reversal_of_id.is_(None))
+    if customer_id is not None:
+        query = query.filter(model.customer_id == customer_id)
+    query = query.filter(*_date_range_filters(model.transaction_date, start_date, end_date))
+    count, received, paid, balance = query.one()
+    return {
+        "count": count,
+        "received": _to_decimal(received),
+        "paid": _to_decimal(paid),
+        "balance": _to_decimal(balance),
+    }
+
+def gold_ledger_summary(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    customer_id: Optional[int] = None
+) -> Dict[str, Decimal]:
+    """
+    تعداد و مجموع دریافتی، پرداختی و ستون بیلانس روزنامچه طلا
+    """
+    return _ledger_summary(db, GoldLedger, GoldLedger.balance, start_date, end_date, customer_id)
+
+def money_ledger_summary(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    customer_id: Optional[int] = None
+) -> Dict[str, Decimal]:
+    """
+    تعداد و مجموع دریافتی، پرداختی و ستون بیلانس دالر روزنامچه پول
+    """
+    return _ledger_summary(db, MoneyLedger, MoneyLedger.usd_balance, start_date, end_date, customer_id)
+
+def capital_summary(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Dict[str, Decimal]:
+    """
+    تعداد و مجموع سرمایه دالر و طلا
+
+    بدون تاریخ شروع (جمع از ابتدا) از جمع‌های آخرین دوره بسته شروع می‌شود
+    و فقط رکوردهای بعد از آن جمع زده می‌شوند.
+    """
+    if start_date is None:
+        before = datetime.combine(end_date + timedelta(days=1), time.min) if end_date is not None else None
+        return capital_totals(db, before)
+
+    query = db.query(
+        func.count(Capital.id),
+        func.coalesce(func.sum(Capital.usd_capital), 0),
+        func.coalesce(func.sum(Capital.gold_capital), 0)
+    ).filter(Capital.date >= start_date)
+    if end_date is not None:
+        query = query.filter(Capital.date <= end_date)
+    count, usd_capital, gold_capital = query.one()
+    return {
+        "count": count,
+        "usd_capital": _to_decimal(usd_capital),
+        "gold_capital": _to_decimal(gold_capital),
+    }
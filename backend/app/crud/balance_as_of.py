@@ -0,0 +1,88 @@
+# app/crud/balance_as_of.py
+
+from sqlalchemy import Select, desc, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.customer import Customer
+from app.crud.gold_ledger import GOLD_LEDGER_BALANCE
+from app.crud.money_ledger import MONEY_LEDGER_BALANCE
+from app.crud.running_balance import RunningBalanceSpec
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+from decimal import Decimal
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _to_decimal(value) -> Decimal:
+    return Decimal(str(value)) if value is not None else Decimal('0')
+
+def parse_as_of(value: str) -> datetime:
+    """
+    تبدیل تاریخ مبنا؛ تاریخ بدون ساعت (YYYY-MM-DD) یعنی تا پایان همان روز
+
+    خروجی مرز انحصاری است: رکوردهایی با transaction_date کوچکتر از آن حساب می‌شوند.
+    """
+    try:
+        if len(value) == 10:
+            return datetime.strptime(value, '%Y-%m-%d') + timedelta(days=1)
+        return datetime.fromisoformat(value) + timedelta(microseconds=1)
+    except ValueError:
+        raise ValueError(f"فرمت تاریخ نامعتبر است: {value} (YYYY-MM-DD یا ISO)")
+
+def last_balance_query(spec: RunningBalanceSpec, customer_id, before, column_name: Optional[str] = None) -> Select:
+    """
+    بیلانس لحظه‌ای ذخیره‌شده آخرین رکورد مشتری قبل از مرز (ستون اول بیلانس spec اگر داده نشود)
+
+    با ایندکس (customer_id, transaction_date, id) این یک جستجوی ایندکسی و خواندن یک ردیف است،
+    نه جمع کل تاریخچه. رکوردهای ابطال‌شده و معکوس هم در بیلانس لحظه‌ای آمده‌اند، پس نتیجه
+    همان موقعیتی است که در آن تاریخ ثبت شده بود.
+    """
+    model = spec.model
+    balance_column = getattr(model, column_name or spec.balances[0][0])
+    date_column = getattr(model, spec.date_column)
+    return select(balance_column).where(
+        model.customer_id == customer_id,
+        date_column < before
+    ).order_by(desc(date_column), desc(getattr(model, spec.id_column))).limit(1)
+
+def customer_balance_as_of_query(customer_id: int, before: datetime) -> Select:
+    return select(
+        last_balance_query(GOLD_LEDGER_BALANCE, customer_id, before).scalar_subquery(),
+        last_balance_query(MONEY_LEDGER_BALANCE, customer_id, before).scalar_subquery()
+    )
+
+def balances_as_of_query(before: datetime, skip: int = 0, limit: int = 100) -> Select:
+    """
+    بیلانس همه مشتریان در تاریخ مبنا؛ برای هر مشتری یک زیرکوئری وابسته (یک جستجوی ایندکسی)
+    اجرا می‌شود. مشتریانی که تا آن تاریخ رکوردی ندارند حذف می‌شوند.
+    """
+    gold = last_balance_query(GOLD_LEDGER_BALANCE, Customer.customer_id, before) \
+        .correlate(Customer).scalar_subquery()
+    usd = last_balance_query(MONEY_LEDGER_BALANCE, Customer.customer_id, before) \
+        .correlate(Customer).scalar_subquery()
+    return select(
+        Customer.customer_id, Customer.full_name, gold.label("gold_balance"), usd.label("usd_balance")
+    ).where(or_(gold.is_not(None), usd.is_not(None))) \
+        .order_by(Customer.customer_id).offset(skip).limit(limit)
+
+async def get_customer_balance_as_of_async(db: AsyncSession, customer_id: int, before: datetime) -> Dict[str, Decimal]:
+    gold, usd = (await db.execute(customer_balance_as_of_query(customer_id, before))).one()
+    return {"gold_balance": _to_decimal(gold), "usd_balance": _to_decimal(usd)}
+
+async def get_balances_as_of_async(
+    db: AsyncSession,
+    before: datetime,
+    skip: int = 0,
+    limit: int = 100
+) -> List[Dict[str, Any]]:
+    rows = (await db.execute(balances_as_of_query(before, skip, limit))).all()
+    logger.info(f"Retrieved as-of balances for {len(rows)} customers")
+    return [
+        {
+            "customer_id": customer_id,
+            "full_name": full_name,
+            "gold_balance": _to_decimal(gold),
+            "usd_balance": _to_decimal(usd),
+        }
+        for customer_id, full_name, gold, usd in rows
+    ]
@@ -1,3 +1,5 @@
+from sqlalchemy import Select, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.customer import Customer
 from app.schemas.customer import CustomerCreate, CustomerUpdate
@@ -12,6 +14,18 @@ def create_customer(db: Session, customer: CustomerCreate):
 
 def get_customer(db: Session, customer_id: int) -> Optional[Customer]:
     return db.query(Customer).filter(Customer.customer_id == customer_id).first()
+
+async def get_customer_async(db: AsyncSession, customer_id: int) -> Optional[Customer]:
+    return await db.get(Customer, customer_id)
+
+def customers_by_name_query(search: Optional[str] = None) -> Select:
+    query = select(Customer)
+    if search:
+        query = query.where(Customer.full_name.ilike(f"%{search}%"))
+    return query
+
+async def get_customers_by_name_async(db: AsyncSession, search: Optional[str] = None) -> List[Customer]:
+    return (await db.execute(customers_by_name_query(search))).scalars().all()
 # table with search
 #def get_all_customers(db: Session) -> List[Customer]:
 #    return db.query(Customer).all()
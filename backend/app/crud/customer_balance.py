@@ -0,0 +1,195 @@
+# app/crud/customer_balance.py
+
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.customer_balance import CustomerBalance
+from app.models.gold_ledger import GoldLedger
+from app.models.money_ledger import MoneyLedger
+from app.crud.period_close import ledger_balance, ledger_balance_from_row, ledger_balance_query
+from typing import Callable, Dict, List, Optional, TypeVar
+from decimal import Decimal
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# تعداد تلاش و مکث پایه برای ثبتی که با ثبت هم‌زمان دیگری تضاد دارد
+POSTING_RETRIES = 5
+POSTING_RETRY_DELAY = 0.02
+
+def _to_decimal(value) -> Decimal:
+    return Decimal(str(value)) if value is not None else Decimal('0')
+
+def _ledger_total(db: Session, model, customer_id: int) -> Decimal:
+    """
+    جمع (رسید - گرفت) رکوردهای یک مشتری برای مقداردهی اولیه؛
+    از بیلانس آخرین دوره بسته شروع می‌شود و فقط رکوردهای دوره باز جمع زده می‌شوند
+    """
+    return ledger_balance(db, model, customer_id)
+
+def _ledger_totals(db: Session, model) -> Dict[int, Decimal]:
+    """
+    جمع (رسید - گرفت) به تفکیک مشتری در یک کوئری GROUP BY
+    """
+    rows = db.query(
+        model.customer_id,
+        func.coalesce(func.sum(model.received), 0),
+        func.coalesce(func.sum(model.paid), 0)
+    ).group_by(model.customer_id).all()
+    return {customer_id: _to_decimal(received) - _to_decimal(paid) for customer_id, received, paid in rows}
+
+def get_customer_balance(db: Session, customer_id: int) -> Optional[CustomerBalance]:
+    return db.query(CustomerBalance).filter(CustomerBalance.customer_id == customer_id).first()
+
+def get_or_create_customer_balance(db: Session, customer_id: int) -> CustomerBalance:
+    """
+    دریافت ردیف بیلانس مشتری برای به‌روزرسانی؛ اگر وجود نداشته باشد یک بار از روی تاریخچه ساخته می‌شود
+    """
+    snapshot = db.query(CustomerBalance).filter(
+        CustomerBalance.customer_id == customer_id
+    ).with_for_update().first()
+    if snapshot is None:
+        snapshot = CustomerBalance(
+            customer_id=customer_id,
+            gold_balance=_ledger_total(db, GoldLedger, customer_id),
+            usd_balance=_ledger_total(db, MoneyLedger, customer_id)
+        )
+        db.add(snapshot)
+        db.flush()
+        logger.info(f"Customer balance snapshot seeded for customer {customer_id}")
+    return snapshot
+
+def _apply_delta(db: Session, customer_id: int, column_name: str, delta: Decimal) -> Decimal:
+    """
+    UPDATE اتمی بیلانس با RETURNING؛ ردیف مشتری در جدول بیلانس قفل ترتیب ثبت‌های همان مشتری است:
+    ثبت دوم تا commit ثبت اول منتظر می‌ماند و بیلانس جدید را روی بیلانس به‌روز شده می‌سازد
+    (در PostgreSQL قفل سطری است و ثبت برای مشتریان مختلف موازی انجام می‌شود).
+    """
+    column = getattr(CustomerBalance, column_name)
+    stmt = update(CustomerBalance).where(
+        CustomerBalance.customer_id == customer_id
+    ).values({column_name: func.round(column + delta, column.type.scale)}).returning(column)
+    new_balance = db.execute(stmt).scalar()
+    if new_balance is None:
+        # اولین ثبت مشتری: ردیف از روی تاریخچه ساخته و دوباره به‌روز می‌شود
+        get_or_create_customer_balance(db, customer_id)
+        new_balance = db.execute(stmt).scalar()
+    return _to_decimal(new_balance)
+
+def apply_gold_delta(db: Session, customer_id: int, delta: Decimal) -> Decimal:
+    """
+    اعمال تغییر بیلانس طلا روی جدول بیلانس مشتری (بدون commit) و برگرداندن بیلانس جدید
+    """
+    return _apply_delta(db, customer_id, "gold_balance", delta)
+
+def apply_usd_delta(db: Session, customer_id: int, delta: Decimal) -> Decimal:
+    """
+    اعمال تغییر بیلانس دالر روی جدول بیلانس مشتری (بدون commit) و برگرداندن بیلانس جدید
+    """
+    return _apply_delta(db, customer_id, "usd_balance", delta)
+
+def _is_retryable(error: Exception) -> bool:
+    # قفل/busy در SQLite، deadlock یا تضاد سریال‌سازی در PostgreSQL، و ساخت هم‌زمان ردیف بیلانس یک مشتری
+    if isinstance(error, OperationalError):
+        return True
+    return isinstance(error, IntegrityError) and "customer_balances" in str(error.orig)
+
+def commit_posting(db: Session, post: Callable[[], T]) -> T:
+    """
+    اجرای یک ثبت (بدون commit) و commit آن؛ در صورت تضاد با ثبت هم‌زمان دیگر،
+    تراکنش rollback و تا POSTING_RETRIES بار با کمی مکث دوباره اجرا می‌شود
+    """
+    for attempt in range(1, POSTING_RETRIES + 1):
+        try:
+            result = post()
+            db.commit()
+            return result
+        except (OperationalError, IntegrityError) as e:
+            db.rollback()
+            if attempt == POSTING_RETRIES or not _is_retryable(e):
+                raise
+            logger.warning(f"Posting conflict (attempt {attempt}): {str(e).splitlines()[0]}")
+            time.sleep(POSTING_RETRY_DELAY * attempt * (1 + random.random()))
+
+async def _balance_async(db: AsyncSession, model, column: str, customer_id: int) -> Decimal:
+    snapshot = await db.get(CustomerBalance, customer_id)
+    if snapshot is not None:
+        return _to_decimal(getattr(snapshot, column))
+    # بدون ردیف بیلانس، مثل مسیر همگام از بیلانس آخرین دوره بسته و رکوردهای دوره باز
+    result = (await db.execute(ledger_balance_query(model, customer_id))).one()
+    return ledger_balance_from_row(result)
+
+async def get_gold_balance_async(db: AsyncSession, customer_id: int) -> Decimal:
+    return await _balance_async(db, GoldLedger, "gold_balance", customer_id)
+
+async def get_usd_balance_async(db: AsyncSession, customer_id: int) -> Decimal:
+    return await _balance_async(db, MoneyLedger, "usd_balance", customer_id)
+
+def get_gold_balance(db: Session, customer_id: int) -> Decimal:
+    snapshot = get_customer_balance(db, customer_id)
+    if snapshot is None:
+        return _ledger_total(db, GoldLedger, customer_id)
+    return _to_decimal(snapshot.gold_balance)
+
+def get_usd_balance(db: Session, customer_id: int) -> Decimal:
+    snapshot = get_customer_balance(db, customer_id)
+    if snapshot is None:
+        return _ledger_total(db, MoneyLedger, customer_id)
+    return _to_decimal(snapshot.usd_balance)
+
+def check_customer_balances(db: Session) -> List[dict]:
+    """
+    مقایسه جدول بیلانس با جمع واقعی روزنامچه‌ها و برگرداندن لیست مغایرت‌ها
+    """
+    gold_totals = _ledger_totals(db, GoldLedger)
+    usd_totals = _ledger_totals(db, MoneyLedger)
+    snapshots = {row.customer_id: row for row in db.query(CustomerBalance).all()}
+
+    mismatches = []
+    for customer_id in sorted(set(gold_totals) | set(usd_totals) | set(snapshots)):
+        snapshot = snapshots.get(customer_id)
+        expected_gold = gold_totals.get(customer_id, Decimal('0'))
+        expected_usd = usd_totals.get(customer_id, Decimal('0'))
+        stored_gold = _to_decimal(snapshot.gold_balance) if snapshot else None
+        stored_usd = _to_decimal(snapshot.usd_balance) if snapshot else None
+        if snapshot is None or stored_gold != expected_gold or stored_usd != expected_usd:
+            mismatches.append({
+                "customer_id": customer_id,
+                "stored_gold_balance": stored_gold,
+                "expected_gold_balance": expected_gold,
+                "stored_usd_balance": stored_usd,
+                "expected_usd_balance": expected_usd,
+            })
+    return mismatches
+
+def rebuild_customer_balances(db: Session) -> int:
+    """
+    بازسازی کامل جدول بیلانس مشتریان از روی روزنامچه‌ها
+    """
+    try:
+        gold_totals = _ledger_totals(db, GoldLedger)
+        usd_totals = _ledger_totals(db, MoneyLedger)
+
+        db.query(CustomerBalance).delete(synchronize_session=False)
+        customer_ids = sorted(set(gold_totals) | set(usd_totals))
+        db.add_all([
+            CustomerBalance(
+                customer_id=customer_id,
+                gold_balance=gold_totals.get(customer_id, Decimal('0')),
+                usd_balance=usd_totals.get(customer_id, Decimal('0'))
+            )
+            for customer_id in customer_ids
+        ])
+        db.commit()
+        logger.info(f"Rebuilt customer balances for {len(customer_ids)} customers")
+        return len(customer_ids)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error rebuilding customer balances: {str(e)}")
+        raise
@@ -0,0 +1,261 @@
+# app/crud/daily_rollup.py
+
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from sqlalchemy import Select, String, cast, desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.daily_rollup import rollup_day
+from app.models.customer import Customer
+from app.models.daily_rollup import DailyCustomerRollup, DailyExpenseRollup, DailyRollup
+from app.models.gold_ledger import GoldLedger
+from app.models.money_ledger import MoneyLedger
+from app.models.shop_expense import ShopExpense
+from app.models.transaction import Transaction
+from typing import Any, Dict, List, Optional, Tuple
+from collections import defaultdict
+from datetime import date
+import logging
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_MODELS = (DailyRollup, DailyCustomerRollup, DailyExpenseRollup)
+# جداول اصلی که جمع‌های روزانه از آن‌ها ساخته می‌شوند
+SOURCE_MODELS = (Transaction, GoldLedger, MoneyLedger, ShopExpense)
+# اختلاف مجاز ستون‌های اعشاری (جمع float به ترتیب‌های مختلف)
+DRIFT_TOLERANCE = 1e-6
+DASHBOARD_TOP_CUSTOMERS = 10
+
+def _key_columns(model) -> List[str]:
+    return [column.name for column in model.__table__.primary_key.columns]
+
+def _value_columns(model) -> List[str]:
+    keys = set(_key_columns(model))
+    return [column.name for column in model.__table__.columns if column.name not in keys]
+
+def _day_expr(column):
+    # ستون‌های DateTime در SQLite متن هستند و تاریخ معاملات رشته ISO است؛ ده نویسه اول روز است
+    return func.substr(cast(column, String), 1, 10)
+
+def _sum(column):
+    return func.coalesce(func.sum(column), 0)
+
+def expected_rollups(db: Session) -> Dict[Any, Dict[Tuple, Dict[str, float]]]:
+    """
+    محاسبه جمع‌های روزانه مستقیماً از جداول اصلی (برای بازسازی و بررسی مغایرت) با GROUP BY روی هر جدول
+    """
+    totals = {model: defaultdict(lambda: defaultdict(float)) for model in ROLLUP_MODELS}
+
+    def add(model, key, values):
+        for column, value in values.items():
+            totals[model][key][column] += float(value or 0)
+
+    day = _day_expr(Transaction.date)
+    query = db.query(
+        day, Transaction.customer_id, Transaction.type, func.count(),
+        _sum(Transaction.gold_in), _sum(Transaction.gold_out), _sum(Transaction.dollar_in), _sum(Transaction.dollar_out)
+    ).group_by(day, Transaction.customer_id, Transaction.type)
+    for day_value, customer_id, txn_type, count, gold_in, gold_out, dollar_in, dollar_out in query:
+        d = rollup_day(day_value)
+        if d is None:
+            continue
+        values = {
+            "buy_count" if txn_type == "buy" else "sell_count": count,
+            "gold_in": gold_in, "gold_out": gold_out, "dollar_in": dollar_in, "dollar_out": dollar_out,
+        }
+        add(DailyRollup, (d,), values)
+        add(DailyCustomerRollup, (d, customer_id), values)
+
+    for model, prefix in ((GoldLedger, "ledger_gold"), (MoneyLedger, "ledger_usd")):
+        day = _day_expr(model.transaction_date)
+        query = db.query(day, model.customer_id, _sum(model.received), _sum(model.paid)) \
+            .filter(model.voided_at.is_(None), model.reversal_of_id.is_(None)) \
+            .group_by(day, model.customer_id)
+        for day_value, customer_id, received, paid in query:
+            d = rollup_day(day_value)
+            if d is None:
+                continue
+            values = {f"{prefix}_received": received, f"{prefix}_paid": paid}
+            add(DailyRollup, (d,), values)
+            add(DailyCustomerRollup, (d, customer_id), values)
+
+    day = _day_expr(ShopExpense.expense_date)
+    query = db.query(day, ShopExpense.expense_type, func.count(), _sum(ShopExpense.amount)) \
+        .group_by(day, ShopExpense.expense_type)
+    for day_value, expense_type, count, amount in query:
+        d = rollup_day(day_value)
+        if d is None:
+            continue
+        values = {"expense_count": count, "expense_amount": amount}
+        add(DailyRollup, (d,), values)
+        add(DailyExpenseRollup, (d, expense_type), values)
+    return totals
+
+def _stored_rollups(db: Session, model) -> Dict[Tuple, Dict[str, float]]:
+    keys = _key_columns(model)
+    values = _value_columns(model)
+    stored = {}
+    for row in db.execute(select(model.__table__)).mappings():
+        stored[tuple(row[k] for k in keys)] = {column: float(row[column] or 0) for column in values}
+    return stored
+
+def check_daily_rollups(db: Session) -> List[dict]:
+    """
+    مقایسه جداول جمع روزانه با جمع واقعی جداول اصلی و برگرداندن لیست مغایرت‌ها
+    """
+    expected = expected_rollups(db)
+    mismatches = []
+    for model in ROLLUP_MODELS:
+        stored = _stored_rollups(db, model)
+        for key in sorted(set(stored) | set(expected[model]), key=str):
+            stored_values = stored.get(key, {})
+            expected_values = expected[model].get(key, {})
+            for column in _value_columns(model):
+                have = stored_values.get(column, 0.0)
+                want = expected_values.get(column, 0.0)
+                if abs(have - want) > DRIFT_TOLERANCE * max(1.0, abs(want)):
+                    mismatches.append({
+                        "table": model.__tablename__,
+                        "key": dict(zip(_key_columns(model), key)),
+                        "column": column,
+                        "stored": have,
+                        "expected": want,
+                    })
+    return mismatches
+
+def rebuild_daily_rollups(db: Session) -> Dict[str, int]:
+    """
+    بازسازی کامل جداول جمع روزانه از روی جداول اصلی
+    """
+    try:
+        expected = expected_rollups(db)
+        counts = {}
+        for model in ROLLUP_MODELS:
+            db.query(model).delete(synchronize_session=False)
+            keys = _key_columns(model)
+            columns = _value_columns(model)
+            rows = [
+                {**dict(zip(keys, key)), **{column: values.get(column, 0) for column in columns}}
+                for key, values in expected[model].items()
+                if any(values.values())
+            ]
+            if rows:
+                db.execute(model.__table__.insert(), rows)
+            counts[model.__tablename__] = len(rows)
+        db.commit()
+        logger.info(f"Rebuilt daily rollups: {counts}")
+        return counts
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error rebuilding daily rollups: {str(e)}")
+        raise
+
+def ensure_daily_rollups(db: Session) -> Optional[Dict[str, int]]:
+    """
+    پر کردن اولیه جمع‌های روزانه هنگام شروع سرور: اگر جداول جمع روزانه خالی‌اند ولی جداول اصلی ردیف دارند
+    (دیتابیس قدیمی که create_all فقط جداول خالی را برایش ساخته) یک بار بازسازی کامل انجام می‌شود.
+    خطا شروع سرور را متوقف نمی‌کند (بازسازی دستی: tools/daily_rollups.py rebuild)
+    """
+    try:
+        if any(db.query(model).first() is not None for model in ROLLUP_MODELS):
+            return None
+        if not any(db.query(model).first() is not None for model in SOURCE_MODELS):
+            return None
+        logger.info("Daily rollup tables are empty; backfilling from base tables")
+        return rebuild_daily_rollups(db)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error backfilling daily rollups: {str(e)}")
+        return None
+
+def _range_filters(model, start: Optional[date], end: Optional[date]):
+    filters = []
+    if start is not None:
+        filters.append(model.day >= start)
+    if end is not None:
+        filters.append(model.day <= end)
+    return filters
+
+def dashboard_totals_query(start: Optional[date], end: Optional[date], customer_id: Optional[int] = None) -> Select:
+    """
+    جمع ستون‌های جمع روزانه در بازه [start, end]؛ با customer_id از جدول به تفکیک مشتری
+    """
+    model = DailyRollup if customer_id is None else DailyCustomerRollup
+    query = select(*[_sum(getattr(model, c)).label(c) for c in _value_columns(model)]) \
+        .where(*_range_filters(model, start, end))
+    if customer_id is not None:
+        query = query.where(DailyCustomerRollup.customer_id == customer_id)
+    return query
+
+def dashboard_expenses_query(start: Optional[date], end: Optional[date]) -> Select:
+    return select(
+        DailyExpenseRollup.expense_type,
+        _sum(DailyExpenseRollup.expense_count).label("count"),
+        _sum(DailyExpenseRollup.expense_amount).label("amount")
+    ).where(*_range_filters(DailyExpenseRollup, start, end)) \
+        .group_by(DailyExpenseRollup.expense_type) \
+        .order_by(desc("amount"))
+
+def dashboard_top_customers_query(start: Optional[date], end: Optional[date], limit: int = DASHBOARD_TOP_CUSTOMERS) -> Select:
+    volume = _sum(DailyCustomerRollup.gold_in + DailyCustomerRollup.gold_out)
+    return select(
+        DailyCustomerRollup.customer_id,
+        Customer.full_name,
+        _sum(DailyCustomerRollup.buy_count + DailyCustomerRollup.sell_count).label("transactions"),
+        volume.label("gold_volume"),
+        _sum(DailyCustomerRollup.dollar_in + DailyCustomerRollup.dollar_out).label("dollar_volume")
+    ).join(Customer, Customer.customer_id == DailyCustomerRollup.customer_id) \
+        .where(*_range_filters(DailyCustomerRollup, start, end)) \
+        .group_by(DailyCustomerRollup.customer_id, Customer.full_name) \
+        .order_by(desc(volume)).limit(limit)
+
+async def get_dashboard_summary_async(
+    db: AsyncSession,
+    start: Optional[date],
+    end: Optional[date],
+    customer_id: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    شاخص‌های داشبورد برای یک بازه؛ فقط ردیف‌های جمع روزانه (یک ردیف برای هر روز) جمع زده می‌شوند
+    """
+    row = (await db.execute(dashboard_totals_query(start, end, customer_id))).mappings().one()
+    totals = {key: float(value) for key, value in row.items()}
+    summary = {
+        "transactions": {
+            "buy_count": int(totals["buy_count"]),
+            "sell_count": int(totals["sell_count"]),
+            "gold_in": totals["gold_in"],
+            "gold_out": totals["gold_out"],
+            "dollar_in": totals["dollar_in"],
+            "dollar_out": totals["dollar_out"],
+            "net_gold": totals["gold_in"] - totals["gold_out"],
+            "net_dollar": totals["dollar_in"] - totals["dollar_out"],
+        },
+        "ledgers": {
+            "gold_received": totals["ledger_gold_received"],
+            "gold_paid": totals["ledger_gold_paid"],
+            "usd_received": totals["ledger_usd_received"],
+            "usd_paid": totals["ledger_usd_paid"],
+            "net_gold": totals["ledger_gold_received"] - totals["ledger_gold_paid"],
+            "net_usd": totals["ledger_usd_received"] - totals["ledger_usd_paid"],
+        },
+    }
+    if customer_id is not None:
+        return summary
+
+    expenses = (await db.execute(dashboard_expenses_query(start, end))).all()
+    top_customers = (await db.execute(dashboard_top_customers_query(start, end))).mappings().all()
+    summary["expenses"] = {
+        "count": int(totals["expense_count"]),
+        "amount": totals["expense_amount"],
+        "by_type": [
+            {"expense_type": expense_type, "count": int(count), "amount": float(amount)}
+            for expense_type, count, amount in expenses
+        ],
+    }
+    summary["net_dollar_after_expenses"] = summary["transactions"]["net_dollar"] - totals["expense_amount"]
+    summary["top_customers"] = [
+        {**row, "transactions": int(row["transactions"]), "gold_volume": float(row["gold_volume"]),
+         "dollar_volume": float(row["dollar_volume"])}
+        for row in top_customers
+    ]
+    return summary
@@ -1,59 +1,83 @@
 # app/crud/gold_ledger.py
 
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_
+from sqlalchemy import Select, desc, and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.gold_ledger import GoldLedger
+from app.crud.customer_balance import apply_gold_delta, commit_posting, get_or_create_customer_balance, get_gold_balance, get_gold_balance_async
+from app.core.pagination import seek_before
+from app.crud.ledger_batch import delete_ledger_batch, post_ledger_batch, void_ledger_batch
+from app.crud.period_close import ledger_balance
+from app.crud.running_balance import RunningBalanceSpec, has_rows_after, rebalance_from
 from app.schemas.gold_ledger import GoldLedgerCreate, GoldLedgerUpdate
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, date
 from decimal import Decimal
+import app.core.daily_rollup  # noqa: F401  جمع‌های روزانه در همان تراکنش ثبت به‌روز می‌شوند
 import logging
 
 logger = logging.getLogger(__name__)
 
+# ترتیب زمانی و ستون‌های بیلانس لحظه‌ای روزنامچه
+GOLD_LEDGER_BALANCE = RunningBalanceSpec(
+    model=GoldLedger,
+    id_column="gold_ledger_id",
+    date_column="transaction_date",
+    balances=(("balance", "received", "paid"),)
+)
+
 def calculate_balance(db: Session, customer_id: int) -> Decimal:
     """
-    محاسبه بیلانس فعلی برای یک مشتری
+    محاسبه بیلانس فعلی برای یک مشتری از روی تاریخچه (برای بررسی و بازسازی)؛
+    از بیلانس آخرین دوره بسته شروع می‌شود و فقط رکوردهای دوره باز جمع زده می‌شوند
     """
     try:
-        # جمع تمام رسیدها و گرفت‌های مشتری
-        result = db.query(
-            db.func.coalesce(db.func.sum(GoldLedger.received), 0),
-            db.func.coalesce(db.func.sum(GoldLedger.paid), 0)
-        ).filter(
-            GoldLedger.customer_id == customer_id
-        ).first()
-        
-        total_received = result[0] or Decimal('0')
-        total_paid = result[1] or Decimal('0')
-        balance = total_received - total_paid
-        
-        logger.info(f"Balance calculated for customer {customer_id}: received={total_received}, paid={total_paid}, balance={balance}")
+        balance = ledger_balance(db, GoldLedger, customer_id)
+        logger.info(f"Balance calculated for customer {customer_id}: balance={balance}")
         return balance
     except Exception as e:
         logger.error(f"Error calculating balance for customer {customer_id}: {str(e)}")
         return Decimal('0')
 
+def build_gold_ledger(ledger: GoldLedgerCreate, balance: Decimal, txn_id: Optional[int] = None) -> GoldLedger:
+    return GoldLedger(
+        customer_id=ledger.customer_id,
+        capital_id=ledger.capital_id,
+        description=ledger.description,
+        received=Decimal(str(ledger.received)),
+        paid=Decimal(str(ledger.paid)),
+        heel_purity_carat=Decimal(str(ledger.heel_purity_carat)) if ledger.heel_purity_carat else None,
+        balance=balance,
+        transaction_date=ledger.transaction_date or datetime.now(),
+        txn_id=txn_id
+    )
+
+def add_gold_ledger(db: Session, ledger: GoldLedgerCreate, txn_id: Optional[int] = None) -> GoldLedger:
+    """
+    ثبت رکورد و به‌روزرسانی بیلانس‌ها در تراکنش جاری بدون commit (برای ثبت گروهی در صف نوشتن)؛
+    txn_id معامله‌ای است که رکورد از آن ثبت شده (post_ledgers)
+    """
+    # محاسبه بیلانس جدید از روی جدول بیلانس مشتری (بدون اسکن تاریخچه)
+    new_balance = apply_gold_delta(
+        db, ledger.customer_id, Decimal(str(ledger.received)) - Decimal(str(ledger.paid))
+    )
+    
+    # ایجاد رکورد جدید
+    db_ledger = build_gold_ledger(ledger, new_balance, txn_id)
+    
+    db.add(db_ledger)
+    db.flush()
+
+    # ثبت با تاریخ گذشته: بیلانس این رکورد و رکوردهای بعدی از بیلانس رکورد قبلی محاسبه شود
+    if has_rows_after(db, GOLD_LEDGER_BALANCE, db_ledger.customer_id, db_ledger.transaction_date, db_ledger.gold_ledger_id):
+        rebalance_from(db, GOLD_LEDGER_BALANCE, db_ledger.customer_id, db_ledger.transaction_date, db_ledger.gold_ledger_id)
+        # UPDATE گروهی شیء داخل session را به‌روز نمی‌کند
+        db.refresh(db_ledger, ["balance"])
+    return db_ledger
+
 def create_gold_ledger(db: Session, ledger: GoldLedgerCreate) -> GoldLedger:
     try:
-        # محاسبه بیلانس جدید
-        current_balance = calculate_balance(db, ledger.customer_id)
-        new_balance = current_balance + Decimal(str(ledger.received)) - Decimal(str(ledger.paid))
-        
-        # ایجاد رکورد جدید
-        db_ledger = GoldLedger(
-            customer_id=ledger.customer_id,
-            capital_id=ledger.capital_id,
-            description=ledger.description,
-            received=Decimal(str(ledger.received)),
-            paid=Decimal(str(ledger.paid)),
-            heel_purity_carat=Decimal(str(ledger.heel_purity_carat)) if ledger.heel_purity_carat else None,
-            balance=new_balance,
-            transaction_date=ledger.transaction_date or datetime.now()
-        )
-        
-        db.add(db_ledger)
-        db.commit()
+        db_ledger = commit_posting(db, lambda: add_gold_ledger(db, ledger))
         db.refresh(db_ledger)
         
         logger.info(f"Gold ledger created successfully: ID={db_ledger.gold_ledger_id}, Customer={db_ledger.customer_id}, Balance={db_ledger.balance}")
@@ -64,68 +88,183 @@ def create_gold_ledger(db: Session, ledger: GoldLedgerCreate) -> GoldLedger:
         logger.error(f"Error creating gold ledger: {str(e)}")
         raise
 
+def post_gold_ledger_batch(db: Session, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    ثبت گروهی رکوردهای روزنامچه طلا (برای چند مشتری) در یک تراکنش با نتیجه جداگانه هر ردیف
+    """
+    return post_ledger_batch(db, GOLD_LEDGER_BALANCE, GoldLedgerCreate, entries, build_gold_ledger, apply_gold_delta)
+
+def delete_gold_ledger_batch(db: Session, ids: List[int]) -> List[Dict[str, Any]]:
+    return delete_ledger_batch(db, GOLD_LEDGER_BALANCE, ids, apply_gold_delta)
+
+def build_gold_ledger_reversal(original: GoldLedger, balance: Decimal, transaction_date: datetime) -> GoldLedger:
+    """
+    رکورد معکوس (رسید و گرفت جابه‌جا) برای ابطال رکورد اصلی
+    """
+    description = f"ابطال رکورد #{original.gold_ledger_id}"
+    if original.description:
+        description = f"{description}: {original.description}"
+    return GoldLedger(
+        customer_id=original.customer_id,
+        capital_id=original.capital_id,
+        description=description,
+        received=original.paid,
+        paid=original.received,
+        heel_purity_carat=original.heel_purity_carat,
+        balance=balance,
+        transaction_date=transaction_date,
+        reversal_of_id=original.gold_ledger_id,
+        txn_id=original.txn_id
+    )
+
+def void_gold_ledger_batch(db: Session, ids: List[int]) -> List[Dict[str, Any]]:
+    return void_ledger_batch(db, GOLD_LEDGER_BALANCE, ids, build_gold_ledger_reversal, apply_gold_delta)
+
+def void_gold_ledger(db: Session, gold_ledger_id: int) -> Dict[str, Any]:
+    """
+    ابطال یک رکورد روزنامچه طلا با رکورد معکوس (بدون بازنویسی بیلانس رکوردهای گذشته)
+    """
+    return void_gold_ledger_batch(db, [gold_ledger_id])[0]
+
 def get_gold_ledger(db: Session, gold_ledger_id: int) -> GoldLedger | None:
     return db.query(GoldLedger).filter(GoldLedger.gold_ledger_id == gold_ledger_id).first()
 
+def gold_ledgers_query(
+    customer_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[Any, int]] = None,
+    include_voided: bool = False
+) -> Select:
+    """
+    کوئری لیست روزنامچه؛ مشترک بین نسخه sync و async
+    """
+    query = select(GoldLedger)
+
+    # رکوردهای ابطال‌شده و رکوردهای معکوس آن‌ها فقط در صورت درخواست نمایش داده می‌شوند
+    if not include_voided:
+        query = query.where(GoldLedger.voided_at.is_(None), GoldLedger.reversal_of_id.is_(None))
+    
+    # فیلتر بر اساس مشتری
+    if customer_id:
+        query = query.where(GoldLedger.customer_id == customer_id)
+    
+    # فیلتر بر اساس تاریخ
+    if start_date and end_date:
+        try:
+            start_dt = datetime.strptime(start_date, '%Y-%m-%d')
+            end_dt = datetime.strptime(end_date, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+            query = query.where(
+                GoldLedger.transaction_date.between(start_dt, end_dt)
+            )
+        except ValueError as e:
+            logger.warning(f"Invalid date format: {start_date} or {end_date}. Error: {str(e)}")
+    
+    # مرتب‌سازی و صفحه‌بندی (با cursor، بدون offset از ادامه ایندکس خوانده می‌شود)
+    query = query.order_by(desc(GoldLedger.transaction_date), desc(GoldLedger.gold_ledger_id))
+    if after is not None:
+        query = query.where(seek_before(GoldLedger.transaction_date, GoldLedger.gold_ledger_id, after))
+    else:
+        query = query.offset(skip)
+    return query.limit(limit)
+
 def get_gold_ledgers(
     db: Session,
     customer_id: Optional[int] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    after: Optional[Tuple[Any, int]] = None,
+    include_voided: bool = False
 ) -> List[GoldLedger]:
     try:
-        query = db.query(GoldLedger)
-        
-        # فیلتر بر اساس مشتری
-        if customer_id:
-            query = query.filter(GoldLedger.customer_id == customer_id)
-        
-        # فیلتر بر اساس تاریخ
-        if start_date and end_date:
-            try:
-                start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-                end_dt = datetime.strptime(end_date, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
-                query = query.filter(
-                    GoldLedger.transaction_date.between(start_dt, end_dt)
-                )
-            except ValueError as e:
-                logger.warning(f"Invalid date format: {start_date} or {end_date}. Error: {str(e)}")
-        
-        # مرتب‌سازی و صفحه‌بندی
-        result = query.order_by(desc(GoldLedger.transaction_date)).offset(skip).limit(limit).all()
+        result = db.execute(gold_ledgers_query(customer_id, start_date, end_date, skip, limit, after, include_voided)).scalars().all()
         logger.info(f"Retrieved {len(result)} gold ledger records")
         return result
         
     except Exception as e:
+        # خطا (مثلاً ستون نبودن در دیتابیس به‌روزنشده) نباید به شکل روزنامچه خالی دیده شود
         logger.error(f"Error retrieving gold ledgers: {str(e)}")
-        return []
+        raise
 
-def update_gold_ledger(db: Session, gold_ledger_id: int, ledger_update: GoldLedgerUpdate) -> GoldLedger | None:
+async def get_gold_ledgers_async(
+    db: AsyncSession,
+    customer_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[Any, int]] = None,
+    include_voided: bool = False
+) -> List[GoldLedger]:
     try:
-        db_ledger = get_gold_ledger(db, gold_ledger_id)
-        if not db_ledger:
-            return None
+        result = (await db.execute(gold_ledgers_query(customer_id, start_date, end_date, skip, limit, after, include_voided))).scalars().all()
+        logger.info(f"Retrieved {len(result)} gold ledger records")
+        return result
+
+    except Exception as e:
+        # خطا (مثلاً ستون نبودن در دیتابیس به‌روزنشده) نباید به شکل روزنامچه خالی دیده شود
+        logger.error(f"Error retrieving gold ledgers: {str(e)}")
+        raise
+
+async def get_gold_ledger_async(db: AsyncSession, gold_ledger_id: int, include_voided: bool = False) -> Optional[GoldLedger]:
+    ledger = await db.get(GoldLedger, gold_ledger_id)
+    # مثل لیست: رکورد ابطال‌شده و رکورد معکوس فقط در صورت درخواست برگردانده می‌شوند
+    if ledger is not None and not include_voided and (ledger.voided_at is not None or ledger.reversal_of_id is not None):
+        return None
+    return ledger
+
+def edit_gold_ledger(db: Session, gold_ledger_id: int, ledger_update: GoldLedgerUpdate) -> Optional[GoldLedger]:
+    """
+    ویرایش رکورد و بیلانس‌ها بدون commit (برای commit_posting)؛ مقادیر قدیمی هر بار دوباره خوانده می‌شوند
+    """
+    db_ledger = get_gold_ledger(db, gold_ledger_id)
+    if not db_ledger:
+        return None
+    if db_ledger.voided_at is not None or db_ledger.reversal_of_id is not None:
+        raise ValueError("رکورد ابطال‌شده یا معکوس قابل ویرایش نیست")
+
+    # ذخیره مقادیر قدیمی برای محاسبه مجدد بیلانس
+    old_net = db_ledger.received - db_ledger.paid
+    old_customer_id = db_ledger.customer_id
+    old_date = db_ledger.transaction_date
 
-        # ذخیره مقادیر قدیمی برای محاسبه مجدد بیلانس
-        old_received = db_ledger.received
-        old_paid = db_ledger.paid
-        old_customer_id = db_ledger.customer_id
+    # به‌روزرسانی فیلدها
+    update_data = ledger_update.model_dump(exclude_unset=True)
 
-        # به‌روزرسانی فیلدها
-        update_data = ledger_update.model_dump(exclude_unset=True)
-        for key, value in update_data.items():
-            if value is not None:
-                setattr(db_ledger, key, value)
+    # ردیف بیلانس مشتری(ها) قبل از تغییر رکورد آماده شود تا مقداردهی اولیه از تاریخچه درست باشد
+    get_or_create_customer_balance(db, old_customer_id)
+    if update_data.get('customer_id') and update_data['customer_id'] != old_customer_id:
+        get_or_create_customer_balance(db, update_data['customer_id'])
 
-        # اگر received یا paid تغییر کرده، بیلانس را مجدداً محاسبه کن
-        if 'received' in update_data or 'paid' in update_data:
-            customer_id = update_data.get('customer_id', old_customer_id)
-            new_balance = calculate_balance(db, customer_id)
-            db_ledger.balance = new_balance
+    for key, value in update_data.items():
+        if value is not None:
+            setattr(db_ledger, key, value)
 
-        db.commit()
+    # اگر received یا paid یا مشتری تغییر کرده، جدول بیلانس را با اختلاف به‌روز کن
+    amounts_changed = 'received' in update_data or 'paid' in update_data or db_ledger.customer_id != old_customer_id
+    if amounts_changed:
+        new_net = Decimal(str(db_ledger.received)) - Decimal(str(db_ledger.paid))
+        apply_gold_delta(db, old_customer_id, -old_net)
+        apply_gold_delta(db, db_ledger.customer_id, new_net)
+
+    # فقط رکوردهای بعد از نقطه تغییر (در ترتیب زمانی) محاسبه مجدد می‌شوند
+    if amounts_changed or db_ledger.transaction_date != old_date:
+        if db_ledger.customer_id != old_customer_id:
+            rebalance_from(db, GOLD_LEDGER_BALANCE, old_customer_id, old_date, db_ledger.gold_ledger_id)
+            rebalance_from(db, GOLD_LEDGER_BALANCE, db_ledger.customer_id, db_ledger.transaction_date, db_ledger.gold_ledger_id)
+        else:
+            rebalance_from(db, GOLD_LEDGER_BALANCE, db_ledger.customer_id, min(old_date, db_ledger.transaction_date), db_ledger.gold_ledger_id)
+    return db_ledger
+
+def update_gold_ledger(db: Session, gold_ledger_id: int, ledger_update: GoldLedgerUpdate) -> GoldLedger | None:
+    try:
+        db_ledger = commit_posting(db, lambda: edit_gold_ledger(db, gold_ledger_id, ledger_update))
+        if not db_ledger:
+            return None
         db.refresh(db_ledger)
         
         logger.info(f"Gold ledger updated successfully: ID={db_ledger.gold_ledger_id}")
@@ -136,52 +275,47 @@ def update_gold_ledger(db: Session, gold_ledger_id: int, ledger_update: GoldLedg
         logger.error(f"Error updating gold ledger {gold_ledger_id}: {str(e)}")
         raise
 
+def remove_gold_ledger(db: Session, gold_ledger_id: int) -> bool:
+    """
+    حذف رکورد و اصلاح بیلانس‌ها بدون commit (برای commit_posting)
+    """
+    db_ledger = get_gold_ledger(db, gold_ledger_id)
+    if not db_ledger:
+        return False
+    # حذف جداگانه رکورد ابطال‌شده یا معکوس، جفت ابطال را نیمه‌کاره و بیلانس مشتری را تغییر می‌دهد
+    if db_ledger.voided_at is not None or db_ledger.reversal_of_id is not None:
+        raise ValueError("رکورد ابطال‌شده یا معکوس قابل حذف نیست")
+
+    customer_id = db_ledger.customer_id
+    transaction_date = db_ledger.transaction_date
+    apply_gold_delta(db, customer_id, -(db_ledger.received - db_ledger.paid))
+    db.delete(db_ledger)
+
+    # پس از حذف، فقط بیلانس رکوردهای بعد از رکورد حذف‌شده به‌روز شود
+    rebalance_from(db, GOLD_LEDGER_BALANCE, customer_id, transaction_date, gold_ledger_id)
+    return True
+
 def delete_gold_ledger(db: Session, gold_ledger_id: int) -> bool:
     try:
-        db_ledger = get_gold_ledger(db, gold_ledger_id)
-        if not db_ledger:
+        if not commit_posting(db, lambda: remove_gold_ledger(db, gold_ledger_id)):
             return False
 
-        customer_id = db_ledger.customer_id
-        db.delete(db_ledger)
-        db.commit()
-        
-        # پس از حذف، بیلانس سایر رکوردهای مشتری را به‌روز کن
-        _recalculate_customer_balance(db, customer_id)
-        
         logger.info(f"Gold ledger deleted successfully: ID={gold_ledger_id}")
         return True
-        
+
+    except ValueError:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         logger.error(f"Error deleting gold ledger {gold_ledger_id}: {str(e)}")
         return False
 
-def _recalculate_customer_balance(db: Session, customer_id: int):
-    """
-    محاسبه مجدد بیلانس برای تمام رکوردهای یک مشتری
-    """
-    try:
-        ledgers = db.query(GoldLedger).filter(
-            GoldLedger.customer_id == customer_id
-        ).order_by(GoldLedger.transaction_date, GoldLedger.gold_ledger_id).all()
-        
-        running_balance = Decimal('0')
-        for ledger in ledgers:
-            running_balance += ledger.received - ledger.paid
-            if ledger.balance != running_balance:
-                ledger.balance = running_balance
-        
-        db.commit()
-        logger.info(f"Recalculated balances for customer {customer_id}")
-        
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error recalculating balances for customer {customer_id}: {str(e)}")
-        raise
-
 def get_customer_gold_balance(db: Session, customer_id: int) -> Decimal:
     """
     دریافت بیلانس طلای فعلی یک مشتری
     """
-    return calculate_balance(db, customer_id)
\ No newline at end of file
+    return get_gold_balance(db, customer_id)
+
+async def get_customer_gold_balance_async(db: AsyncSession, customer_id: int) -> Decimal:
+    return await get_gold_balance_async(db, customer_id)
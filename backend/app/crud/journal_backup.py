@@ -0,0 +1,195 @@
+# app/crud/journal_backup.py
+
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from sqlalchemy import select
+from app.core.database import Base
+from app.core.journal import JOURNALED_TABLES, JOURNAL_DELETE, JOURNAL_INSERT, JOURNAL_UPDATE, dumps
+from app.models.change_journal import BackupRun, ChangeJournal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from datetime import date, datetime
+from decimal import Decimal
+import gzip
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# قالب فایل: JSON Lines فشرده؛ خط اول سرآیند و هر خط بعدی یک تغییر {"table", "op", "data"}
+BACKUP_FORMAT = "gold-journal-backup"
+BACKUP_FORMAT_VERSION = 1
+BACKUP_KIND_FULL = "full"
+BACKUP_KIND_INCREMENTAL = "incremental"
+FETCH_SIZE = 1000
+
+class JournalBackupError(Exception):
+    pass
+
+def last_watermark(db: Session) -> Optional[int]:
+    """
+    آخرین شناسه دفتر تغییرات که در یک بک‌آپ آمده است (None یعنی هنوز بک‌آپ کاملی گرفته نشده)
+    """
+    last = db.query(BackupRun).order_by(BackupRun.id.desc()).first()
+    return last.to_journal_id if last else None
+
+def _full_records(db: Session) -> Iterator[Dict[str, Any]]:
+    for table_name in JOURNALED_TABLES:
+        table = Base.metadata.tables[table_name]
+        pk = list(table.primary_key.columns)[0]
+        result = db.execute(select(table).order_by(pk).execution_options(yield_per=FETCH_SIZE))
+        for row in result.mappings():
+            yield {"table": table_name, "op": JOURNAL_INSERT, "data": dict(row)}
+
+def _journal_records(db: Session, from_id: int, to_id: int) -> Iterator[Dict[str, Any]]:
+    query = db.query(
+        ChangeJournal.table_name, ChangeJournal.row_id, ChangeJournal.operation, ChangeJournal.data
+    ).filter(ChangeJournal.id > from_id, ChangeJournal.id <= to_id) \
+        .order_by(ChangeJournal.id).yield_per(FETCH_SIZE)
+    for table_name, row_id, operation, data in query:
+        yield {
+            "table": table_name,
+            "op": operation,
+            "id": row_id,
+            "data": json.loads(data) if data else None,
+        }
+
+def create_journal_backup(db: Session, kind: str, directory: str) -> Tuple[str, BackupRun]:
+    """
+    بک‌آپ کامل (تمام ردیف‌های جداول دفترشده) یا افزایشی (فقط تغییرات بعد از آخرین watermark)
+
+    watermark و داده‌ها در یک تراکنش خوانده می‌شوند تا بک‌آپ کامل با شماره دفتر ثبت‌شده سازگار باشد.
+    """
+    if kind not in (BACKUP_KIND_FULL, BACKUP_KIND_INCREMENTAL):
+        raise JournalBackupError(f"نوع بک‌آپ نامعتبر است: {kind}")
+
+    to_id = db.query(func.coalesce(func.max(ChangeJournal.id), 0)).scalar()
+    if kind == BACKUP_KIND_FULL:
+        from_id = 0
+        records = _full_records(db)
+    else:
+        from_id = last_watermark(db)
+        if from_id is None:
+            raise JournalBackupError("هنوز بک‌آپ کاملی گرفته نشده است؛ ابتدا بک‌آپ کامل بگیرید")
+        records = _journal_records(db, from_id, to_id)
+
+    os.makedirs(directory, exist_ok=True)
+    filename = f"{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.jsonl.gz"
+    filepath = os.path.join(directory, filename)
+    header = {
+        "format": BACKUP_FORMAT,
+        "version": BACKUP_FORMAT_VERSION,
+        "kind": kind,
+        "from_journal_id": from_id,
+        "to_journal_id": to_id,
+        "created_at": datetime.utcnow(),
+    }
+    count = 0
+    try:
+        with gzip.open(filepath, "wt", encoding="utf-8") as f:
+            f.write(dumps(header) + "\n")
+            for record in records:
+                f.write(dumps(record) + "\n")
+                count += 1
+
+        run = BackupRun(kind=kind, from_journal_id=from_id, to_journal_id=to_id, filename=filename)
+        db.add(run)
+        db.commit()
+        db.refresh(run)
+    except Exception as e:
+        db.rollback()
+        if os.path.exists(filepath):
+            os.remove(filepath)
+        logger.error(f"Error creating {kind} journal backup: {str(e)}")
+        raise
+    logger.info(f"Journal backup {filename}: {count} records, journal {from_id}..{to_id}")
+    return filepath, run
+
+def read_backup_header(path: str) -> Dict[str, Any]:
+    """
+    خواندن سرآیند یک فایل بک‌آپ دفتر تغییرات
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            header = None
+    if not isinstance(header, dict) or header.get("format") != BACKUP_FORMAT:
+        raise JournalBackupError(f"{path}: فایل بک‌آپ دفتر تغییرات نیست")
+    return header
+
+def iter_backup_records(path: str) -> Iterator[Dict[str, Any]]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        f.readline()  # سرآیند
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def _coerce(table, data: Dict[str, Any]) -> Dict[str, Any]:
+    # مقادیر JSON به نوع پایتونی ستون برگردانده می‌شوند (SQLite برای DateTime شیء datetime می‌خواهد)
+    values = {}
+    for name, value in data.items():
+        if name not in table.c:
+            continue
+        column = table.c[name]
+        python_type = None
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            pass
+        if value is not None and isinstance(value, str):
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is date:
+                value = date.fromisoformat(value)
+            elif python_type is Decimal:
+                value = Decimal(value)
+        values[name] = value
+    return values
+
+def _apply(connection, record: Dict[str, Any]):
+    table = Base.metadata.tables[record["table"]]
+    pk = list(table.primary_key.columns)[0]
+    data = _coerce(table, record.get("data") or {})
+    row_id = record.get("id", data.get(pk.name))
+    op = record["op"]
+    if op == JOURNAL_INSERT:
+        # درج دوباره همان ردیف (مثلاً ردیفی که هم در پایه و هم در دفتر آمده) جایگزین می‌شود
+        connection.execute(table.delete().where(pk == row_id))
+        connection.execute(table.insert().values(**data))
+    elif op == JOURNAL_UPDATE:
+        data.pop(pk.name, None)
+        if data:
+            connection.execute(table.update().where(pk == row_id).values(**data))
+    elif op == JOURNAL_DELETE:
+        connection.execute(table.delete().where(pk == row_id))
+    else:
+        raise JournalBackupError(f"عملیات نامعتبر در فایل بک‌آپ: {op}")
+
+def restore_journal_backups(engine, paths: List[str]) -> int:
+    """
+    بازیابی یک بک‌آپ کامل و بک‌آپ‌های افزایشی بعد از آن (به ترتیب) روی دیتابیس خالی engine
+
+    زنجیره فایل‌ها بررسی می‌شود: اولین فایل باید کامل باشد و from هر فایل افزایشی برابر to فایل قبلی.
+    """
+    headers = [read_backup_header(path) for path in paths]
+    if not headers or headers[0]["kind"] != BACKUP_KIND_FULL:
+        raise JournalBackupError("اولین فایل باید بک‌آپ کامل باشد")
+    for previous, (path, header) in zip(headers, zip(paths[1:], headers[1:])):
+        if header["kind"] != BACKUP_KIND_INCREMENTAL:
+            raise JournalBackupError(f"{path}: بعد از بک‌آپ کامل فقط بک‌آپ افزایشی مجاز است")
+        if header["from_journal_id"] != previous["to_journal_id"]:
+            raise JournalBackupError(
+                f"{path}: زنجیره بک‌آپ گسسته است (از {header['from_journal_id']}، "
+                f"انتظار {previous['to_journal_id']})"
+            )
+
+    Base.metadata.create_all(bind=engine)
+    applied = 0
+    with engine.begin() as connection:
+        for path in paths:
+            for record in iter_backup_records(path):
+                _apply(connection, record)
+                applied += 1
+    logger.info(f"Restored {applied} records from {len(paths)} backup files")
+    return applied
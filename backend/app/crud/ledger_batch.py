@@ -0,0 +1,252 @@
+# app/crud/ledger_batch.py
+# ثبت و حذف گروهی روزنامچه (طلا یا دالر) در یک تراکنش:
+# برای هر مشتری فقط یک به‌روزرسانی جدول بیلانس و یک محاسبه مجدد بیلانس لحظه‌ای انجام می‌شود.
+
+from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from app.models.capital import Capital
+from app.models.customer import Customer
+from app.crud.customer_balance import commit_posting
+from app.crud.running_balance import RunningBalanceSpec, has_rows_after, rebalance_from
+from typing import Any, Callable, Dict, List, Tuple
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+import logging
+
+logger = logging.getLogger(__name__)
+
+NOT_FOUND_ERROR = "رکورد یافت نشد"
+
+def _validation_message(error: ValidationError) -> str:
+    parts = []
+    for item in error.errors():
+        field = ".".join(str(loc) for loc in item["loc"])
+        parts.append(f"{field}: {item['msg']}" if field else item["msg"])
+    return "؛ ".join(parts)
+
+def _existing_ids(db: Session, column, ids) -> set:
+    if not ids:
+        return set()
+    return {row[0] for row in db.query(column).filter(column.in_(ids)).all()}
+
+def validate_entries(db: Session, schema, entries: List[Dict[str, Any]]) -> Tuple[List[Tuple[int, Any]], Dict[int, str]]:
+    """
+    اعتبارسنجی همه ردیف‌ها با هم: هر ردیف با schema و وجود مشتری‌ها و سرمایه‌ها با یک کوئری IN
+    خروجی: (لیست (اندیس، ردیف معتبر)، خطای هر اندیس)
+    """
+    parsed, errors = [], {}
+    for index, entry in enumerate(entries):
+        try:
+            parsed.append((index, schema.model_validate(entry)))
+        except ValidationError as e:
+            errors[index] = _validation_message(e)
+
+    customers = _existing_ids(db, Customer.customer_id, {item.customer_id for _, item in parsed})
+    capitals = _existing_ids(db, Capital.id, {item.capital_id for _, item in parsed if item.capital_id})
+    valid = []
+    for index, item in parsed:
+        if item.customer_id not in customers:
+            errors[index] = f"مشتری با شناسه {item.customer_id} یافت نشد"
+        elif item.capital_id and item.capital_id not in capitals:
+            errors[index] = f"سرمایه با شناسه {item.capital_id} یافت نشد"
+        else:
+            valid.append((index, item))
+    return valid, errors
+
+def post_ledger_batch(
+    db: Session,
+    spec: RunningBalanceSpec,
+    schema,
+    entries: List[Dict[str, Any]],
+    build: Callable[[Any, Decimal], Any],
+    apply_delta: Callable[[Session, int, Decimal], Decimal],
+) -> List[Dict[str, Any]]:
+    """
+    ثبت گروهی ردیف‌های معتبر و برگرداندن نتیجه هر ردیف به ترتیب ورودی
+    ({"index", "ok", "record" | "error"})؛ ردیف‌های نامعتبر ثبت نمی‌شوند و بقیه ثبت می‌شوند.
+    """
+    model = spec.model
+    id_col = getattr(model, spec.id_column)
+    valid, errors = validate_entries(db, schema, entries)
+
+    def post() -> Dict[int, int]:
+        by_customer = defaultdict(list)
+        for index, item in valid:
+            by_customer[item.customer_id].append((index, item))
+
+        # ابتدا بیلانس هر مشتری (یک UPDATE اتمی با جمع تغییرات) تا ردیف مشتری قفل و
+        # مقدار اولیه (در صورت نبود ردیف بیلانس) بدون ردیف‌های جدید از تاریخچه ساخته شود
+        for customer_id, items in by_customer.items():
+            delta = sum((Decimal(str(item.received)) - Decimal(str(item.paid)) for _, item in items), Decimal('0'))
+            apply_delta(db, customer_id, delta)
+
+        created = {}
+        for customer_id, items in by_customer.items():
+            rows = [(index, build(item, Decimal('0'))) for index, item in items]
+            db.add_all([row for _, row in rows])
+            db.flush()
+            created.update({index: getattr(row, spec.id_column) for index, row in rows})
+            # بیلانس لحظه‌ای از قدیمی‌ترین ردیف جدید به بعد، یک بار برای هر مشتری
+            first = min(rows, key=lambda r: (getattr(r[1], spec.date_column), getattr(r[1], spec.id_column)))[1]
+            rebalance_from(db, spec, customer_id, getattr(first, spec.date_column), getattr(first, spec.id_column))
+        return created
+
+    created = commit_posting(db, post) if valid else {}
+
+    # رکوردهای ثبت‌شده (با بیلانس نهایی) با یک کوئری خوانده می‌شوند
+    records = {}
+    if created:
+        records = {getattr(r, spec.id_column): r for r in db.query(model).filter(id_col.in_(created.values())).all()}
+    logger.info(f"Batch posted {len(created)} {model.__tablename__} rows, {len(errors)} rejected")
+
+    results = []
+    for index in range(len(entries)):
+        if index in created:
+            results.append({"index": index, "ok": True, "record": records[created[index]]})
+        else:
+            results.append({"index": index, "ok": False, "error": errors[index]})
+    return results
+
+def _duplicate_positions(ids: List[int]) -> Tuple[Dict[int, str], set]:
+    errors, seen = {}, set()
+    for position, row_id in enumerate(ids):
+        if row_id in seen:
+            errors[position] = "شناسه تکراری است"
+        seen.add(row_id)
+    return errors, seen
+
+def delete_ledger_rows(
+    db: Session,
+    spec: RunningBalanceSpec,
+    rows: List[Any],
+    apply_delta: Callable[[Session, int, Decimal], Decimal],
+) -> Tuple[set, Dict[int, str]]:
+    """
+    حذف رکوردهای خوانده‌شده بدون commit؛ برای هر مشتری یک به‌روزرسانی بیلانس و یک محاسبه مجدد
+    از قدیمی‌ترین رکورد حذف‌شده. رکوردهای ابطال‌شده و معکوس (نیمه‌های جفت ابطال) حذف نمی‌شوند.
+    خروجی: (شناسه رکوردهای حذف‌شده، علت رد شدن شناسه‌های دیگر)
+    """
+    by_customer = defaultdict(list)
+    deleted, problems = set(), {}
+    for row in rows:
+        row_id = getattr(row, spec.id_column)
+        if row.voided_at is not None:
+            problems[row_id] = "رکورد ابطال‌شده قابل حذف نیست"
+            continue
+        if row.reversal_of_id is not None:
+            problems[row_id] = "رکورد معکوس قابل حذف نیست"
+            continue
+        by_customer[row.customer_id].append(row)
+        deleted.add(row_id)
+    for customer_id, items in by_customer.items():
+        delta = sum((Decimal(str(r.received)) - Decimal(str(r.paid)) for r in items), Decimal('0'))
+        apply_delta(db, customer_id, -delta)
+        first = min(items, key=lambda r: (getattr(r, spec.date_column), getattr(r, spec.id_column)))
+        from_key = (getattr(first, spec.date_column), getattr(first, spec.id_column))
+        for row in items:
+            db.delete(row)
+        rebalance_from(db, spec, customer_id, *from_key)
+    return deleted, problems
+
+def delete_ledger_batch(
+    db: Session,
+    spec: RunningBalanceSpec,
+    ids: List[int],
+    apply_delta: Callable[[Session, int, Decimal], Decimal],
+) -> List[Dict[str, Any]]:
+    """
+    حذف گروهی رکوردها؛ برای هر مشتری یک به‌روزرسانی بیلانس و یک محاسبه مجدد از قدیمی‌ترین رکورد حذف‌شده
+    """
+    model = spec.model
+    id_col = getattr(model, spec.id_column)
+    errors, seen = _duplicate_positions(ids)
+
+    def delete() -> Tuple[set, Dict[int, str]]:
+        rows = db.query(model).filter(id_col.in_(seen)).all()
+        return delete_ledger_rows(db, spec, rows, apply_delta)
+
+    deleted, problems = commit_posting(db, delete)
+    logger.info(f"Batch deleted {len(deleted)} {model.__tablename__} rows")
+
+    results = []
+    for position, row_id in enumerate(ids):
+        if position in errors:
+            results.append({"id": row_id, "ok": False, "error": errors[position]})
+        elif row_id in deleted:
+            results.append({"id": row_id, "ok": True})
+        else:
+            results.append({"id": row_id, "ok": False, "error": problems.get(row_id, NOT_FOUND_ERROR)})
+    return results
+
+def void_ledger_rows(
+    db: Session,
+    spec: RunningBalanceSpec,
+    rows: List[Any],
+    build_reversal: Callable[[Any, Decimal, datetime], Any],
+    apply_delta: Callable[[Session, int, Decimal], Decimal],
+) -> Tuple[Dict[int, Any], Dict[int, str]]:
+    """
+    ابطال رکوردهای خوانده‌شده با رکورد معکوس بدون commit.
+    خروجی: (رکورد معکوس هر شناسه ابطال‌شده، علت رد شدن شناسه‌های دیگر)
+    """
+    now = datetime.now()
+    reversals, problems = {}, {}
+    first_reversal = {}
+    for row in rows:
+        row_id = getattr(row, spec.id_column)
+        if row.voided_at is not None:
+            problems[row_id] = "رکورد قبلاً ابطال شده است"
+            continue
+        if row.reversal_of_id is not None:
+            problems[row_id] = "رکورد معکوس قابل ابطال نیست"
+            continue
+        net = Decimal(str(row.received)) - Decimal(str(row.paid))
+        reversal = build_reversal(row, apply_delta(db, row.customer_id, -net), now)
+        row.voided_at = now
+        db.add(reversal)
+        reversals[row_id] = reversal
+        first_reversal.setdefault(row.customer_id, reversal)
+    db.flush()
+
+    for customer_id, reversal in first_reversal.items():
+        reversal_date = getattr(reversal, spec.date_column)
+        reversal_id = getattr(reversal, spec.id_column)
+        if has_rows_after(db, spec, customer_id, reversal_date, reversal_id):
+            rebalance_from(db, spec, customer_id, reversal_date, reversal_id)
+    return reversals, problems
+
+def void_ledger_batch(
+    db: Session,
+    spec: RunningBalanceSpec,
+    ids: List[int],
+    build_reversal: Callable[[Any, Decimal, datetime], Any],
+    apply_delta: Callable[[Session, int, Decimal], Decimal],
+) -> List[Dict[str, Any]]:
+    """
+    ابطال رکوردها با رکورد معکوس: برای هر رکورد یک رکورد با رسید و گرفت جابه‌جا (به تاریخ اکنون) در انتهای
+    تاریخچه اضافه و رکورد اصلی علامت voided_at می‌خورد. بیلانس‌های گذشته بازنویسی نمی‌شوند؛
+    فقط اگر رکوردی با تاریخ بعد از اکنون وجود داشته باشد، بیلانس از رکورد معکوس به بعد محاسبه می‌شود.
+    نتیجه هر شناسه: {"id", "ok", "reversal_id" | "error"}
+    """
+    model = spec.model
+    id_col = getattr(model, spec.id_column)
+    errors, seen = _duplicate_positions(ids)
+
+    def void() -> Tuple[Dict[int, int], Dict[int, str]]:
+        rows = db.query(model).filter(id_col.in_(seen)).order_by(id_col).all()
+        reversals, problems = void_ledger_rows(db, spec, rows, build_reversal, apply_delta)
+        return {row_id: getattr(r, spec.id_column) for row_id, r in reversals.items()}, problems
+
+    voided, problems = commit_posting(db, void)
+    logger.info(f"Voided {len(voided)} {model.__tablename__} rows with reversal entries")
+
+    results = []
+    for position, row_id in enumerate(ids):
+        if position in errors:
+            results.append({"id": row_id, "ok": False, "error": errors[position]})
+        elif row_id in voided:
+            results.append({"id": row_id, "ok": True, "reversal_id": voided[row_id]})
+        else:
+            results.append({"id": row_id, "ok": False, "error": problems.get(row_id, NOT_FOUND_ERROR)})
+    return results
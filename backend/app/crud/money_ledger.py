@@ -1,34 +1,38 @@
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import func
-from sqlalchemy import desc, and_
+from sqlalchemy import Select, desc, and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.money_ledger import MoneyLedger
 from app.models.capital import Capital
+from app.crud.customer_balance import apply_usd_delta, commit_posting, get_or_create_customer_balance, get_usd_balance, get_usd_balance_async
+from app.core.pagination import seek_before
+from app.crud.ledger_batch import delete_ledger_batch, post_ledger_batch, void_ledger_batch
+from app.crud.period_close import ledger_balance
+from app.crud.running_balance import RunningBalanceSpec, has_rows_after, rebalance_from
 from app.schemas.money_ledger import MoneyLedgerCreate, MoneyLedgerUpdate
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 from decimal import Decimal
+import app.core.daily_rollup  # noqa: F401  جمع‌های روزانه در همان تراکنش ثبت به‌روز می‌شوند
 import logging
 
 logger = logging.getLogger(__name__)
 
+# ترتیب زمانی و ستون‌های بیلانس لحظه‌ای روزنامچه
+MONEY_LEDGER_BALANCE = RunningBalanceSpec(
+    model=MoneyLedger,
+    id_column="money_ledger_id",
+    date_column="transaction_date",
+    balances=(("usd_balance", "received", "paid"),)
+)
+
 def calculate_balance(db: Session, customer_id: int) -> Decimal:
     """
-    محاسبه بیلانس فعلی برای یک مشتری
+    محاسبه بیلانس فعلی برای یک مشتری از روی تاریخچه (برای بررسی و بازسازی)؛
+    از بیلانس آخرین دوره بسته شروع می‌شود و فقط رکوردهای دوره باز جمع زده می‌شوند
     """
     try:
-        # جمع تمام رسیدها و گرفت‌های مشتری
-        result = db.query(
-            func.coalesce(func.sum(MoneyLedger.received), 0),
-            func.coalesce(func.sum(MoneyLedger.paid), 0)
-        ).filter(
-            MoneyLedger.customer_id == customer_id
-        ).first()
-        
-        total_received = result[0] or Decimal('0')
-        total_paid = result[1] or Decimal('0')
-        balance = total_received - total_paid
-        
-        logger.info(f"Balance calculated for customer {customer_id}: received={total_received}, paid={total_paid}, balance={balance}")
+        balance = ledger_balance(db, MoneyLedger, customer_id)
+        logger.info(f"Balance calculated for customer {customer_id}: balance={balance}")
         return balance
     except Exception as e:
         logger.error(f"Error calculating balance for customer {customer_id}: {str(e)}")
@@ -37,60 +41,132 @@ def calculate_balance(db: Session, customer_id: int) -> Decimal:
 def get_money_ledger(db: Session, money_ledger_id: int) -> Optional[MoneyLedger]:
     return db.query(MoneyLedger).filter(MoneyLedger.money_ledger_id == money_ledger_id).first()
 
+def money_ledgers_query(
+    customer_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[Any, int]] = None,
+    include_voided: bool = False
+) -> Select:
+    """
+    کوئری لیست روزنامچه؛ مشترک بین نسخه sync و async
+    """
+    query = select(MoneyLedger)
+
+    # رکوردهای ابطال‌شده و رکوردهای معکوس آن‌ها فقط در صورت درخواست نمایش داده می‌شوند
+    if not include_voided:
+        query = query.where(MoneyLedger.voided_at.is_(None), MoneyLedger.reversal_of_id.is_(None))
+    
+    # فیلتر بر اساس مشتری
+    if customer_id:
+        query = query.where(MoneyLedger.customer_id == customer_id)
+    
+    # فیلتر بر اساس تاریخ
+    if start_date and end_date:
+        try:
+            start_dt = datetime.strptime(start_date, '%Y-%m-%d')
+            end_dt = datetime.strptime(end_date, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+            query = query.where(
+                MoneyLedger.transaction_date.between(start_dt, end_dt)
+            )
+        except ValueError as e:
+            logger.warning(f"Invalid date format: {start_date} or {end_date}. Error: {str(e)}")
+    
+    # مرتب‌سازی و صفحه‌بندی (با cursor، بدون offset از ادامه ایندکس خوانده می‌شود)
+    query = query.order_by(desc(MoneyLedger.transaction_date), desc(MoneyLedger.money_ledger_id))
+    if after is not None:
+        query = query.where(seek_before(MoneyLedger.transaction_date, MoneyLedger.money_ledger_id, after))
+    else:
+        query = query.offset(skip)
+    return query.limit(limit)
+
 def get_money_ledgers(
     db: Session,
     customer_id: Optional[int] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    after: Optional[Tuple[Any, int]] = None,
+    include_voided: bool = False
 ) -> List[MoneyLedger]:
     try:
-        query = db.query(MoneyLedger)
-        
-        # فیلتر بر اساس مشتری
-        if customer_id:
-            query = query.filter(MoneyLedger.customer_id == customer_id)
-        
-        # فیلتر بر اساس تاریخ
-        if start_date and end_date:
-            try:
-                start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-                end_dt = datetime.strptime(end_date, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
-                query = query.filter(
-                    MoneyLedger.transaction_date.between(start_dt, end_dt)
-                )
-            except ValueError as e:
-                logger.warning(f"Invalid date format: {start_date} or {end_date}. Error: {str(e)}")
-        
-        # مرتب‌سازی و صفحه‌بندی
-        result = query.order_by(desc(MoneyLedger.transaction_date)).offset(skip).limit(limit).all()
+        result = db.execute(money_ledgers_query(customer_id, start_date, end_date, skip, limit, after, include_voided)).scalars().all()
         logger.info(f"Retrieved {len(result)} money ledger records")
         return result
         
     except Exception as e:
+        # خطا (مثلاً ستون نبودن در دیتابیس به‌روزنشده) نباید به شکل روزنامچه خالی دیده شود
+        logger.error(f"Error retrieving money ledgers: {str(e)}")
+        raise
+
+async def get_money_ledgers_async(
+    db: AsyncSession,
+    customer_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[Any, int]] = None,
+    include_voided: bool = False
+) -> List[MoneyLedger]:
+    try:
+        result = (await db.execute(money_ledgers_query(customer_id, start_date, end_date, skip, limit, after, include_voided))).scalars().all()
+        logger.info(f"Retrieved {len(result)} money ledger records")
+        return result
+
+    except Exception as e:
+        # خطا (مثلاً ستون نبودن در دیتابیس به‌روزنشده) نباید به شکل روزنامچه خالی دیده شود
         logger.error(f"Error retrieving money ledgers: {str(e)}")
-        return []
+        raise
+
+async def get_money_ledger_async(db: AsyncSession, money_ledger_id: int, include_voided: bool = False) -> Optional[MoneyLedger]:
+    ledger = await db.get(MoneyLedger, money_ledger_id)
+    # مثل لیست: رکورد ابطال‌شده و رکورد معکوس فقط در صورت درخواست برگردانده می‌شوند
+    if ledger is not None and not include_voided and (ledger.voided_at is not None or ledger.reversal_of_id is not None):
+        return None
+    return ledger
+
+def build_money_ledger(ledger: MoneyLedgerCreate, usd_balance: Decimal, txn_id: Optional[int] = None) -> MoneyLedger:
+    return MoneyLedger(
+        customer_id=ledger.customer_id,
+        capital_id=ledger.capital_id,
+        description=ledger.description,
+        received=Decimal(str(ledger.received)),
+        paid=Decimal(str(ledger.paid)),
+        usd_balance=usd_balance,
+        transaction_date=ledger.transaction_date or datetime.now(),
+        txn_id=txn_id
+    )
+
+def add_money_ledger(db: Session, ledger: MoneyLedgerCreate, txn_id: Optional[int] = None) -> MoneyLedger:
+    """
+    ثبت رکورد و به‌روزرسانی بیلانس‌ها در تراکنش جاری بدون commit (برای ثبت گروهی در صف نوشتن)؛
+    txn_id معامله‌ای است که رکورد از آن ثبت شده (post_ledgers)
+    """
+    # محاسبه بیلانس جدید از روی جدول بیلانس مشتری (بدون اسکن تاریخچه)
+    new_balance = apply_usd_delta(
+        db, ledger.customer_id, Decimal(str(ledger.received)) - Decimal(str(ledger.paid))
+    )
+    
+    # ایجاد رکورد جدید
+    db_ledger = build_money_ledger(ledger, new_balance, txn_id)
+    
+    db.add(db_ledger)
+    db.flush()
+
+    # ثبت با تاریخ گذشته: بیلانس این رکورد و رکوردهای بعدی از بیلانس رکورد قبلی محاسبه شود
+    if has_rows_after(db, MONEY_LEDGER_BALANCE, db_ledger.customer_id, db_ledger.transaction_date, db_ledger.money_ledger_id):
+        rebalance_from(db, MONEY_LEDGER_BALANCE, db_ledger.customer_id, db_ledger.transaction_date, db_ledger.money_ledger_id)
+        # UPDATE گروهی شیء داخل session را به‌روز نمی‌کند
+        db.refresh(db_ledger, ["usd_balance"])
+    return db_ledger
 
 def create_money_ledger(db: Session, ledger: MoneyLedgerCreate) -> MoneyLedger:
     try:
-        # محاسبه بیلانس جدید
-        current_balance = calculate_balance(db, ledger.customer_id)
-        new_balance = current_balance + Decimal(str(ledger.received)) - Decimal(str(ledger.paid))
-        
-        # ایجاد رکورد جدید
-        db_ledger = MoneyLedger(
-            customer_id=ledger.customer_id,
-            capital_id=ledger.capital_id,
-            description=ledger.description,
-            received=Decimal(str(ledger.received)),
-            paid=Decimal(str(ledger.paid)),
-            usd_balance=new_balance,
-            transaction_date=ledger.transaction_date or datetime.now()
-        )
-        
-        db.add(db_ledger)
-        db.commit()
+        db_ledger = commit_posting(db, lambda: add_money_ledger(db, ledger))
         db.refresh(db_ledger)
         
         logger.info(f"Money ledger created successfully: ID={db_ledger.money_ledger_id}, Customer={db_ledger.customer_id}, Balance={db_ledger.usd_balance}")
@@ -101,28 +177,91 @@ def create_money_ledger(db: Session, ledger: MoneyLedgerCreate) -> MoneyLedger:
         logger.error(f"Error creating money ledger: {str(e)}")
         raise
 
-def update_money_ledger(db: Session, money_ledger_id: int, ledger_update: MoneyLedgerUpdate) -> Optional[MoneyLedger]:
-    try:
-        db_ledger = get_money_ledger(db, money_ledger_id)
-        if not db_ledger:
-            return None
+def post_money_ledger_batch(db: Session, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    ثبت گروهی رکوردهای روزنامچه دالر (برای چند مشتری) در یک تراکنش با نتیجه جداگانه هر ردیف
+    """
+    return post_ledger_batch(db, MONEY_LEDGER_BALANCE, MoneyLedgerCreate, entries, build_money_ledger, apply_usd_delta)
 
-        # ذخیره مقادیر قدیمی برای محاسبه مجدد بیلانس
-        old_customer_id = db_ledger.customer_id
+def delete_money_ledger_batch(db: Session, ids: List[int]) -> List[Dict[str, Any]]:
+    return delete_ledger_batch(db, MONEY_LEDGER_BALANCE, ids, apply_usd_delta)
 
-        # به‌روزرسانی فیلدها
-        update_data = ledger_update.dict(exclude_unset=True)
-        for key, value in update_data.items():
-            if value is not None:
-                setattr(db_ledger, key, value)
+def build_money_ledger_reversal(original: MoneyLedger, usd_balance: Decimal, transaction_date: datetime) -> MoneyLedger:
+    """
+    رکورد معکوس (رسید و گرفت جابه‌جا) برای ابطال رکورد اصلی
+    """
+    description = f"ابطال رکورد #{original.money_ledger_id}"
+    if original.description:
+        description = f"{description}: {original.description}"
+    return MoneyLedger(
+        customer_id=original.customer_id,
+        capital_id=original.capital_id,
+        description=description,
+        received=original.paid,
+        paid=original.received,
+        usd_balance=usd_balance,
+        transaction_date=transaction_date,
+        reversal_of_id=original.money_ledger_id,
+        txn_id=original.txn_id
+    )
+
+def void_money_ledger_batch(db: Session, ids: List[int]) -> List[Dict[str, Any]]:
+    return void_ledger_batch(db, MONEY_LEDGER_BALANCE, ids, build_money_ledger_reversal, apply_usd_delta)
+
+def void_money_ledger(db: Session, money_ledger_id: int) -> Dict[str, Any]:
+    """
+    ابطال یک رکورد روزنامچه دالر با رکورد معکوس (بدون بازنویسی بیلانس رکوردهای گذشته)
+    """
+    return void_money_ledger_batch(db, [money_ledger_id])[0]
+
+def edit_money_ledger(db: Session, money_ledger_id: int, ledger_update: MoneyLedgerUpdate) -> Optional[MoneyLedger]:
+    """
+    ویرایش رکورد و بیلانس‌ها بدون commit (برای commit_posting)؛ مقادیر قدیمی هر بار دوباره خوانده می‌شوند
+    """
+    db_ledger = get_money_ledger(db, money_ledger_id)
+    if not db_ledger:
+        return None
+    if db_ledger.voided_at is not None or db_ledger.reversal_of_id is not None:
+        raise ValueError("رکورد ابطال‌شده یا معکوس قابل ویرایش نیست")
+
+    # ذخیره مقادیر قدیمی برای محاسبه مجدد بیلانس
+    old_net = db_ledger.received - db_ledger.paid
+    old_customer_id = db_ledger.customer_id
+    old_date = db_ledger.transaction_date
+
+    # به‌روزرسانی فیلدها
+    update_data = ledger_update.dict(exclude_unset=True)
 
-        # اگر received یا paid تغییر کرده، بیلانس را مجدداً محاسبه کن
-        if 'received' in update_data or 'paid' in update_data:
-            customer_id = update_data.get('customer_id', old_customer_id)
-            new_balance = calculate_balance(db, customer_id)
-            db_ledger.usd_balance = new_balance
+    # ردیف بیلانس مشتری(ها) قبل از تغییر رکورد آماده شود تا مقداردهی اولیه از تاریخچه درست باشد
+    get_or_create_customer_balance(db, old_customer_id)
+    if update_data.get('customer_id') and update_data['customer_id'] != old_customer_id:
+        get_or_create_customer_balance(db, update_data['customer_id'])
 
-        db.commit()
+    for key, value in update_data.items():
+        if value is not None:
+            setattr(db_ledger, key, value)
+
+    # اگر received یا paid یا مشتری تغییر کرده، جدول بیلانس را با اختلاف به‌روز کن
+    amounts_changed = 'received' in update_data or 'paid' in update_data or db_ledger.customer_id != old_customer_id
+    if amounts_changed:
+        new_net = Decimal(str(db_ledger.received)) - Decimal(str(db_ledger.paid))
+        apply_usd_delta(db, old_customer_id, -old_net)
+        apply_usd_delta(db, db_ledger.customer_id, new_net)
+
+    # فقط رکوردهای بعد از نقطه تغییر (در ترتیب زمانی) محاسبه مجدد می‌شوند
+    if amounts_changed or db_ledger.transaction_date != old_date:
+        if db_ledger.customer_id != old_customer_id:
+            rebalance_from(db, MONEY_LEDGER_BALANCE, old_customer_id, old_date, db_ledger.money_ledger_id)
+            rebalance_from(db, MONEY_LEDGER_BALANCE, db_ledger.customer_id, db_ledger.transaction_date, db_ledger.money_ledger_id)
+        else:
+            rebalance_from(db, MONEY_LEDGER_BALANCE, db_ledger.customer_id, min(old_date, db_ledger.transaction_date), db_ledger.money_ledger_id)
+    return db_ledger
+
+def update_money_ledger(db: Session, money_ledger_id: int, ledger_update: MoneyLedgerUpdate) -> Optional[MoneyLedger]:
+    try:
+        db_ledger = commit_posting(db, lambda: edit_money_ledger(db, money_ledger_id, ledger_update))
+        if not db_ledger:
+            return None
         db.refresh(db_ledger)
         
         logger.info(f"Money ledger updated successfully: ID={db_ledger.money_ledger_id}")
@@ -133,52 +272,47 @@ def update_money_ledger(db: Session, money_ledger_id: int, ledger_update: MoneyL
         logger.error(f"Error updating money ledger {money_ledger_id}: {str(e)}")
         raise
 
+def remove_money_ledger(db: Session, money_ledger_id: int) -> bool:
+    """
+    حذف رکورد و اصلاح بیلانس‌ها بدون commit (برای commit_posting)
+    """
+    db_ledger = get_money_ledger(db, money_ledger_id)
+    if not db_ledger:
+        return False
+    # حذف جداگانه رکورد ابطال‌شده یا معکوس، جفت ابطال را نیمه‌کاره و بیلانس مشتری را تغییر می‌دهد
+    if db_ledger.voided_at is not None or db_ledger.reversal_of_id is not None:
+        raise ValueError("رکورد ابطال‌شده یا معکوس قابل حذف نیست")
+
+    customer_id = db_ledger.customer_id
+    transaction_date = db_ledger.transaction_date
+    apply_usd_delta(db, customer_id, -(db_ledger.received - db_ledger.paid))
+    db.delete(db_ledger)
+
+    # پس از حذف، فقط بیلانس رکوردهای بعد از رکورد حذف‌شده به‌روز شود
+    rebalance_from(db, MONEY_LEDGER_BALANCE, customer_id, transaction_date, money_ledger_id)
+    return True
+
 def delete_money_ledger(db: Session, money_ledger_id: int) -> bool:
     try:
-        db_ledger = get_money_ledger(db, money_ledger_id)
-        if not db_ledger:
+        if not commit_posting(db, lambda: remove_money_ledger(db, money_ledger_id)):
             return False
 
-        customer_id = db_ledger.customer_id
-        db.delete(db_ledger)
-        db.commit()
-        
-        # پس از حذف، بیلانس سایر رکوردهای مشتری را به‌روز کن
-        _recalculate_customer_balance(db, customer_id)
-        
         logger.info(f"Money ledger deleted successfully: ID={money_ledger_id}")
         return True
-        
+
+    except ValueError:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         logger.error(f"Error deleting money ledger {money_ledger_id}: {str(e)}")
         return False
 
-def _recalculate_customer_balance(db: Session, customer_id: int):
-    """
-    محاسبه مجدد بیلانس برای تمام رکوردهای یک مشتری
-    """
-    try:
-        ledgers = db.query(MoneyLedger).filter(
-            MoneyLedger.customer_id == customer_id
-        ).order_by(MoneyLedger.transaction_date, MoneyLedger.money_ledger_id).all()
-        
-        running_balance = Decimal('0')
-        for ledger in ledgers:
-            running_balance += ledger.received - ledger.paid
-            if ledger.usd_balance != running_balance:
-                ledger.usd_balance = running_balance
-        
-        db.commit()
-        logger.info(f"Recalculated balances for customer {customer_id}")
-        
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error recalculating balances for customer {customer_id}: {str(e)}")
-        raise
-
 def get_customer_money_balance(db: Session, customer_id: int) -> Decimal:
     """
     دریافت بیلانس دالر فعلی یک مشتری
     """
-    return calculate_balance(db, customer_id)
\ No newline at end of file
+    return get_usd_balance(db, customer_id)
+
+async def get_customer_money_balance_async(db: AsyncSession, customer_id: int) -> Decimal:
+    return await get_usd_balance_async(db, customer_id)
@@ -0,0 +1,235 @@
+# app/crud/period_close.py
+
+from sqlalchemy.orm import Session
+from sqlalchemy import Select, select
+from sqlalchemy.sql import func
+from persiantools.jdatetime import JalaliDate
+from app.models.period_close import PERIOD_CLOSED, PERIOD_REOPENED, PeriodClose, PeriodCustomerBalance
+from app.models.gold_ledger import GoldLedger
+from app.models.money_ledger import MoneyLedger
+from app.models.capital import Capital
+import app.core.period_reopen  # noqa: F401  باز شدن خودکار دوره‌ها با ثبت تاریخ گذشته
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, time
+from decimal import Decimal
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ستون بیلانس دوره متناظر با هر روزنامچه
+SNAPSHOT_COLUMNS = {GoldLedger: "gold_balance", MoneyLedger: "usd_balance"}
+
+def _to_decimal(value) -> Decimal:
+    return Decimal(str(value)) if value is not None else Decimal('0')
+
+def jalali_month_range(year: int, month: int) -> Tuple[datetime, datetime]:
+    """
+    بازه میلادی یک ماه جلالی به شکل [شروع، شروع ماه بعد)
+    """
+    if not 1 <= month <= 12:
+        raise ValueError(f"ماه نامعتبر است: {month}")
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    start = JalaliDate(year, month, 1).to_gregorian()
+    end = JalaliDate(next_year, next_month, 1).to_gregorian()
+    return datetime.combine(start, time.min), datetime.combine(end, time.min)
+
+def get_period(db: Session, year: int, month: int) -> Optional[PeriodClose]:
+    return db.query(PeriodClose).filter(
+        PeriodClose.jalali_year == year, PeriodClose.jalali_month == month
+    ).first()
+
+def list_periods(db: Session) -> List[PeriodClose]:
+    return db.query(PeriodClose).order_by(PeriodClose.end_at.desc()).all()
+
+def get_period_customer_balances(db: Session, period_id: int) -> List[PeriodCustomerBalance]:
+    return db.query(PeriodCustomerBalance).filter(
+        PeriodCustomerBalance.period_id == period_id
+    ).order_by(PeriodCustomerBalance.customer_id).all()
+
+def latest_closed_period(db: Session, before: Optional[datetime] = None) -> Optional[PeriodClose]:
+    """
+    نزدیک‌ترین دوره بسته که تا مرز before تمام شده است (بدون before آخرین دوره بسته)
+    """
+    query = db.query(PeriodClose).filter(PeriodClose.status == PERIOD_CLOSED)
+    if before is not None:
+        query = query.filter(PeriodClose.end_at <= before)
+    return query.order_by(PeriodClose.end_at.desc()).first()
+
+def _flows(db: Session, model, start: Optional[datetime], end: Optional[datetime], customer_id: Optional[int] = None):
+    query = db.query(
+        model.customer_id,
+        func.coalesce(func.sum(model.received), 0),
+        func.coalesce(func.sum(model.paid), 0)
+    )
+    if customer_id is not None:
+        query = query.filter(model.customer_id == customer_id)
+    if start is not None:
+        query = query.filter(model.transaction_date >= start)
+    if end is not None:
+        query = query.filter(model.transaction_date < end)
+    return {cid: _to_decimal(received) - _to_decimal(paid) for cid, received, paid in query.group_by(model.customer_id)}
+
+def ledger_balance_query(model, customer_id: int, before: Optional[datetime] = None) -> Select:
+    """
+    کوئری بیلانس یک مشتری در روزنامچه (تا مرز before) برای Session و AsyncSession:
+    ستون‌های (بیلانس نزدیک‌ترین دوره بسته، جمع رسید، جمع گرفت) که جمع‌ها فقط روی رکوردهای دوره باز است
+    """
+    period = select(PeriodClose.id, PeriodClose.end_at).where(PeriodClose.status == PERIOD_CLOSED)
+    if before is not None:
+        period = period.where(PeriodClose.end_at <= before)
+    period = period.order_by(PeriodClose.end_at.desc()).limit(1).subquery("period")
+
+    snapshot = select(getattr(PeriodCustomerBalance, SNAPSHOT_COLUMNS[model])).where(
+        PeriodCustomerBalance.period_id == select(period.c.id).scalar_subquery(),
+        PeriodCustomerBalance.customer_id == customer_id
+    ).scalar_subquery()
+    # بدون دوره بسته، جمع از ابتدای تاریخچه است
+    start = func.coalesce(select(period.c.end_at).scalar_subquery(), datetime.min)
+    flows = select(
+        func.coalesce(func.sum(model.received), 0).label("received"),
+        func.coalesce(func.sum(model.paid), 0).label("paid")
+    ).where(model.customer_id == customer_id, model.transaction_date >= start)
+    if before is not None:
+        flows = flows.where(model.transaction_date < before)
+    flows = flows.subquery("flows")
+    return select(snapshot.label("snapshot"), flows.c.received, flows.c.paid)
+
+def ledger_balance_from_row(row) -> Decimal:
+    snapshot, received, paid = row
+    return _to_decimal(snapshot) + _to_decimal(received) - _to_decimal(paid)
+
+def ledger_balance(db: Session, model, customer_id: int, before: Optional[datetime] = None) -> Decimal:
+    """
+    بیلانس یک مشتری در روزنامچه (تا مرز before): بیلانس نزدیک‌ترین دوره بسته
+    به علاوه جمع (رسید - گرفت) فقط رکوردهای دوره باز، به جای جمع کل تاریخچه
+    """
+    return ledger_balance_from_row(db.execute(ledger_balance_query(model, customer_id, before)).one())
+
+def capital_totals(db: Session, before: Optional[datetime] = None) -> Dict[str, Decimal]:
+    """
+    تعداد و جمع سرمایه ثبت‌شده تا مرز before از روی نزدیک‌ترین دوره بسته و رکوردهای بعد از آن
+    """
+    period = latest_closed_period(db, before)
+    query = db.query(
+        func.count(Capital.id),
+        func.coalesce(func.sum(Capital.usd_capital), 0),
+        func.coalesce(func.sum(Capital.gold_capital), 0)
+    )
+    totals = {"count": 0, "usd_capital": Decimal('0'), "gold_capital": Decimal('0')}
+    if period is not None:
+        query = query.filter(Capital.date >= period.end_at.date())
+        totals = {
+            "count": period.capital_count,
+            "usd_capital": _to_decimal(period.capital_usd),
+            "gold_capital": _to_decimal(period.capital_gold),
+        }
+    if before is not None:
+        query = query.filter(Capital.date < before.date())
+    count, usd_capital, gold_capital = query.one()
+    return {
+        "count": totals["count"] + count,
+        "usd_capital": totals["usd_capital"] + _to_decimal(usd_capital),
+        "gold_capital": totals["gold_capital"] + _to_decimal(gold_capital),
+    }
+
+def close_period(db: Session, year: int, month: int) -> PeriodClose:
+    """
+    بستن (یا بستن دوباره) یک ماه جلالی
+
+    بیلانس پایان ماه = بیلانس نزدیک‌ترین دوره بسته قبلی + جمع رکوردهای بین پایان آن دوره و پایان این ماه؛
+    پس هزینه بستن فقط به رکوردهای دوره باز بستگی دارد. ماه جاری و آینده قابل بستن نیستند.
+    """
+    start, end = jalali_month_range(year, month)
+    if end > datetime.now():
+        raise ValueError("ماه جاری یا ماه‌های آینده قابل بستن نیستند")
+    period = get_period(db, year, month)
+    if period is not None and period.status == PERIOD_CLOSED:
+        raise ValueError("این دوره قبلاً بسته شده است")
+
+    try:
+        base = latest_closed_period(db, before=start)
+        base_end = base.end_at if base else None
+        gold = {}
+        usd = {}
+        if base is not None:
+            for row in get_period_customer_balances(db, base.id):
+                gold[row.customer_id] = _to_decimal(row.gold_balance)
+                usd[row.customer_id] = _to_decimal(row.usd_balance)
+        for customer_id, delta in _flows(db, GoldLedger, base_end, end).items():
+            gold[customer_id] = gold.get(customer_id, Decimal('0')) + delta
+        for customer_id, delta in _flows(db, MoneyLedger, base_end, end).items():
+            usd[customer_id] = usd.get(customer_id, Decimal('0')) + delta
+        capital = capital_totals(db, before=end)
+
+        if period is None:
+            period = PeriodClose(jalali_year=year, jalali_month=month)
+            db.add(period)
+        else:
+            db.query(PeriodCustomerBalance).filter(
+                PeriodCustomerBalance.period_id == period.id
+            ).delete(synchronize_session=False)
+        period.start_at = start
+        period.end_at = end
+        period.status = PERIOD_CLOSED
+        period.gold_balance_total = sum(gold.values(), Decimal('0'))
+        period.usd_balance_total = sum(usd.values(), Decimal('0'))
+        period.capital_count = capital["count"]
+        period.capital_usd = capital["usd_capital"]
+        period.capital_gold = capital["gold_capital"]
+        period.closed_at = datetime.utcnow()
+        period.reopened_at = None
+        db.flush()
+
+        customer_ids = sorted(set(gold) | set(usd))
+        db.add_all([
+            PeriodCustomerBalance(
+                period_id=period.id,
+                customer_id=customer_id,
+                gold_balance=gold.get(customer_id, Decimal('0')),
+                usd_balance=usd.get(customer_id, Decimal('0'))
+            )
+            for customer_id in customer_ids
+        ])
+        db.commit()
+        db.refresh(period)
+        logger.info(
+            f"Period {year}/{month:02d} closed for {len(customer_ids)} customers "
+            f"(base: {f'{base.jalali_year}/{base.jalali_month:02d}' if base else 'none'})"
+        )
+        return period
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error closing period {year}/{month:02d}: {str(e)}")
+        raise
+
+def reopen_period(db: Session, year: int, month: int) -> List[PeriodClose]:
+    """
+    باز کردن یک دوره بسته؛ دوره‌های بسته بعدی هم باز می‌شوند چون بیلانسشان روی این دوره ساخته شده است
+    """
+    period = get_period(db, year, month)
+    if period is None or period.status != PERIOD_CLOSED:
+        raise ValueError("دوره بسته‌ای با این ماه یافت نشد")
+    try:
+        periods = db.query(PeriodClose).filter(
+            PeriodClose.status == PERIOD_CLOSED, PeriodClose.end_at >= period.end_at
+        ).order_by(PeriodClose.end_at).all()
+        now = datetime.utcnow()
+        for item in periods:
+            item.status = PERIOD_REOPENED
+            item.reopened_at = now
+        db.commit()
+        logger.info(f"Reopened {len(periods)} periods from {year}/{month:02d}")
+        return periods
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error reopening period {year}/{month:02d}: {str(e)}")
+        raise
+
+def reclose_periods(db: Session) -> List[PeriodClose]:
+    """
+    بستن دوباره همه دوره‌های reopened به ترتیب زمانی (هر دوره روی دوره قبلیِ تازه بسته‌شده ساخته می‌شود)
+    """
+    reopened = db.query(PeriodClose.jalali_year, PeriodClose.jalali_month).filter(
+        PeriodClose.status == PERIOD_REOPENED
+    ).order_by(PeriodClose.end_at).all()
+    return [close_period(db, year, month) for year, month in reopened]
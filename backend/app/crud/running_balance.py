@@ -0,0 +1,111 @@
+# app/crud/running_balance.py
+
+from sqlalchemy.orm import Session
+from sqlalchemy import tuple_, update
+from typing import Any, NamedTuple, Optional, Tuple
+from decimal import Decimal
+from app.core.journal import JOURNAL_UPDATE, record_changes
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RunningBalanceSpec(NamedTuple):
+    """
+    توضیح یک جدول دارای بیلانس لحظه‌ای:
+    balances شامل سه‌تایی‌های (ستون بیلانس، ستون ورودی، ستون خروجی) است.
+    ترتیب زمانی رکوردها بر اساس (date_column, id_column) است.
+    """
+    model: Any
+    id_column: str
+    date_column: str
+    balances: Tuple[Tuple[str, str, str], ...]
+
+def _to_decimal(value) -> Decimal:
+    return Decimal(str(value)) if value is not None else Decimal('0')
+
+def _store_value(column, value: Decimal):
+    # ستون‌های Float (مثل جدول transactions) مقدار float می‌گیرند
+    return value if getattr(column.type, "asdecimal", True) else float(value)
+
+def _key(spec: RunningBalanceSpec):
+    # مقایسه row-value روی (تاریخ، شناسه) تا جستجو مستقیماً از ایندکس شروع شود
+    return tuple_(getattr(spec.model, spec.date_column), getattr(spec.model, spec.id_column))
+
+def has_rows_after(db: Session, spec: RunningBalanceSpec, customer_id: int, from_date, from_id: int) -> bool:
+    """
+    آیا بعد از کلید (تاریخ، شناسه) رکوردی برای مشتری وجود دارد؟ (یک جستجوی ایندکسی)
+    """
+    model = spec.model
+    id_col = getattr(model, spec.id_column)
+    after = _key(spec) > tuple_(from_date, from_id)
+    return db.query(id_col).filter(model.customer_id == customer_id, after).first() is not None
+
+def rebalance_from(
+    db: Session,
+    spec: RunningBalanceSpec,
+    customer_id: int,
+    from_date=None,
+    from_id: Optional[int] = None
+) -> int:
+    """
+    محاسبه مجدد بیلانس فقط برای رکوردهای یک مشتری از کلید (from_date, from_id) به بعد
+
+    بیلانس ذخیره‌شده آخرین رکورد قبل از این کلید به عنوان مقدار اولیه استفاده می‌شود و
+    تغییرات با یک UPDATE گروهی (بدون بارگذاری اشیای ORM) اعمال می‌شوند. commit با فراخواننده است.
+    اگر from_date داده نشود کل تاریخچه مشتری محاسبه می‌شود.
+    """
+    model = spec.model
+    date_col = getattr(model, spec.date_column)
+    id_col = getattr(model, spec.id_column)
+    balance_cols = [getattr(model, b) for b, _, _ in spec.balances]
+
+    # تغییرات معلق session (autoflush خاموش است) باید قبل از خواندن دیده شوند
+    db.flush()
+
+    query = db.query(id_col).filter(model.customer_id == customer_id)
+    seeds = [Decimal('0')] * len(spec.balances)
+    if from_date is not None:
+        if from_id is None:
+            from_id = 0
+        before = _key(spec) < tuple_(from_date, from_id)
+        seed_row = db.query(*balance_cols).filter(
+            model.customer_id == customer_id, before
+        ).order_by(date_col.desc(), id_col.desc()).first()
+        if seed_row is not None:
+            seeds = [_to_decimal(v) for v in seed_row]
+        at_or_after = _key(spec) >= tuple_(from_date, from_id)
+        query = db.query(id_col).filter(model.customer_id == customer_id, at_or_after)
+
+    flow_cols = []
+    for _, in_attr, out_attr in spec.balances:
+        flow_cols.extend([getattr(model, in_attr), getattr(model, out_attr)])
+    rows = query.add_columns(*balance_cols, *flow_cols).order_by(date_col, id_col).all()
+
+    running = list(seeds)
+    changes = []
+    count = len(spec.balances)
+    for row in rows:
+        stored = row[1:1 + count]
+        flows = row[1 + count:]
+        changed = False
+        for i in range(count):
+            running[i] += _to_decimal(flows[2 * i]) - _to_decimal(flows[2 * i + 1])
+            if stored[i] is None or _to_decimal(stored[i]) != running[i]:
+                changed = True
+        if changed:
+            # همه ستون‌های بیلانس با هم نوشته می‌شوند تا پارامترهای executemany یکسان باشند
+            change = {spec.id_column: row[0]}
+            for i, (balance_attr, _, _) in enumerate(spec.balances):
+                change[balance_attr] = _store_value(balance_cols[i], running[i])
+            changes.append(change)
+
+    if changes:
+        # UPDATE گروهی بر اساس کلید اصلی (executemany)
+        db.execute(update(model), changes)
+        # UPDATE گروهی از flush عبور نمی‌کند؛ ثبت دستی در دفتر تغییرات
+        record_changes(db, model, JOURNAL_UPDATE, changes)
+    logger.info(
+        f"Rebalanced {model.__tablename__} for customer {customer_id}: "
+        f"{len(rows)} rows scanned, {len(changes)} updated"
+    )
+    return len(changes)
@@ -1,9 +1,11 @@
 # backend/app/crud/shop_expense.py
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 from datetime import datetime
 from app.models.shop_expense import ShopExpense
 from app.schemas.shop_expense import ShopExpenseCreate, ShopExpenseUpdate
+from app.core.pagination import seek_before
+import app.core.daily_rollup  # noqa: F401  جمع‌های روزانه در همان تراکنش ثبت به‌روز می‌شوند
 
 def get_expense(db: Session, expense_id: int) -> Optional[ShopExpense]:
     return db.query(ShopExpense).filter(ShopExpense.expense_id == expense_id).first()
@@ -13,7 +15,8 @@ def get_expenses(db: Session,
                  limit: int = 200,
                  employee_id: Optional[int] = None,
                  from_date: Optional[datetime] = None,
-                 to_date: Optional[datetime] = None) -> List[ShopExpense]:
+                 to_date: Optional[datetime] = None,
+                 after: Optional[Tuple[Any, int]] = None) -> List[ShopExpense]:
     q = db.query(ShopExpense)
     if employee_id:
         q = q.filter(ShopExpense.employee_id == employee_id)
@@ -21,7 +24,12 @@ def get_expenses(db: Session,
         q = q.filter(ShopExpense.expense_date >= from_date)
     if to_date:
         q = q.filter(ShopExpense.expense_date <= to_date)
-    return q.order_by(ShopExpense.expense_date.desc()).offset(skip).limit(limit).all()
+    q = q.order_by(ShopExpense.expense_date.desc(), ShopExpense.expense_id.desc())
+    if after is not None:
+        q = q.filter(seek_before(ShopExpense.expense_date, ShopExpense.expense_id, after))
+    else:
+        q = q.offset(skip)
+    return q.limit(limit).all()
 
 def create_expense(db: Session, expense_in: ShopExpenseCreate) -> ShopExpense:
     data = expense_in.model_dump(exclude_none=True)
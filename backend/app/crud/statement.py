@@ -0,0 +1,182 @@
+# app/crud/statement.py
+
+from sqlalchemy import Select, String, case, cast, false, func, literal, or_, select, true, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.gold_ledger import GoldLedger
+from app.models.money_ledger import MoneyLedger
+from app.models.transaction import Transaction
+from app.crud.balance_as_of import last_balance_query
+from app.crud.gold_ledger import GOLD_LEDGER_BALANCE
+from app.crud.money_ledger import MONEY_LEDGER_BALANCE
+from app.crud.transaction import TRANSACTION_BALANCE
+from typing import Any, AsyncIterator, Dict, Tuple
+from datetime import datetime, timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+# دو دفتر جدا: روزنامچه‌ها (طلا و دالر) و معاملات؛ هر کدام بیلانس لحظه‌ای خودشان را دارند
+# (معامله‌ای که با post_ledgers ثبت شده در هر دو دفتر می‌آید و نباید دو بار جمع شود)
+BOOK_LEDGER = "ledger"
+BOOK_TRANSACTIONS = "transactions"
+STATEMENT_FETCH_SIZE = 500
+GOLD_DIGITS = 4
+USD_DIGITS = 2
+
+def parse_statement_range(start_date: str, end_date: str) -> Tuple[datetime, datetime]:
+    """
+    بازه صورت‌حساب (YYYY-MM-DD)؛ خروجی [شروع، روز بعد از پایان) است
+    """
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
+    except ValueError:
+        raise ValueError(f"فرمت تاریخ نامعتبر است: {start_date} یا {end_date} (YYYY-MM-DD)")
+    if end <= start:
+        raise ValueError("تاریخ پایان نباید قبل از تاریخ شروع باشد")
+    return start, end
+
+def _ledger_rows(model, spec, source: str, customer_id: int, start: datetime, end: datetime, gold: bool) -> Select:
+    date_column = getattr(model, spec.date_column)
+    zero = literal(0)
+    return select(
+        literal(BOOK_LEDGER).label("book"),
+        literal(source).label("source"),
+        getattr(model, spec.id_column).label("id"),
+        cast(date_column, String).label("date"),
+        model.description.label("description"),
+        (model.received if gold else zero).label("gold_in"),
+        (model.paid if gold else zero).label("gold_out"),
+        (zero if gold else model.received).label("usd_in"),
+        (zero if gold else model.paid).label("usd_out"),
+        or_(model.voided_at.is_not(None), model.reversal_of_id.is_not(None)).label("hidden"),
+    ).where(model.customer_id == customer_id, date_column >= start, date_column < end)
+
+def _transaction_rows(customer_id: int, start: datetime, end: datetime) -> Select:
+    # تاریخ معامله رشته YYYY-MM-DD است؛ مقایسه رشته‌ای با همان قالب روی ایندکس انجام می‌شود
+    return select(
+        literal(BOOK_TRANSACTIONS).label("book"),
+        literal("transaction").label("source"),
+        Transaction.txn_id.label("id"),
+        Transaction.date.label("date"),
+        Transaction.detail.label("description"),
+        Transaction.gold_in.label("gold_in"),
+        Transaction.gold_out.label("gold_out"),
+        Transaction.dollar_in.label("usd_in"),
+        Transaction.dollar_out.label("usd_out"),
+        false().label("hidden"),
+    ).where(
+        Transaction.customer_id == customer_id,
+        Transaction.date >= start.strftime('%Y-%m-%d'),
+        Transaction.date < end.strftime('%Y-%m-%d')
+    )
+
+def statement_query(customer_id: int, start: datetime, end: datetime) -> Select:
+    """
+    صورت‌حساب مشتری در یک کوئری:
+    - بیلانس ابتدای دوره هر دفتر از بیلانس لحظه‌ای آخرین رکورد قبل از شروع (جستجوی ایندکسی)
+    - رکوردهای سه جدول در بازه با UNION ALL (اسکن بازه‌ای روی ایندکس customer/date هر جدول)
+    - بیلانس هر ردیف = بیلانس ابتدای دفتر + SUM() OVER (PARTITION BY دفتر ORDER BY تاریخ، منبع، شناسه)
+
+    ردیف‌های ابطال‌شده و معکوس در جمع لحظه‌ای می‌مانند و فقط با ستون hidden علامت می‌خورند،
+    پس بیلانس ردیف‌ها و بیلانس پایان دوره با دفتر یکی است چه نمایش داده شوند چه نه.
+    اگر در بازه رکوردی نباشد یک ردیف با ستون‌های خالی (فقط بیلانس ابتدای دوره) برمی‌گردد.
+    """
+    opening = select(
+        last_balance_query(GOLD_LEDGER_BALANCE, customer_id, start).scalar_subquery().label("ledger_gold"),
+        last_balance_query(MONEY_LEDGER_BALANCE, customer_id, start).scalar_subquery().label("ledger_usd"),
+        last_balance_query(TRANSACTION_BALANCE, customer_id, start.strftime('%Y-%m-%d'), "gold_balance")
+            .scalar_subquery().label("transactions_gold"),
+        last_balance_query(TRANSACTION_BALANCE, customer_id, start.strftime('%Y-%m-%d'), "dollar_balance")
+            .scalar_subquery().label("transactions_usd"),
+    ).cte("opening")
+
+    rows = union_all(
+        _ledger_rows(GoldLedger, GOLD_LEDGER_BALANCE, "gold_ledger", customer_id, start, end, gold=True),
+        _ledger_rows(MoneyLedger, MONEY_LEDGER_BALANCE, "money_ledger", customer_id, start, end, gold=False),
+        _transaction_rows(customer_id, start, end),
+    ).subquery("rows")
+
+    window = {
+        "partition_by": rows.c.book,
+        "order_by": (rows.c.date, rows.c.source, rows.c.id),
+    }
+    running = select(
+        rows,
+        func.sum(func.coalesce(rows.c.gold_in, 0) - func.coalesce(rows.c.gold_out, 0)).over(**window).label("gold_change"),
+        func.sum(func.coalesce(rows.c.usd_in, 0) - func.coalesce(rows.c.usd_out, 0)).over(**window).label("usd_change"),
+    ).subquery("running")
+
+    is_ledger = running.c.book == BOOK_LEDGER
+    opening_gold = func.coalesce(case((is_ledger, opening.c.ledger_gold), else_=opening.c.transactions_gold), 0)
+    opening_usd = func.coalesce(case((is_ledger, opening.c.ledger_usd), else_=opening.c.transactions_usd), 0)
+    return select(
+        opening,
+        running.c.book, running.c.source, running.c.id, running.c.date, running.c.description,
+        running.c.gold_in, running.c.gold_out, running.c.usd_in, running.c.usd_out, running.c.hidden,
+        (opening_gold + running.c.gold_change).label("gold_balance"),
+        (opening_usd + running.c.usd_change).label("usd_balance"),
+    ).select_from(opening.outerjoin(running, true())) \
+        .order_by(running.c.date, running.c.source, running.c.id)
+
+def _row_date(value) -> Any:
+    """
+    تاریخ ردیف با یک قالب (ISO 8601)؛ ستون date فقط برای مرتب‌سازی UNION/پنجره به رشته cast می‌شود و
+    قالب رشته روزنامچه ("2025-01-04 00:00:00.000000") با معامله ("2025-01-04") یکی نیست
+    """
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value).isoformat()
+    except ValueError:
+        return value
+
+def _balances(gold, usd) -> Dict[str, float]:
+    return {"gold": round(float(gold or 0), GOLD_DIGITS), "usd": round(float(usd or 0), USD_DIGITS)}
+
+async def stream_statement(
+    db: AsyncSession,
+    customer_id: int,
+    start: datetime,
+    end: datetime,
+    include_voided: bool = False
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    اجرای کوئری صورت‌حساب و برگرداندن رویدادها به ترتیب:
+    ("opening", بیلانس‌ها)، ("row", ردیف) برای هر ردیف، ("closing", بیلانس‌ها)
+
+    ردیف‌ها دسته‌ای از cursor خوانده می‌شوند و کل صورت‌حساب در حافظه نگه داشته نمی‌شود.
+    """
+    result = await db.stream(statement_query(customer_id, start, end).execution_options(yield_per=STATEMENT_FETCH_SIZE))
+    closing = None
+    count = 0
+    async for row in result.mappings():
+        if closing is None:
+            closing = {
+                BOOK_LEDGER: _balances(row["ledger_gold"], row["ledger_usd"]),
+                BOOK_TRANSACTIONS: _balances(row["transactions_gold"], row["transactions_usd"]),
+            }
+            yield "opening", {book: dict(balances) for book, balances in closing.items()}
+        if row["book"] is None:
+            continue
+        balances = _balances(row["gold_balance"], row["usd_balance"])
+        closing[row["book"]] = balances
+        if row["hidden"] and not include_voided:
+            continue
+        count += 1
+        yield "row", {
+            "book": row["book"],
+            "source": row["source"],
+            "id": row["id"],
+            "date": _row_date(row["date"]),
+            "description": row["description"],
+            "gold_in": round(float(row["gold_in"] or 0), GOLD_DIGITS),
+            "gold_out": round(float(row["gold_out"] or 0), GOLD_DIGITS),
+            "usd_in": round(float(row["usd_in"] or 0), USD_DIGITS),
+            "usd_out": round(float(row["usd_out"] or 0), USD_DIGITS),
+            "gold_balance": balances["gold"],
+            "usd_balance": balances["usd"],
+            "voided": bool(row["hidden"]),
+        }
+    logger.info(f"Statement for customer {customer_id}: {count} rows")
+    yield "closing", closing
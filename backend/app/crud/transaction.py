@@ -5,95 +5,249 @@
 
 # backend/app/crud/transaction.py
 
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.transaction import Transaction
 from app.schemas.transaction import TransactionCreate, TransactionUpdate
-from typing import List, Optional
+from app.core.pagination import seek_before
+from app.crud.customer_balance import apply_gold_delta, apply_usd_delta, commit_posting
+from app.crud.gold_ledger import GOLD_LEDGER_BALANCE, add_gold_ledger, build_gold_ledger_reversal
+from app.crud.ledger_batch import delete_ledger_rows, void_ledger_rows
+from app.crud.money_ledger import MONEY_LEDGER_BALANCE, add_money_ledger, build_money_ledger_reversal
+from app.crud.running_balance import RunningBalanceSpec, rebalance_from
+from app.schemas.gold_ledger import GoldLedgerCreate
+from app.schemas.money_ledger import MoneyLedgerCreate
+from typing import Any, List, Optional, Tuple
+from datetime import datetime
+import app.core.daily_rollup  # noqa: F401  جمع‌های روزانه در همان تراکنش ثبت به‌روز می‌شوند
+import logging
+
+logger = logging.getLogger(__name__)
 
 def get_transaction(db: Session, txn_id: int):
     return db.query(Transaction).filter(Transaction.txn_id == txn_id).first()
 
-def get_transactions(
-    db: Session,
+async def get_transaction_async(db: AsyncSession, txn_id: int) -> Optional[Transaction]:
+    return await db.get(Transaction, txn_id)
+
+def transactions_query(
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = None,
     customer_id: Optional[int] = None,
-) -> List[Transaction]:
-    query = db.query(Transaction)
+    after: Optional[Tuple[Any, int]] = None,
+) -> Select:
+    query = select(Transaction)
     
     if customer_id:
-        query = query.filter(Transaction.customer_id == customer_id)
+        query = query.where(Transaction.customer_id == customer_id)
     
     if search:
-        query = query.filter(
+        query = query.where(
             (Transaction.detail.like(f"%{search}%")) |
             (Transaction.type.like(f"%{search}%"))
         )
     
-    # 💡 بهتر است تراکنش‌ها بر اساس تاریخ یا ID مرتب شوند
-    return query.order_by(Transaction.txn_id.desc()).offset(skip).limit(limit).all()
+    # مرتب‌سازی بر اساس تاریخ و سپس ID (مطابق ایندکس customer_id, date, txn_id)
+    query = query.order_by(Transaction.date.desc(), Transaction.txn_id.desc())
+    if after is not None:
+        query = query.where(seek_before(Transaction.date, Transaction.txn_id, after))
+    else:
+        query = query.offset(skip)
+    return query.limit(limit)
 
+def get_transactions(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    search: Optional[str] = None,
+    customer_id: Optional[int] = None,
+    after: Optional[Tuple[Any, int]] = None,
+) -> List[Transaction]:
+    return db.execute(transactions_query(skip, limit, search, customer_id, after)).scalars().all()
 
-def create_transaction(db: Session, transaction: TransactionCreate):
-    
-    # 💡 اصلاح: استفاده از model_dump(exclude_unset=True) و حذف احتمالی فیلدهای اضافی
-    # بهترین روش این است که مطمئن شویم فقط داده‌هایی که ستون مربوطه در مدل دارند ارسال شوند.
-    
-    # 1. داده‌ها را به دیکشنری تبدیل کنید
-    transaction_data = transaction.model_dump()
-    
-    # 2. شیء مدل SQLAlchemy را به صورت صریح و امن بسازید
-    # این روش مطمئن‌ترین راه برای جلوگیری از خطاهای مپینگ است.
-    db_transaction = Transaction(
-        customer_id=transaction_data["customer_id"],
-        type=transaction_data["type"],
-        
-        # فیلدهای جدید
-        weight=transaction_data["weight"],
-        source_carat=transaction_data["source_carat"],
-        gold_rate=transaction_data["gold_rate"],
-        gold_amount=transaction_data["gold_amount"],
-        
-        # فیلدهای مالی
-        dollar_in=transaction_data["dollar_in"],
-        dollar_out=transaction_data["dollar_out"],
-        gold_in=transaction_data["gold_in"],
-        gold_out=transaction_data["gold_out"],
-        
-        # فیلدهای بالانس (از فرانت‌اند)
-        dollar_balance=transaction_data["dollar_balance"],
-        gold_balance=transaction_data["gold_balance"],
-        
-        detail=transaction_data.get("detail"),
-        date=transaction_data["date"],
-    )
-    
+async def get_transactions_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    search: Optional[str] = None,
+    customer_id: Optional[int] = None,
+    after: Optional[Tuple[Any, int]] = None,
+) -> List[Transaction]:
+    return (await db.execute(transactions_query(skip, limit, search, customer_id, after))).scalars().all()
+
+
+# ترتیب زمانی و ستون‌های بیلانس لحظه‌ای معاملات هر مشتری (بیلانس = جمع ورودی - خروجی تا این معامله)
+TRANSACTION_BALANCE = RunningBalanceSpec(
+    model=Transaction,
+    id_column="txn_id",
+    date_column="date",
+    balances=(("dollar_balance", "dollar_in", "dollar_out"), ("gold_balance", "gold_in", "gold_out"))
+)
+BALANCE_FIELDS = ("dollar_balance", "gold_balance")
+# فیلدهایی که رکوردهای روزنامچه ثبت‌شده از معامله (post_ledgers) به آن‌ها وابسته‌اند
+LEDGER_FIELDS = ("customer_id", "type", "date", "detail", "gold_in", "gold_out", "dollar_in", "dollar_out")
+# روزنامچه‌های طلا و دالر: (ترتیب و بیلانس لحظه‌ای، سازنده رکورد معکوس، به‌روزرسانی جدول بیلانس)
+LEDGERS = (
+    (GOLD_LEDGER_BALANCE, build_gold_ledger_reversal, apply_gold_delta),
+    (MONEY_LEDGER_BALANCE, build_money_ledger_reversal, apply_usd_delta),
+)
+
+def _refresh_balances(db: Session, db_transaction: Transaction):
+    # UPDATE گروهی rebalance_from شیء داخل session را به‌روز نمی‌کند
+    db.refresh(db_transaction, list(BALANCE_FIELDS))
+
+def _ledger_date(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"تاریخ معامله نامعتبر است: {value}")
+
+def _post_ledgers(db: Session, db_transaction: Transaction):
+    """
+    ثبت رکوردهای روزنامچه طلا و دالر معادل معامله (ورودی = رسید، خروجی = گرفت) در همان تراکنش؛
+    رکوردها با txn_id به معامله وصل می‌شوند تا ویرایش و حذف معامله به آن‌ها هم برسد
+    """
+    description = f"معامله {'خرید' if db_transaction.type == 'buy' else 'فروش'} #{db_transaction.txn_id}"
+    if db_transaction.detail:
+        description = f"{description} - {db_transaction.detail}"
+    transaction_date = _ledger_date(db_transaction.date)
+    gold_in, gold_out = db_transaction.gold_in or 0, db_transaction.gold_out or 0
+    dollar_in, dollar_out = db_transaction.dollar_in or 0, db_transaction.dollar_out or 0
+    if gold_in or gold_out:
+        add_gold_ledger(db, GoldLedgerCreate(
+            customer_id=db_transaction.customer_id, description=description,
+            received=gold_in, paid=gold_out, transaction_date=transaction_date
+        ), txn_id=db_transaction.txn_id)
+    if dollar_in or dollar_out:
+        add_money_ledger(db, MoneyLedgerCreate(
+            customer_id=db_transaction.customer_id, description=description,
+            received=dollar_in, paid=dollar_out, transaction_date=transaction_date
+        ), txn_id=db_transaction.txn_id)
+
+def add_transaction(db: Session, transaction: TransactionCreate, post_ledgers: bool = False) -> Transaction:
+    """
+    ثبت معامله در تراکنش جاری دیتابیس بدون commit (برای ثبت گروهی در صف نوشتن)
+
+    بیلانس‌ها در سرور از روی معامله قبلی همان مشتری محاسبه می‌شوند (مقادیر ارسالی نادیده گرفته می‌شوند).
+    با post_ledgers رکوردهای روزنامچه طلا و دالر معامله هم در همان تراکنش ثبت می‌شوند.
+    """
+    transaction_data = transaction.model_dump(exclude=set(BALANCE_FIELDS))
+    db_transaction = Transaction(**transaction_data, dollar_balance=0, gold_balance=0)
     db.add(db_transaction)
-    
-    # ⬅ خطای شما در اینجا رخ می‌دهد
-    db.commit() 
-    
-    db.refresh(db_transaction)
+    # درج اول انجام می‌شود تا قفل نوشتن گرفته شود و خواندن معامله قبلی با ثبت هم‌زمان دیگری تداخل نکند
+    db.flush()
+
+    # بیلانس این معامله از معامله قبلی و بیلانس معاملات بعدی (ثبت با تاریخ گذشته) به‌روز می‌شود
+    rebalance_from(db, TRANSACTION_BALANCE, db_transaction.customer_id, db_transaction.date, db_transaction.txn_id)
+    _refresh_balances(db, db_transaction)
+
+    if post_ledgers:
+        _post_ledgers(db, db_transaction)
     return db_transaction
 
+def _remove_ledgers(db: Session, txn_id: int, void_ledgers: bool) -> int:
+    """
+    ابطال (با رکورد معکوس) یا حذف رکوردهای فعال روزنامچه وصل به معامله در تراکنش جاری؛ خروجی: تعداد رکوردها
+    """
+    count = 0
+    for spec, build_reversal, apply_delta in LEDGERS:
+        model = spec.model
+        id_col = getattr(model, spec.id_column)
+        rows = (
+            db.query(model)
+            .filter(model.txn_id == txn_id, model.voided_at.is_(None), model.reversal_of_id.is_(None))
+            .order_by(id_col)
+            .all()
+        )
+        if not rows:
+            continue
+        if void_ledgers:
+            void_ledger_rows(db, spec, rows, build_reversal, apply_delta)
+        else:
+            delete_ledger_rows(db, spec, rows, apply_delta)
+        count += len(rows)
+    return count
 
+def create_transaction(db: Session, transaction: TransactionCreate, post_ledgers: bool = False):
+    try:
+        db_transaction = commit_posting(db, lambda: add_transaction(db, transaction, post_ledgers))
+        db.refresh(db_transaction)
+        logger.info(f"Transaction created successfully: ID={db_transaction.txn_id}, Customer={db_transaction.customer_id}")
+        return db_transaction
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error creating transaction: {str(e)}")
+        raise
 
-def update_transaction(db: Session, db_transaction: Transaction, transaction_in: TransactionUpdate):
-    # ⚠️ توجه: پس از به‌روزرسانی یک تراکنش، بهتر است بالانس تمام تراکنش‌های بعدی همان مشتری نیز در یک سرویس جداگانه به‌روز شوند.
-    
-    for key, value in transaction_in.model_dump().items():
+def edit_transaction(db: Session, db_transaction: Transaction, transaction_in: TransactionUpdate, void_ledgers: bool = True) -> Transaction:
+    """
+    ویرایش معامله و بیلانس‌ها بدون commit (برای commit_posting)؛ مقادیر قدیمی هر بار دوباره خوانده می‌شوند.
+    اگر معامله رکورد روزنامچه دارد و فیلدهای مربوط تغییر کرده، رکوردهای قبلی ابطال (یا حذف) و دوباره ثبت می‌شوند.
+    """
+    old_customer_id = db_transaction.customer_id
+    old_date = db_transaction.date
+    old_ledger_values = tuple(getattr(db_transaction, field) for field in LEDGER_FIELDS)
+
+    for key, value in transaction_in.model_dump(exclude=set(BALANCE_FIELDS)).items():
         setattr(db_transaction, key, value)
-        
-    db.commit()
-    db.refresh(db_transaction)
+    db.flush()
+
+    # فقط معاملات بعد از نقطه تغییر (در ترتیب زمانی) محاسبه مجدد می‌شوند
+    if db_transaction.customer_id != old_customer_id:
+        rebalance_from(db, TRANSACTION_BALANCE, old_customer_id, old_date, db_transaction.txn_id)
+        rebalance_from(db, TRANSACTION_BALANCE, db_transaction.customer_id, db_transaction.date, db_transaction.txn_id)
+    else:
+        rebalance_from(db, TRANSACTION_BALANCE, db_transaction.customer_id, min(old_date, db_transaction.date), db_transaction.txn_id)
+
+    if tuple(getattr(db_transaction, field) for field in LEDGER_FIELDS) != old_ledger_values:
+        if _remove_ledgers(db, db_transaction.txn_id, void_ledgers):
+            _post_ledgers(db, db_transaction)
     return db_transaction
 
-def delete_transaction(db: Session, txn_id: int):
+def update_transaction(db: Session, db_transaction: Transaction, transaction_in: TransactionUpdate, void_ledgers: bool = True):
+    """
+    ویرایش معامله؛ void_ledgers تعیین می‌کند رکوردهای روزنامچه قبلی معامله ابطال شوند یا حذف (LEDGER_DELETE_MODE)
+    """
+    try:
+        commit_posting(db, lambda: edit_transaction(db, db_transaction, transaction_in, void_ledgers))
+        db.refresh(db_transaction)
+        logger.info(f"Transaction updated successfully: ID={db_transaction.txn_id}")
+        return db_transaction
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error updating transaction {db_transaction.txn_id}: {str(e)}")
+        raise
+
+def remove_transaction(db: Session, txn_id: int, void_ledgers: bool = True) -> Optional[Transaction]:
+    """
+    حذف معامله و اصلاح بیلانس‌ها بدون commit (برای commit_posting)؛
+    رکوردهای روزنامچه معامله در همان تراکنش ابطال (یا حذف) می‌شوند
+    """
     transaction = get_transaction(db, txn_id)
-    if transaction:
-        db.delete(transaction)
-        db.commit()
-        # ⚠️ توجه: پس از حذف، بالانس تمام تراکنش‌های بعدی همان مشتری نیز باید در یک سرویس جداگانه به‌روز شود.
+    if not transaction:
+        return None
+    _remove_ledgers(db, txn_id, void_ledgers)
+    # مثل ondelete=SET NULL (SQLite کلید خارجی را اجرا نمی‌کند و شناسه معامله حذف‌شده دوباره استفاده می‌شود)
+    for spec, _, _ in LEDGERS:
+        model = spec.model
+        db.query(model).filter(model.txn_id == txn_id).update({model.txn_id: None}, synchronize_session=False)
+    customer_id = transaction.customer_id
+    date = transaction.date
+    db.delete(transaction)
+
+    # پس از حذف، فقط بیلانس معاملات بعد از معامله حذف‌شده به‌روز می‌شود
+    rebalance_from(db, TRANSACTION_BALANCE, customer_id, date, txn_id)
+    return transaction
+
+def delete_transaction(db: Session, txn_id: int, void_ledgers: bool = True):
+    try:
+        transaction = commit_posting(db, lambda: remove_transaction(db, txn_id, void_ledgers))
+        if transaction:
+            logger.info(f"Transaction deleted successfully: ID={txn_id}")
         return transaction
-    return None
\ No newline at end of file
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error deleting transaction {txn_id}: {str(e)}")
+        raise
@@ -4,7 +4,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.core.config import settings
-from app.core.database import Base, engine
+from app.core.database import Base, SessionLocal, engine
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.response_cache import ETAG_HEADER
+from app.core.responses import ORJSONResponse
+from app.core.compression import CompressionMiddleware
+from app.core.schema_check import check_schema
 from fastapi.responses import Response
 
 from app.api.v1 import shop_expenses
@@ -24,18 +29,42 @@ from app.api.v1.money_ledger import router as money_ledger_router
 from app.api.v1 import invoices
 from app.api.v1 import backup
 from app.api.v1 import gold_ledger
+from app.api.v1.jobs import router as jobs_router
+from app.api.v1.balances import router as balances_router
+from app.api.v1.statements import router as statements_router
+from app.api.v1.periods import router as periods_router
+from app.api.v1.dashboard import router as dashboard_router
+from app.crud.daily_rollup import ensure_daily_rollups
 
 
 # models for SQL...
 import app.models.user
 import app.models.shop_expense
+import app.core.journal  # ثبت تغییرات در دفتر تغییرات (بک‌آپ افزایشی)
+import app.core.period_reopen  # باز شدن دوره‌های بسته با ثبت تاریخ گذشته
+import app.core.daily_rollup  # جمع‌های روزانه داشبورد
 
 
 
 # اگر لازم شد جداول جدید ساخته شوند (برای SQLite)
 Base.metadata.create_all(bind=engine)
+# ستون‌های جدید جداول موجود فقط با alembic اضافه می‌شوند؛ با دیتابیس قدیمی سرور شروع نمی‌شود
+check_schema(engine)
 
-app = FastAPI(title=settings.PROJECT_NAME)
+# جداول جمع روزانه تازه ساخته‌شده روی دیتابیس قدیمی یک بار از جداول اصلی پر می‌شوند
+with SessionLocal() as _db:
+    ensure_daily_rollups(_db)
+
+app = FastAPI(title=settings.PROJECT_NAME, default_response_class=ORJSONResponse)
+
+# فشرده‌سازی پاسخ‌های بزرگ بر اساس Accept-Encoding (درونی‌ترین middleware، مستقیم روی پاسخ endpoint)
+if settings.COMPRESSION:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.GZIP_LEVEL,
+        zstd_level=settings.ZSTD_LEVEL,
+    )
 
 # مدیریت دستی درخواست‌های OPTIONS
 @app.middleware("http")
@@ -65,6 +94,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER],
 )
 
 
@@ -93,6 +123,11 @@ app.include_router(money_ledger_router, prefix="/api/v1")
 
 app.include_router(gold_ledger.router, prefix="/api/v1")
 app.include_router(capital_router, prefix="/api/v1")
+app.include_router(jobs_router, prefix="/api/v1")
+app.include_router(balances_router, prefix="/api/v1")
+app.include_router(statements_router, prefix="/api/v1")
+app.include_router(periods_router, prefix="/api/v1")
+app.include_router(dashboard_router, prefix="/api/v1")
 
 
 @app.get("/health")
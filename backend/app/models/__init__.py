@@ -1,2 +1,13 @@
 from .notification import Notification
-from .user import Employee
\ No newline at end of file
+from .user import Employee
+from .shop_expense import ShopExpense
+from .customer import Customer
+from .transaction import Transaction
+from .capital import Capital
+from .gold_ledger import GoldLedger
+from .money_ledger import MoneyLedger
+from .customer_balance import CustomerBalance
+from .change_journal import ChangeJournal, BackupRun
+from .debt import Debt
+from .period_close import PeriodClose, PeriodCustomerBalance
+from .daily_rollup import DailyRollup, DailyCustomerRollup, DailyExpenseRollup
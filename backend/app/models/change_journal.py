@@ -0,0 +1,40 @@
+# app/models/change_journal.py
+
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class ChangeJournal(Base):
+    """
+    دفتر تغییرات (فقط افزودنی) برای بک‌آپ افزایشی
+
+    هر درج، ویرایش یا حذف روی جداول اصلی در همان تراکنش یک ردیف اینجا می‌سازد.
+    data شامل مقادیر ستون‌ها به صورت JSON است (برای حذف فقط کلید اصلی).
+    """
+    __tablename__ = "change_journal"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    table_name = Column(String(64), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    operation = Column(String(10), nullable=False)  # insert / update / delete
+    data = Column(Text, nullable=True)
+    changed_at = Column(DateTime, nullable=False, server_default=func.current_timestamp())
+
+    def __repr__(self):
+        return f"<ChangeJournal(id={self.id}, {self.operation} {self.table_name}#{self.row_id})>"
+
+class BackupRun(Base):
+    """
+    سابقه بک‌آپ‌های دفتر تغییرات؛ to_journal_id آخرین بک‌آپ همان watermark بک‌آپ افزایشی بعدی است
+    """
+    __tablename__ = "backup_runs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String(16), nullable=False)  # full / incremental
+    from_journal_id = Column(Integer, nullable=False, default=0)
+    to_journal_id = Column(Integer, nullable=False, default=0)
+    filename = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.current_timestamp())
+
+    def __repr__(self):
+        return f"<BackupRun(id={self.id}, {self.kind} {self.from_journal_id}..{self.to_journal_id})>"
@@ -0,0 +1,22 @@
+# app/models/customer_balance.py
+
+from sqlalchemy import Column, Integer, Numeric, ForeignKey, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class CustomerBalance(Base):
+    """
+    بیلانس لحظه‌ای هر مشتری (طلا و دالر)
+
+    این جدول در همان تراکنشِ ثبت/ویرایش/حذف روزنامچه‌ها به‌روز می‌شود
+    تا برای ثبت رکورد جدید نیازی به جمع کل تاریخچه نباشد.
+    """
+    __tablename__ = "customer_balances"
+
+    customer_id = Column(Integer, ForeignKey("customers.customer_id", ondelete="CASCADE"), primary_key=True)
+    gold_balance = Column(Numeric(10, 4), nullable=False, default=0)
+    usd_balance = Column(Numeric(15, 2), nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+    def __repr__(self):
+        return f"<CustomerBalance(customer={self.customer_id}, gold={self.gold_balance}, usd={self.usd_balance})>"
@@ -0,0 +1,69 @@
+# app/models/daily_rollup.py
+
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Index
+from app.core.database import Base
+
+# جمع‌های روزانه‌ای که در همان تراکنشِ هر ثبت/ویرایش/حذف به‌روز می‌شوند (app/core/daily_rollup.py)
+# تا داشبورد برای هر بازه تاریخ فقط چند صد ردیف جمع بزند، نه کل جداول اصلی.
+
+class DailyRollup(Base):
+    """
+    جمع‌های روزانه کل دکان: معاملات، روزنامچه طلا و دالر، مصارف
+    """
+    __tablename__ = "daily_rollups"
+
+    day = Column(Date, primary_key=True)
+    buy_count = Column(Integer, nullable=False, default=0)
+    sell_count = Column(Integer, nullable=False, default=0)
+    gold_in = Column(Float, nullable=False, default=0)
+    gold_out = Column(Float, nullable=False, default=0)
+    dollar_in = Column(Float, nullable=False, default=0)
+    dollar_out = Column(Float, nullable=False, default=0)
+    ledger_gold_received = Column(Float, nullable=False, default=0)
+    ledger_gold_paid = Column(Float, nullable=False, default=0)
+    ledger_usd_received = Column(Float, nullable=False, default=0)
+    ledger_usd_paid = Column(Float, nullable=False, default=0)
+    expense_count = Column(Integer, nullable=False, default=0)
+    expense_amount = Column(Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DailyRollup(day={self.day})>"
+
+class DailyCustomerRollup(Base):
+    """
+    جمع‌های روزانه به تفکیک مشتری (معاملات و روزنامچه‌ها)
+    """
+    __tablename__ = "daily_customer_rollups"
+    __table_args__ = (
+        Index("ix_daily_customer_rollups_customer_day", "customer_id", "day"),
+    )
+
+    day = Column(Date, primary_key=True)
+    customer_id = Column(Integer, ForeignKey("customers.customer_id", ondelete="CASCADE"), primary_key=True)
+    buy_count = Column(Integer, nullable=False, default=0)
+    sell_count = Column(Integer, nullable=False, default=0)
+    gold_in = Column(Float, nullable=False, default=0)
+    gold_out = Column(Float, nullable=False, default=0)
+    dollar_in = Column(Float, nullable=False, default=0)
+    dollar_out = Column(Float, nullable=False, default=0)
+    ledger_gold_received = Column(Float, nullable=False, default=0)
+    ledger_gold_paid = Column(Float, nullable=False, default=0)
+    ledger_usd_received = Column(Float, nullable=False, default=0)
+    ledger_usd_paid = Column(Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DailyCustomerRollup(day={self.day}, customer={self.customer_id})>"
+
+class DailyExpenseRollup(Base):
+    """
+    جمع‌های روزانه مصارف دکان به تفکیک نوع مصرف
+    """
+    __tablename__ = "daily_expense_rollups"
+
+    day = Column(Date, primary_key=True)
+    expense_type = Column(String, primary_key=True)
+    expense_count = Column(Integer, nullable=False, default=0)
+    expense_amount = Column(Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DailyExpenseRollup(day={self.day}, type={self.expense_type})>"
@@ -1,5 +1,5 @@
 # path: backend/app/models/debt.py
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from datetime import datetime
@@ -7,6 +7,9 @@ from datetime import datetime
 
 class Debt(Base):
     __tablename__ = "debts"
+    __table_args__ = (
+        Index("ix_debts_customer_date_id", "customer_id", "created_at", "debt_id"),
+    )
 
     debt_id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("customers.customer_id"), nullable=False)
@@ -1,12 +1,17 @@
 # app/models/gold_ledger.py
 
-from sqlalchemy import Column, Integer, Numeric, Text, ForeignKey, TIMESTAMP
+from sqlalchemy import Column, Integer, Numeric, Text, ForeignKey, TIMESTAMP, DateTime, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from sqlalchemy.sql import func
 
 class GoldLedger(Base):
     __tablename__ = "gold_ledger"
+    __table_args__ = (
+        # لیست و بیلانس هر مشتری بر اساس ترتیب زمانی (بدون اسکن کامل و مرتب‌سازی موقت)
+        Index("ix_gold_ledger_customer_date_id", "customer_id", "transaction_date", "gold_ledger_id"),
+        Index("idx_gold_ledger_date", "transaction_date"),
+    )
 
     gold_ledger_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     customer_id = Column(Integer, ForeignKey("customers.customer_id", ondelete="CASCADE"), nullable=False)
@@ -17,6 +22,11 @@ class GoldLedger(Base):
     paid = Column(Numeric(10, 4), nullable=False, default=0)
     heel_purity_carat = Column(Numeric(5, 3), nullable=True)
     balance = Column(Numeric(10, 4), nullable=False, default=0)
+    # ابطال با رکورد معکوس: رکورد اصلی voided_at می‌گیرد و رکورد معکوس به آن اشاره می‌کند
+    voided_at = Column(DateTime, nullable=True)
+    reversal_of_id = Column(Integer, ForeignKey("gold_ledger.gold_ledger_id", ondelete="SET NULL"), nullable=True)
+    # معامله‌ای که این رکورد از آن ثبت شده (post_ledgers)؛ با ویرایش یا حذف معامله ابطال یا حذف می‌شود
+    txn_id = Column(Integer, ForeignKey("transactions.txn_id", ondelete="SET NULL"), nullable=True, index=True)
 
     # روابط
     customer = relationship("Customer", back_populates="gold_ledgers")
@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, Numeric, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, Numeric, Text, ForeignKey, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 class MoneyLedger(Base):
     __tablename__ = "money_ledger"
+    __table_args__ = (
+        # لیست و بیلانس هر مشتری بر اساس ترتیب زمانی (بدون اسکن کامل و مرتب‌سازی موقت)
+        Index("ix_money_ledger_customer_date_id", "customer_id", "transaction_date", "money_ledger_id"),
+        Index("idx_money_ledger_date", "transaction_date"),
+    )
 
     money_ledger_id = Column(Integer, primary_key=True)
     customer_id = Column(Integer, ForeignKey("customers.customer_id"), nullable=False)
@@ -14,6 +19,11 @@ class MoneyLedger(Base):
     received = Column(Numeric(15, 2), nullable=False, default=0)
     paid = Column(Numeric(15, 2), nullable=False, default=0)
     usd_balance = Column(Numeric(15, 2), nullable=False, default=0)  # NOT NULL برای اطمینان از عدم وجود null
+    # ابطال با رکورد معکوس: رکورد اصلی voided_at می‌گیرد و رکورد معکوس به آن اشاره می‌کند
+    voided_at = Column(DateTime, nullable=True)
+    reversal_of_id = Column(Integer, ForeignKey("money_ledger.money_ledger_id", ondelete="SET NULL"), nullable=True)
+    # معامله‌ای که این رکورد از آن ثبت شده (post_ledgers)؛ با ویرایش یا حذف معامله ابطال یا حذف می‌شود
+    txn_id = Column(Integer, ForeignKey("transactions.txn_id", ondelete="SET NULL"), nullable=True, index=True)
 
     customer = relationship("Customer", back_populates="money_ledgers")
     capital = relationship("Capital", back_populates="money_ledgers")
\ No newline at end of file
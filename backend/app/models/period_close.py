@@ -0,0 +1,55 @@
+# app/models/period_close.py
+
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, DateTime, UniqueConstraint, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+PERIOD_CLOSED = "closed"
+PERIOD_REOPENED = "reopened"
+
+class PeriodClose(Base):
+    """
+    بستن دوره ماهانه (ماه جلالی): بیلانس پایان ماه هر مشتری و جمع‌های کل دکان
+
+    محاسبات تاریخی از نزدیک‌ترین دوره بسته شروع می‌شوند و فقط رکوردهای بعد از end_at جمع زده می‌شوند.
+    ثبت/ویرایش با تاریخ قبل از end_at دوره را (و همه دوره‌های بعدی را) reopened می‌کند تا دوباره بسته شود.
+    """
+    __tablename__ = "period_closes"
+    __table_args__ = (
+        UniqueConstraint("jalali_year", "jalali_month", name="uq_period_closes_jalali_month"),
+        Index("ix_period_closes_status_end", "status", "end_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    jalali_year = Column(Integer, nullable=False)
+    jalali_month = Column(Integer, nullable=False)
+    # بازه میلادی ماه: [start_at, end_at)
+    start_at = Column(DateTime, nullable=False)
+    end_at = Column(DateTime, nullable=False)
+    status = Column(String(16), nullable=False, default=PERIOD_CLOSED)
+    # جمع بیلانس پایان ماه همه مشتریان
+    gold_balance_total = Column(Numeric(14, 4), nullable=False, default=0)
+    usd_balance_total = Column(Numeric(17, 2), nullable=False, default=0)
+    # جمع سرمایه ثبت‌شده تا پایان ماه (capital_records)
+    capital_count = Column(Integer, nullable=False, default=0)
+    capital_usd = Column(Numeric(15, 2), nullable=False, default=0)
+    capital_gold = Column(Numeric(10, 4), nullable=False, default=0)
+    closed_at = Column(DateTime, nullable=False, server_default=func.current_timestamp())
+    reopened_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<PeriodClose({self.jalali_year}/{self.jalali_month:02d}, {self.status})>"
+
+class PeriodCustomerBalance(Base):
+    """
+    بیلانس طلا و دالر هر مشتری در پایان یک دوره بسته
+    """
+    __tablename__ = "period_customer_balances"
+
+    period_id = Column(Integer, ForeignKey("period_closes.id", ondelete="CASCADE"), primary_key=True)
+    customer_id = Column(Integer, ForeignKey("customers.customer_id", ondelete="CASCADE"), primary_key=True)
+    gold_balance = Column(Numeric(10, 4), nullable=False, default=0)
+    usd_balance = Column(Numeric(15, 2), nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<PeriodCustomerBalance(period={self.period_id}, customer={self.customer_id})>"
@@ -2,13 +2,17 @@
 # آدرس: دانشگاه تخار، دانشکده علوم کامپیوتر.
 
 # backend/app/models/shop_expense.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
 
 class ShopExpense(Base):
     __tablename__ = "shop_expenses"
+    __table_args__ = (
+        # صفحه‌بندی cursor بر اساس (expense_date, expense_id)
+        Index("ix_shop_expenses_date_id", "expense_date", "expense_id"),
+    )
 
     expense_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     expense_type = Column(String, nullable=False)
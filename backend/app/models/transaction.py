@@ -4,12 +4,16 @@
 # آدرس: دانشگاه تخار، دانشکده علوم کامپیوتر.
 
 #backend/app/models/transaction.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, func
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Index, func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # لیست معاملات هر مشتری بر اساس تاریخ
+        Index("ix_transactions_customer_date_id", "customer_id", "date", "txn_id"),
+    )
 
     txn_id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("customers.customer_id"), nullable=False)
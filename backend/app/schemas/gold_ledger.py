@@ -1,7 +1,7 @@
 # app/schemas/gold_ledger.py
 
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 
@@ -54,9 +54,23 @@ class GoldLedgerOut(GoldLedgerBase):
     gold_ledger_id: int
     balance: float
     transaction_date: datetime
+    voided_at: Optional[datetime] = None
+    reversal_of_id: Optional[int] = None
+    txn_id: Optional[int] = None
 
     class Config:
         from_attributes = True
         json_encoders = {
             Decimal: lambda v: float(v)
-        }
\ No newline at end of file
+        }
+
+class GoldLedgerBatchResult(BaseModel):
+    index: int
+    ok: bool
+    record: Optional[GoldLedgerOut] = None
+    error: Optional[str] = None
+
+class GoldLedgerBatchOut(BaseModel):
+    created: int
+    failed: int
+    results: List[GoldLedgerBatchResult]
@@ -0,0 +1,27 @@
+# app/schemas/ledger_batch.py
+# درخواست‌های ثبت و حذف گروهی روزنامچه‌های طلا و دالر
+
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+# حداکثر تعداد ردیف در هر درخواست گروهی
+LEDGER_BATCH_MAX = 1000
+
+class LedgerBatchIn(BaseModel):
+    # ردیف‌ها جداگانه اعتبارسنجی می‌شوند تا خطای یک ردیف کل درخواست را رد نکند
+    entries: List[Dict[str, Any]] = Field(..., min_length=1, max_length=LEDGER_BATCH_MAX)
+
+class LedgerBatchDeleteIn(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=LEDGER_BATCH_MAX)
+
+class LedgerBatchDeleteResult(BaseModel):
+    id: int
+    ok: bool
+    # در حالت ابطال (LEDGER_DELETE_MODE=void) شناسه رکورد معکوس
+    reversal_id: Optional[int] = None
+    error: Optional[str] = None
+
+class LedgerBatchDeleteOut(BaseModel):
+    deleted: int
+    failed: int
+    results: List[LedgerBatchDeleteResult]
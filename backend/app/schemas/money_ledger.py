@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from decimal import Decimal
 
 class MoneyLedgerBase(BaseModel):
@@ -50,9 +50,23 @@ class MoneyLedgerOut(MoneyLedgerBase):
     money_ledger_id: int
     usd_balance: float
     transaction_date: datetime
+    voided_at: Optional[datetime] = None
+    reversal_of_id: Optional[int] = None
+    txn_id: Optional[int] = None
 
     class Config:
         from_attributes = True
         json_encoders = {
             Decimal: lambda v: float(v)
-        }
\ No newline at end of file
+        }
+
+class MoneyLedgerBatchResult(BaseModel):
+    index: int
+    ok: bool
+    record: Optional[MoneyLedgerOut] = None
+    error: Optional[str] = None
+
+class MoneyLedgerBatchOut(BaseModel):
+    created: int
+    failed: int
+    results: List[MoneyLedgerBatchResult]
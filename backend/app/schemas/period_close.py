@@ -0,0 +1,34 @@
+# app/schemas/period_close.py
+
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+class PeriodCustomerBalanceOut(BaseModel):
+    customer_id: int
+    gold_balance: float
+    usd_balance: float
+
+    class Config:
+        from_attributes = True
+
+class PeriodCloseOut(BaseModel):
+    id: int
+    jalali_year: int
+    jalali_month: int
+    start_at: datetime
+    end_at: datetime
+    status: str
+    gold_balance_total: float
+    usd_balance_total: float
+    capital_count: int
+    capital_usd: float
+    capital_gold: float
+    closed_at: datetime
+    reopened_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class PeriodCloseDetailOut(PeriodCloseOut):
+    customers: List[PeriodCustomerBalanceOut] = []
@@ -28,16 +28,14 @@ class TransactionBase(BaseModel):
     date: str
 
 class TransactionCreate(TransactionBase):
-    # هنگام ایجاد، فرانت اند باید بالانس‌های اولیه را محاسبه و ارسال کند
-    dollar_balance: float
-    gold_balance: float
-    pass
+    # بالانس‌ها در سرور از روی معاملات قبلی مشتری محاسبه می‌شوند؛ مقادیر ارسالی (برای سازگاری با نسخه‌های قبلی فرانت‌اند) نادیده گرفته می‌شوند
+    dollar_balance: Optional[float] = None
+    gold_balance: Optional[float] = None
 
 class TransactionUpdate(TransactionBase):
-    # هنگام بروزرسانی، ممکن است بالانس‌ها نیز نیاز به به‌روزرسانی داشته باشند
-    dollar_balance: float
-    gold_balance: float
-    pass
+    # بالانس این معامله و معاملات بعدی در سرور دوباره محاسبه می‌شوند
+    dollar_balance: Optional[float] = None
+    gold_balance: Optional[float] = None
 
 class TransactionInDBBase(TransactionBase):
     txn_id: int
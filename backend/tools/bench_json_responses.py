@@ -0,0 +1,121 @@
+"""
+بنچمارک سریال‌سازی JSON و فشرده‌سازی پاسخ برای لیست‌های بزرگ (لیست مصارف دکان)
+
+بخش اول روی یک دیتابیس موقت با N ردیف، دو مسیر سریال‌سازی را در همین پروسه مقایسه می‌کند:
+  legacy: from_orm(...).model_dump() برای هر ردیف، اعتبارسنجی دوباره با response_model و json.dumps (JSONResponse)
+  fast:   یک بار model_validate برای هر ردیف و ORJSONResponse
+بخش دوم همان لیست را از GET /shop-expenses/ با Accept-Encoding های مختلف می‌گیرد و
+زمان و حجم بدنه روی سیم را گزارش می‌کند (zstd فقط اگر بسته zstandard نصب باشد).
+
+اجرا از پوشه backend:
+    python tools/bench_json_responses.py
+    python tools/bench_json_responses.py --rows 10000 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def timed(fn, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        began = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - began)
+    return statistics.median(samples) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="بنچمارک سریال‌سازی و فشرده‌سازی پاسخ JSON")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="gold_json_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    sys.path.insert(0, BACKEND_DIR)
+    # لاگ برنامه (app.log) و پوشه static (لازم برای mount) در پوشه موقت ساخته می‌شوند
+    os.makedirs(os.path.join(tmpdir, "static"), exist_ok=True)
+    os.chdir(tmpdir)
+
+    from datetime import datetime, timedelta
+    from typing import List
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from fastapi.testclient import TestClient
+    from pydantic import TypeAdapter
+    import app.main as main_module
+    from app.core.compression import available_encodings
+    from app.core.database import SessionLocal
+    from app.core.responses import ORJSONResponse
+    from app.core.security import get_current_user
+    from app.models.shop_expense import ShopExpense
+    from app.schemas.shop_expense import ShopExpenseOut
+    from app.api.v1.shop_expenses import expense_out, utc_to_kabul_jalali
+
+    db = SessionLocal()
+    start = datetime(2024, 1, 1)
+    types = ["برق", "کرایه", "نان چاشت", "ترانسپورت", "متفرقه"]
+    db.bulk_insert_mappings(ShopExpense, [
+        {
+            "expense_type": types[n % len(types)],
+            "amount": 100 + n % 900,
+            "expense_date": start + timedelta(minutes=17 * n),
+            "description": f"مصرف شماره {n} برای بنچمارک",
+        }
+        for n in range(args.rows)
+    ])
+    db.commit()
+    rows = db.query(ShopExpense).all()
+
+    adapter = TypeAdapter(List[ShopExpenseOut])
+
+    def legacy():
+        out = []
+        for r in rows:
+            item = ShopExpenseOut.from_orm(r).model_dump()
+            item["expense_date_jalali"] = utc_to_kabul_jalali(r.expense_date)
+            out.append(item)
+        # مثل FastAPI: اعتبارسنجی با response_model، تبدیل به JSON-able و JSONResponse
+        content = jsonable_encoder(adapter.dump_python(adapter.validate_python(out), mode="json"))
+        return JSONResponse(content).body
+
+    def fast():
+        return ORJSONResponse([expense_out(r) for r in rows]).body
+
+    legacy_ms, legacy_body = timed(legacy, args.repeat)
+    fast_ms, fast_body = timed(fast, args.repeat)
+    db.close()
+
+    print(f"ردیف: {args.rows}، تکرار: {args.repeat} (میانه)")
+    print(f"{'مسیر':<8} {'زمان (ms)':>10} {'بایت':>12}")
+    print(f"{'legacy':<8} {legacy_ms:>10.1f} {len(legacy_body):>12}")
+    print(f"{'fast':<8} {fast_ms:>10.1f} {len(fast_body):>12}")
+    print(f"سرعت: {legacy_ms / fast_ms:.1f}x، خروجی یکسان: {'بله' if legacy_body == fast_body else 'خیر'}")
+
+    main_module.app.dependency_overrides[get_current_user] = lambda: {"sub": "bench", "role": "admin"}
+    client = TestClient(main_module.app)
+    url = f"/api/v1/shop-expenses/?limit={args.rows}"
+    print()
+    print(f"{'Accept-Encoding':<16} {'زمان (ms)':>10} {'بایت روی سیم':>14} {'نسبت':>7}")
+    identity_bytes = None
+    for encoding in ["identity", *available_encodings()]:
+        def request():
+            # iter_raw بدنه را همان‌طور که روی سیم آمده (قبل از باز کردن فشرده‌سازی) برمی‌گرداند
+            with client.stream("GET", url, headers={"Accept-Encoding": encoding}) as response:
+                return b"".join(response.iter_raw())
+        ms, raw = timed(request, args.repeat)
+        wire = len(raw)
+        identity_bytes = identity_bytes or wire
+        print(f"{encoding:<16} {ms:>10.1f} {wire:>14} {identity_bytes / wire:>6.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+بنچمارک پروفایل اتصال SQLite: ثبت هم‌زمان روزنامچه طلا و خواندن لیست آن
+
+برای هر پروفایل (default و performance) یک پروسه جداگانه با دیتابیس موقت اجرا می‌شود
+(تنظیمات engine هنگام import خوانده می‌شوند). نویسنده‌ها create_gold_ledger و خواننده‌ها
+get_gold_ledgers را در نخ‌های جداگانه صدا می‌زنند؛ تعداد عملیات در ثانیه و خطاها گزارش می‌شود.
+
+اجرا از پوشه backend:
+    python tools/bench_sqlite_profile.py
+    python tools/bench_sqlite_profile.py --writers 8 --readers 8 --seconds 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CUSTOMERS = 20
+SEED_ROWS_PER_CUSTOMER = 200
+
+
+def run_worker(args):
+    """
+    اجرای بنچمارک در همین پروسه (DATABASE_URL و DB_PROFILE از والد آمده‌اند)
+    """
+    sys.path.insert(0, BACKEND_DIR)
+    from datetime import datetime, timedelta
+    from app.core.database import Base, SessionLocal, engine
+    import app.models  # noqa: F401
+    from app.models.customer import Customer
+    from app.models.gold_ledger import GoldLedger
+    from app.crud.customer_balance import rebuild_customer_balances
+    from app.crud.gold_ledger import create_gold_ledger, get_gold_ledgers
+    from app.schemas.gold_ledger import GoldLedgerCreate
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    start = datetime(2024, 1, 1)
+    customers = [Customer(full_name=f"مشتری {i}") for i in range(CUSTOMERS)]
+    db.add_all(customers)
+    db.flush()
+    customer_ids = [c.customer_id for c in customers]
+    for customer_id in customer_ids:
+        db.add_all([
+            GoldLedger(customer_id=customer_id, description="نمونه", received=1, paid=0,
+                       balance=n + 1, transaction_date=start + timedelta(hours=n))
+            for n in range(SEED_ROWS_PER_CUSTOMER)
+        ])
+    db.commit()
+    rebuild_customer_balances(db)
+    db.close()
+
+    counts = {"writes": 0, "reads": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.seconds
+    write_latencies = []
+
+    def writer(index):
+        n = 0
+        while time.monotonic() < deadline:
+            session = SessionLocal()
+            began = time.monotonic()
+            try:
+                create_gold_ledger(session, GoldLedgerCreate(
+                    customer_id=customer_ids[(index + n) % len(customer_ids)],
+                    description="bench",
+                    received=1,
+                    paid=0,
+                    transaction_date=start + timedelta(days=365, seconds=n),
+                ))
+                with lock:
+                    counts["writes"] += 1
+                    write_latencies.append(time.monotonic() - began)
+            except Exception:
+                with lock:
+                    counts["errors"] += 1
+            finally:
+                session.close()
+            n += 1
+
+    def reader(index):
+        n = 0
+        while time.monotonic() < deadline:
+            session = SessionLocal()
+            try:
+                get_gold_ledgers(session, customer_id=customer_ids[(index + n) % len(customer_ids)], limit=50)
+                with lock:
+                    counts["reads"] += 1
+            except Exception:
+                with lock:
+                    counts["errors"] += 1
+            finally:
+                session.close()
+            n += 1
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    write_latencies.sort()
+    p95 = write_latencies[int(len(write_latencies) * 0.95)] if write_latencies else 0
+    print(json.dumps({
+        "writes_per_sec": round(counts["writes"] / args.seconds, 1),
+        "reads_per_sec": round(counts["reads"] / args.seconds, 1),
+        "errors": counts["errors"],
+        "write_p95_ms": round(p95 * 1000, 1),
+    }))
+
+
+def run_profile(profile, args):
+    tmpdir = tempfile.mkdtemp(prefix=f"gold_bench_{profile}_")
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    env["DB_PROFILE"] = profile
+    cmd = [
+        sys.executable, os.path.abspath(__file__), "--worker",
+        "--writers", str(args.writers), "--readers", str(args.readers), "--seconds", str(args.seconds),
+    ]
+    # لاگ برنامه (app.log) در پوشه موقت نوشته می‌شود
+    out = subprocess.run(cmd, env=env, cwd=tmpdir, capture_output=True, text=True)
+    if out.returncode != 0:
+        print(out.stderr, file=sys.stderr)
+        raise SystemExit(f"❌ اجرای پروفایل {profile} ناموفق بود")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="بنچمارک پروفایل‌های اتصال SQLite")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return 0
+
+    print(f"نویسنده: {args.writers}، خواننده: {args.readers}، مدت: {args.seconds} ثانیه")
+    results = {profile: run_profile(profile, args) for profile in ("default", "performance")}
+    print(f"{'پروفایل':<12} {'ثبت/ثانیه':>10} {'خواندن/ثانیه':>13} {'p95 ثبت (ms)':>13} {'خطا':>6}")
+    for profile, r in results.items():
+        print(f"{profile:<12} {r['writes_per_sec']:>10} {r['reads_per_sec']:>13} {r['write_p95_ms']:>13} {r['errors']:>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
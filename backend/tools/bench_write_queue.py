@@ -0,0 +1,119 @@
+"""
+بنچمارک صف نوشتن گروهی: ثبت هم‌زمان روزنامچه طلا با commit جداگانه در برابر write_queue
+
+هر دو حالت روی یک دیتابیس موقت و با پروفایل اتصال فعلی (DB_PROFILE) اجرا می‌شوند.
+در حالت مستقیم هر نویسنده create_gold_ledger (یک commit و یک refresh برای هر رکورد) را صدا می‌زند
+و در حالت صف، write_queue.run(add_gold_ledger) که ثبت‌های هم‌زمان را با یک commit می‌نویسد.
+
+اجرا از پوشه backend:
+    python tools/bench_write_queue.py
+    python tools/bench_write_queue.py --writers 32 --seconds 10 --window-ms 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CUSTOMERS = 20
+
+
+def run_mode(name, write, customer_ids, args):
+    from datetime import datetime, timedelta
+    from app.schemas.gold_ledger import GoldLedgerCreate
+
+    counts = {"writes": 0, "errors": 0}
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.seconds
+    start = datetime(2024, 1, 1)
+
+    def writer(index):
+        n = 0
+        while time.monotonic() < deadline:
+            began = time.monotonic()
+            try:
+                write(GoldLedgerCreate(
+                    customer_id=customer_ids[(index + n) % len(customer_ids)],
+                    description=f"bench {name}",
+                    received=1,
+                    paid=0,
+                    transaction_date=start + timedelta(seconds=index * 1000000 + n),
+                ))
+                with lock:
+                    counts["writes"] += 1
+                    latencies.append(time.monotonic() - began)
+            except Exception:
+                with lock:
+                    counts["errors"] += 1
+            n += 1
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+    return {
+        "writes_per_sec": round(counts["writes"] / args.seconds, 1),
+        "write_p95_ms": round(p95 * 1000, 1),
+        "errors": counts["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="بنچمارک صف نوشتن گروهی")
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--window-ms", type=int, default=5)
+    parser.add_argument("--max-batch", type=int, default=100)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="gold_write_queue_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    # لاگ برنامه (app.log) در پوشه موقت نوشته می‌شود
+    os.chdir(tmpdir)
+    sys.path.insert(0, BACKEND_DIR)
+
+    from app.core.database import Base, SessionLocal, engine
+    import app.models  # noqa: F401
+    from app.models.customer import Customer
+    from app.core.write_queue import WriteQueue
+    from app.crud.customer_balance import rebuild_customer_balances
+    from app.crud.gold_ledger import add_gold_ledger, create_gold_ledger
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    customers = [Customer(full_name=f"مشتری {i}") for i in range(CUSTOMERS)]
+    db.add_all(customers)
+    db.commit()
+    customer_ids = [c.customer_id for c in customers]
+    rebuild_customer_balances(db)
+    db.close()
+
+    def direct(ledger):
+        session = SessionLocal()
+        try:
+            create_gold_ledger(session, ledger)
+        finally:
+            session.close()
+
+    queue = WriteQueue(window_ms=args.window_ms, max_batch=args.max_batch)
+
+    print(f"نویسنده: {args.writers}، مدت: {args.seconds} ثانیه، پنجره صف: {args.window_ms} ms")
+    results = {
+        "direct": run_mode("direct", direct, customer_ids, args),
+        "queued": run_mode("queued", lambda ledger: queue.run(add_gold_ledger, ledger), customer_ids, args),
+    }
+    print(f"{'حالت':<8} {'ثبت/ثانیه':>10} {'p95 ثبت (ms)':>13} {'خطا':>6}")
+    for mode, r in results.items():
+        print(f"{mode:<8} {r['writes_per_sec']:>10} {r['write_p95_ms']:>13} {r['errors']:>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
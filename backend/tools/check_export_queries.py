@@ -0,0 +1,143 @@
+"""
+بررسی تعداد کوئری‌های مسیرهای خروجی (گزارش جامع، بل مشتری، بک‌آپ اکسل)
+
+هر خروجی یک بار روی داده کم و یک بار روی داده زیاد اجرا و تعداد دستورات SQL شمرده می‌شود.
+تعداد کوئری‌ها نباید با تعداد ردیف‌ها رشد کند (مشکل N+1)؛ در غیر این صورت اسکریپت با کد 1 خارج می‌شود.
+
+اجرا از پوشه backend:
+    python tools/check_export_queries.py
+"""
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# دیتابیس موقت باید قبل از import برنامه تنظیم شود
+_tmpdir = tempfile.mkdtemp(prefix="gold_exports_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'exports.db')}"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event
+
+from app.core.database import Base, SessionLocal, engine
+import app.models  # noqa: F401
+from app.models.customer import Customer
+from app.models.gold_ledger import GoldLedger
+from app.models.money_ledger import MoneyLedger
+from app.models.transaction import Transaction
+from app.api.v1 import backup
+from app.api.v1.invoices import customer_invoice_csv
+from app.api.v1.reports import full_report_rows
+
+SMALL_CUSTOMERS = 2
+LARGE_CUSTOMERS = 40
+ROWS_PER_CUSTOMER = 5
+# تعداد ردیف‌های آخرین مشتری در مرحله داده زیاد (برای بل مشتری)
+LARGE_CUSTOMER_ROWS = 200
+# سقف مجاز دستورات SQL برای هر خروجی (مستقل از تعداد ردیف)
+MAX_STATEMENTS = 20
+
+# آخرین مشتری ساخته‌شده برای بل مشتری
+_last_customer_id = None
+
+
+def seed(db, customers, rows_per_customer=ROWS_PER_CUSTOMER):
+    global _last_customer_id
+    start = datetime(2024, 1, 1)
+    for i in range(customers):
+        customer = Customer(full_name=f"مشتری {i}")
+        db.add(customer)
+        db.flush()
+        _last_customer_id = customer.customer_id
+        for n in range(rows_per_customer):
+            day = start + timedelta(days=n)
+            db.add(GoldLedger(customer_id=customer.customer_id, description="نمونه", received=1, paid=0,
+                              balance=n + 1, transaction_date=day))
+            db.add(MoneyLedger(customer_id=customer.customer_id, description="نمونه", received=10, paid=0,
+                               usd_balance=10 * (n + 1), transaction_date=day))
+            db.add(Transaction(customer_id=customer.customer_id, type="buy", weight=1, source_carat=23.88,
+                               gold_rate=1, gold_amount=1, gold_in=1, dollar_out=1,
+                               dollar_balance=0, gold_balance=0, date=day.strftime("%Y-%m-%dT%H:%M")))
+    db.commit()
+
+
+@contextmanager
+def count_statements():
+    """
+    شمارش دستورات SQL اجراشده روی engine در طول بلوک
+    """
+    counter = {"count": 0}
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        counter["count"] += 1
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+
+def run_full_report(db):
+    # generator گزارش session خودش را باز می‌کند
+    for _ in full_report_rows():
+        pass
+
+
+def run_invoice_csv(db):
+    # فایل بل قبل از برگرداندن پاسخ کامل ساخته می‌شود
+    customer_invoice_csv(_last_customer_id, db)
+
+
+def run_excel_backup(db):
+    filepath, _ = backup.create_excel_backup(db)
+    os.remove(filepath)
+
+
+EXPORTS = [
+    ("گزارش جامع CSV", run_full_report),
+    ("بل مشتری CSV", run_invoice_csv),
+    ("بک‌آپ اکسل", run_excel_backup),
+]
+
+
+def measure(db):
+    counts = {}
+    for name, fn in EXPORTS:
+        db.expire_all()
+        with count_statements() as counter:
+            fn(db)
+        counts[name] = counter["count"]
+    return counts
+
+
+def main():
+    backup.EXPORT_DIR = _tmpdir
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seed(db, SMALL_CUSTOMERS)
+        small = measure(db)
+        seed(db, LARGE_CUSTOMERS - SMALL_CUSTOMERS - 1)
+        seed(db, 1, LARGE_CUSTOMER_ROWS)
+        large = measure(db)
+    finally:
+        db.close()
+
+    failures = 0
+    for name, _ in EXPORTS:
+        ok = large[name] == small[name] and large[name] <= MAX_STATEMENTS
+        print(f"{'✅' if ok else '❌'} {name}: {small[name]} کوئری برای داده کم، {large[name]} کوئری برای داده زیاد")
+        if not ok:
+            failures += 1
+
+    if failures:
+        print(f"\n❌ تعداد کوئری {failures} خروجی با تعداد ردیف‌ها رشد می‌کند.")
+        return 1
+    print("\n✅ تعداد کوئری همه خروجی‌ها مستقل از تعداد ردیف‌ها است.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
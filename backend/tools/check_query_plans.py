@@ -0,0 +1,138 @@
+"""
+بررسی رگرسیون طرح اجرای کوئری‌های پرتکرار لیست (EXPLAIN QUERY PLAN)
+
+یک دیتابیس SQLite موقت ساخته و با داده نمونه پر می‌شود، سپس توابع واقعی CRUD اجرا
+و SQL آن‌ها ضبط می‌شود. اگر طرح اجرای هر کدام به اسکن کامل جدول برسد، اسکریپت با کد 1 خارج می‌شود.
+
+اجرا از پوشه backend:
+    python tools/check_query_plans.py
+"""
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# دیتابیس موقت باید قبل از import برنامه تنظیم شود
+_tmpdir = tempfile.mkdtemp(prefix="gold_plans_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'plans.db')}"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event, text
+
+from app.core.database import Base, SessionLocal, engine
+import app.models  # noqa: F401
+from app.models.customer import Customer
+from app.models.debt import Debt
+from app.models.gold_ledger import GoldLedger
+from app.models.money_ledger import MoneyLedger
+from app.models.transaction import Transaction
+from app.crud.gold_ledger import get_gold_ledgers
+from app.crud.money_ledger import get_money_ledgers
+from app.crud.transaction import get_transactions
+
+CUSTOMERS = 50
+ROWS_PER_CUSTOMER = 40
+
+# «SCAN جدول» بدون USING INDEX یعنی اسکن کامل جدول
+TABLE_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+def seed(db):
+    start = datetime(2024, 1, 1)
+    customers = [Customer(full_name=f"مشتری {i}") for i in range(CUSTOMERS)]
+    db.add_all(customers)
+    db.flush()
+    for c in customers:
+        for n in range(ROWS_PER_CUSTOMER):
+            day = start + timedelta(days=n, hours=c.customer_id)
+            db.add(GoldLedger(customer_id=c.customer_id, description="نمونه", received=1, paid=0,
+                              balance=n + 1, transaction_date=day))
+            db.add(MoneyLedger(customer_id=c.customer_id, description="نمونه", received=10, paid=0,
+                               usd_balance=10 * (n + 1), transaction_date=day))
+            db.add(Transaction(customer_id=c.customer_id, type="buy", weight=1, source_carat=23.88,
+                               gold_rate=1, gold_amount=1, gold_in=1, dollar_out=1,
+                               dollar_balance=0, gold_balance=0, date=day.strftime("%Y-%m-%dT%H:%M")))
+            db.add(Debt(customer_id=c.customer_id, employee_id=1, gold_grams=1, created_at=day))
+    db.commit()
+    db.execute(text("ANALYZE"))
+
+
+def capture(db, fn):
+    """
+    اجرای یک تابع CRUD و برگرداندن SELECTهای اجراشده همراه با پارامترها
+    """
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        fn(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return statements
+
+
+def explain(statement, parameters):
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    finally:
+        raw.close()
+
+
+HOT_QUERIES = [
+    ("gold_ledger: مشتری", lambda db: get_gold_ledgers(db, customer_id=7, limit=10)),
+    ("gold_ledger: مشتری + بازه تاریخ", lambda db: get_gold_ledgers(db, customer_id=7, start_date="2024-01-05", end_date="2024-01-20")),
+    ("gold_ledger: بازه تاریخ", lambda db: get_gold_ledgers(db, start_date="2024-01-05", end_date="2024-01-20")),
+    ("gold_ledger: بدون فیلتر", lambda db: get_gold_ledgers(db, limit=10)),
+    ("gold_ledger: مشتری + cursor", lambda db: get_gold_ledgers(db, customer_id=7, limit=10, after=("2024-01-20T07:00:00", 10 ** 9))),
+    ("money_ledger: مشتری", lambda db: get_money_ledgers(db, customer_id=7, limit=10)),
+    ("money_ledger: مشتری + بازه تاریخ", lambda db: get_money_ledgers(db, customer_id=7, start_date="2024-01-05", end_date="2024-01-20")),
+    ("money_ledger: بازه تاریخ", lambda db: get_money_ledgers(db, start_date="2024-01-05", end_date="2024-01-20")),
+    ("money_ledger: بدون فیلتر", lambda db: get_money_ledgers(db, limit=10)),
+    ("money_ledger: مشتری + cursor", lambda db: get_money_ledgers(db, customer_id=7, limit=10, after=("2024-01-20T07:00:00", 10 ** 9))),
+    ("transactions: مشتری", lambda db: get_transactions(db, customer_id=7)),
+    ("transactions: مشتری + cursor", lambda db: get_transactions(db, customer_id=7, after=("2024-01-20T07:00", 10 ** 9))),
+    ("debts: مشتری", lambda db: db.query(Debt).filter(Debt.customer_id == 7).order_by(Debt.created_at.desc()).all()),
+]
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    failures = 0
+    try:
+        seed(db)
+        for name, fn in HOT_QUERIES:
+            statements = capture(db, fn)
+            if not statements:
+                print(f"❌ {name}: هیچ کوئری‌ای ضبط نشد")
+                failures += 1
+                continue
+            for statement, parameters in statements:
+                plan = explain(statement, parameters)
+                scans = [line for line in plan if TABLE_SCAN.match(line.strip())]
+                status = "❌" if scans else "✅"
+                print(f"{status} {name}")
+                for line in plan:
+                    print(f"      {line}")
+                if scans:
+                    failures += 1
+    finally:
+        db.close()
+
+    if failures:
+        print(f"\n❌ {failures} کوئری به اسکن کامل جدول رسید.")
+        return 1
+    print("\n✅ همه کوئری‌های پرتکرار از ایندکس استفاده می‌کنند.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+بررسی رکوردهای روزنامچه معاملات ثبت‌شده با post_ledgers در ویرایش و حذف معامله
+
+روی یک دیتابیس SQLite موقت، برای هر دو حالت LEDGER_DELETE_MODE (void و delete) یک مشتری ساخته و:
+  - یک معامله خرید با post_ledgers و یک رکورد روزنامچه مستقل بعد از آن ثبت می‌شود
+  - معامله ویرایش می‌شود (مقادیر و تاریخ): رکوردهای قبلی ابطال/حذف و رکوردهای جدید ثبت شوند
+  - معامله حذف می‌شود: هیچ رکورد فعالی از معامله نماند
+بعد از هر مرحله بررسی می‌شود:
+  - جمع رکوردهای فعال وصل به معامله برابر ورودی/خروجی فعلی معامله باشد
+  - بیلانس لحظه‌ای هر رکورد و جدول بیلانس مشتری با جمع روزنامچه برابر باشد
+در صورت مغایرت، کد خروج ۱ است.
+
+اجرا از پوشه backend:
+    python tools/check_transaction_ledgers.py
+"""
+import os
+import sys
+import tempfile
+from decimal import Decimal
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def check_running(db, model, id_attr, balance_attr, customer_id, stored_total):
+    from sqlalchemy import select
+    rows = db.execute(
+        select(model.received, model.paid, getattr(model, balance_attr))
+        .where(model.customer_id == customer_id)
+        .order_by(model.transaction_date, getattr(model, id_attr))
+    ).all()
+    problems = []
+    running = Decimal("0")
+    bad_rows = 0
+    for received, paid, balance in rows:
+        running += Decimal(str(received)) - Decimal(str(paid))
+        if Decimal(str(balance)) != running:
+            bad_rows += 1
+    if bad_rows:
+        problems.append(f"{model.__tablename__}: {bad_rows} رکورد با بیلانس لحظه‌ای نادرست")
+    if Decimal(str(stored_total)) != running:
+        problems.append(f"{model.__tablename__}: بیلانس مشتری {stored_total} ≠ جمع روزنامچه {running}")
+    return problems
+
+
+def linked_net(db, model, txn_id):
+    rows = db.query(model).filter(
+        model.txn_id == txn_id, model.voided_at.is_(None), model.reversal_of_id.is_(None)
+    ).all()
+    return len(rows), sum((Decimal(str(r.received)) - Decimal(str(r.paid)) for r in rows), Decimal("0"))
+
+
+def main():
+    tmpdir = tempfile.mkdtemp(prefix="gold_txn_ledgers_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'check.db')}"
+    # لاگ برنامه (app.log) در پوشه موقت نوشته می‌شود
+    os.chdir(tmpdir)
+    sys.path.insert(0, BACKEND_DIR)
+
+    from datetime import datetime
+    from app.core.database import Base, SessionLocal, engine
+    import app.models  # noqa: F401
+    from app.models.customer import Customer
+    from app.models.customer_balance import CustomerBalance
+    from app.models.gold_ledger import GoldLedger
+    from app.models.money_ledger import MoneyLedger
+    from app.crud.gold_ledger import create_gold_ledger
+    from app.crud.transaction import create_transaction, delete_transaction, get_transaction, update_transaction
+    from app.schemas.gold_ledger import GoldLedgerCreate
+    from app.schemas.transaction import TransactionCreate, TransactionUpdate
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    problems = []
+
+    def trade(customer_id, date, gold_in, dollar_out):
+        return dict(
+            customer_id=customer_id, type="buy", date=date, weight=gold_in, source_carat=23, gold_rate=50,
+            gold_amount=gold_in, gold_in=gold_in, gold_out=0, dollar_in=0, dollar_out=dollar_out,
+        )
+
+    def verify(mode, step, customer_id, txn_id, expected_gold, expected_usd, unlinked_gold):
+        db.expire_all()
+        snapshot = db.get(CustomerBalance, customer_id)
+        found = []
+        found += check_running(db, GoldLedger, "gold_ledger_id", "balance", customer_id, snapshot.gold_balance)
+        found += check_running(db, MoneyLedger, "money_ledger_id", "usd_balance", customer_id, snapshot.usd_balance)
+        _, gold_net = linked_net(db, GoldLedger, txn_id)
+        _, usd_net = linked_net(db, MoneyLedger, txn_id)
+        if gold_net != expected_gold or usd_net != expected_usd:
+            found.append(f"رکوردهای فعال معامله: طلا {gold_net} (انتظار {expected_gold})، دالر {usd_net} (انتظار {expected_usd})")
+        if Decimal(str(snapshot.gold_balance)) != expected_gold + unlinked_gold:
+            found.append(f"بیلانس طلای مشتری {snapshot.gold_balance} ≠ {expected_gold + unlinked_gold}")
+        if Decimal(str(snapshot.usd_balance)) != expected_usd:
+            found.append(f"بیلانس دالر مشتری {snapshot.usd_balance} ≠ {expected_usd}")
+        problems.extend(f"{mode} / {step}: {p}" for p in found)
+        print(f"{mode:<7} {step:<8} {'✅' if not found else '❌'}")
+
+    for mode in ("void", "delete"):
+        void_ledgers = mode == "void"
+        customer = Customer(full_name=f"مشتری بررسی {mode}")
+        db.add(customer)
+        db.commit()
+        customer_id = customer.customer_id
+
+        txn = create_transaction(db, TransactionCreate(**trade(customer_id, "2024-03-01T10:00:00", 10, 500)), post_ledgers=True)
+        txn_id = txn.txn_id
+        # رکورد مستقل بعد از معامله تا محاسبه مجدد بیلانس رکوردهای بعدی هم بررسی شود
+        create_gold_ledger(db, GoldLedgerCreate(
+            customer_id=customer_id, description="رکورد مستقل", received=2, paid=0,
+            transaction_date=datetime(2024, 3, 5, 12, 0),
+        ))
+        verify(mode, "create", customer_id, txn_id, Decimal("10"), Decimal("-500"), Decimal("2"))
+
+        update_transaction(
+            db, get_transaction(db, txn_id),
+            TransactionUpdate(**trade(customer_id, "2024-03-02T09:00:00", 6, 300)), void_ledgers=void_ledgers,
+        )
+        verify(mode, "update", customer_id, txn_id, Decimal("6"), Decimal("-300"), Decimal("2"))
+
+        delete_transaction(db, txn_id, void_ledgers=void_ledgers)
+        verify(mode, "delete", customer_id, txn_id, Decimal("0"), Decimal("0"), Decimal("2"))
+        # در حالت delete فقط رکورد مستقل می‌ماند؛ در حالت void رکوردهای ابطال‌شده دیگر به معامله حذف‌شده اشاره نمی‌کنند
+        remaining = db.query(GoldLedger).filter(GoldLedger.customer_id == customer_id).count()
+        if not void_ledgers and remaining != 1:
+            problems.append(f"{mode} / delete: {remaining - 1} رکورد طلای معامله حذف نشده است")
+        dangling = db.query(GoldLedger).filter(GoldLedger.txn_id == txn_id).count()
+        if dangling:
+            problems.append(f"{mode} / delete: {dangling} رکورد طلا هنوز به معامله حذف‌شده وصل است")
+    db.close()
+
+    if problems:
+        print("❌ مغایرت:")
+        for problem in problems:
+            print(f"  {problem}")
+        return 1
+    print("✅ رکوردهای روزنامچه معاملات با ویرایش و حذف هماهنگ است")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import argparse
+import os
+import sys
+
+# اجرای اسکریپت از پوشه backend: python tools/customer_balances.py check
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.database import Base, SessionLocal, engine
+import app.models  # noqa: F401  (ثبت تمام مدل‌ها قبل از اولین کوئری)
+from app.crud.customer_balance import check_customer_balances, rebuild_customer_balances
+
+
+def check():
+    """
+    مقایسه جدول customer_balances با جمع واقعی روزنامچه‌های طلا و دالر
+    """
+    db = SessionLocal()
+    try:
+        mismatches = check_customer_balances(db)
+    finally:
+        db.close()
+
+    if not mismatches:
+        print("✅ جدول بیلانس مشتریان با روزنامچه‌ها مطابقت دارد.")
+        return 0
+
+    print(f"❌ {len(mismatches)} مغایرت یافت شد:")
+    for m in mismatches:
+        print(
+            f"  مشتری {m['customer_id']}: "
+            f"طلا {m['stored_gold_balance']} ≠ {m['expected_gold_balance']}, "
+            f"دالر {m['stored_usd_balance']} ≠ {m['expected_usd_balance']}"
+        )
+    return 1
+
+
+def rebuild():
+    """
+    بازسازی کامل جدول customer_balances از روی روزنامچه‌ها
+    """
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        count = rebuild_customer_balances(db)
+    finally:
+        db.close()
+    print(f"✅ بیلانس {count} مشتری بازسازی شد.")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="بررسی و بازسازی جدول بیلانس مشتریان")
+    parser.add_argument("command", choices=["check", "rebuild"])
+    args = parser.parse_args()
+    sys.exit(check() if args.command == "check" else rebuild())
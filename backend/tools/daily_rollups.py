@@ -0,0 +1,54 @@
+import argparse
+import os
+import sys
+
+# اجرای اسکریپت از پوشه backend: python tools/daily_rollups.py check
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.database import Base, SessionLocal, engine
+import app.models  # noqa: F401  (ثبت تمام مدل‌ها قبل از اولین کوئری)
+from app.crud.daily_rollup import check_daily_rollups, rebuild_daily_rollups
+
+
+def check():
+    """
+    مقایسه جداول جمع روزانه با جمع واقعی معاملات، روزنامچه‌ها و مصارف
+    """
+    db = SessionLocal()
+    try:
+        mismatches = check_daily_rollups(db)
+    finally:
+        db.close()
+
+    if not mismatches:
+        print("✅ جمع‌های روزانه با جداول اصلی مطابقت دارند.")
+        return 0
+
+    print(f"❌ {len(mismatches)} مغایرت یافت شد:")
+    for m in mismatches[:50]:
+        print(f"  {m['table']} {m['key']} {m['column']}: {m['stored']} ≠ {m['expected']}")
+    if len(mismatches) > 50:
+        print(f"  ... و {len(mismatches) - 50} مغایرت دیگر")
+    return 1
+
+
+def rebuild():
+    """
+    بازسازی کامل جداول جمع روزانه از روی جداول اصلی
+    """
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        counts = rebuild_daily_rollups(db)
+    finally:
+        db.close()
+    for table, count in counts.items():
+        print(f"✅ {table}: {count} ردیف")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="بررسی و بازسازی جداول جمع روزانه داشبورد")
+    parser.add_argument("command", choices=["check", "rebuild"])
+    args = parser.parse_args()
+    sys.exit(check() if args.command == "check" else rebuild())
@@ -0,0 +1,83 @@
+"""
+snapshot فشرده و سازگار از دیتابیس SQLite (API آنلاین بک‌آپ + integrity_check + چرخش نسخه‌ها)
+
+اجرا از پوشه backend:
+    python tools/sqlite_snapshot.py create
+    python tools/sqlite_snapshot.py list
+    python tools/sqlite_snapshot.py verify backups/snapshot_....db.gz
+    python tools/sqlite_snapshot.py restore backups/snapshot_....db.gz restored.db
+"""
+import argparse
+import gzip
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.sqlite_backup import SnapshotError, create_snapshot, list_snapshots, verify_snapshot
+
+
+def create():
+    try:
+        result = create_snapshot()
+    except SnapshotError as e:
+        print(f"❌ {e}")
+        return 1
+    print(
+        f"✅ {result['filename']}: {result['database_size']} بایت -> {result['size']} بایت "
+        f"در {result['seconds']} ثانیه"
+    )
+    for name in result["rotated"]:
+        print(f"   حذف نسخه قدیمی: {name}")
+    return 0
+
+
+def show():
+    for snapshot in list_snapshots():
+        print(f"{snapshot['filename']}  {snapshot['size']} بایت  {snapshot['created_at']:%Y-%m-%d %H:%M:%S}")
+    return 0
+
+
+def verify(path):
+    problems = verify_snapshot(path)
+    if problems:
+        print(f"❌ {path}:")
+        for problem in problems:
+            print(f"   {problem}")
+        return 1
+    print(f"✅ {path}: integrity_check = ok")
+    return 0
+
+
+def restore(path, target):
+    if os.path.exists(target):
+        print(f"❌ فایل مقصد وجود دارد: {target}")
+        return 1
+    if verify(path):
+        return 1
+    with gzip.open(path, "rb") as src, open(target, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    print(f"✅ {target} بازیابی شد.")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="snapshot فشرده از دیتابیس SQLite")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("create")
+    sub.add_parser("list")
+    verify_parser = sub.add_parser("verify")
+    verify_parser.add_argument("path")
+    restore_parser = sub.add_parser("restore")
+    restore_parser.add_argument("path")
+    restore_parser.add_argument("target")
+    args = parser.parse_args()
+
+    if args.command == "create":
+        sys.exit(create())
+    if args.command == "list":
+        sys.exit(show())
+    if args.command == "verify":
+        sys.exit(verify(args.path))
+    sys.exit(restore(args.path, args.target))